@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def records(num_rows, prefix, version=0):
+    return [{"cIdTipoId": f"{prefix}{i:07d}", "cDescripcion": f"Tipo {i} v{version}"} for i in range(num_rows)]
+
+
+async def single_rows(client, rows):
+    """Una peticion POST /tiposid/ por fila: SELECT + INSERT + commit + refresh cada una."""
+    start = time.perf_counter()
+    for record in rows:
+        response = await client.post("/tiposid/", json=record)
+        assert response.status_code == 201
+    return len(rows) / (time.perf_counter() - start)
+
+
+async def bulk(client, rows, chunk):
+    start = time.perf_counter()
+    response = await client.post("/tiposid/bulk", params={"chunk": chunk}, json=rows)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return len(rows) / elapsed, response.json()["totales"]
+
+
+async def run(app, label, num_single, num_bulk):
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://t", timeout=600) as client:
+            rate = await single_rows(client, records(num_single, f"{label[0]}S"))
+            print(f"{label:>6}{'POST /tiposid/ (fila a fila)':>36}{'-':>7}{num_single:>9,}{rate:>11,.0f}{'creado':>26}")
+            for n, chunk in enumerate((100, 1000, 5000)):
+                prefix = f"{label[0]}{n}"   # cIdTipoId tiene 10 caracteres como maximo
+                for version, phase in ((0, "alta"), (1, "actualizacion")):
+                    rate, totals = await bulk(client, records(num_bulk, prefix, version), chunk)
+                    summary = ", ".join(f"{name} {count:,}" for name, count in totals.items())
+                    print(f"{label:>6}{'POST /tiposid/bulk (' + phase + ')':>36}{chunk:>7}{num_bulk:>9,}{rate:>11,.0f}{summary:>26}")
+
+
+def main():
+    num_single = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    num_bulk = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{data_dir}/empresa.db")
+        import main as sync_app
+        import main_async as async_app
+        print(f"Base de datos: {os.environ['DATABASE_URL']}\n")
+        print(f"{'app':>6}{'endpoint':>36}{'lote':>7}{'filas':>9}{'filas/s':>11}{'estados':>26}")
+        asyncio.run(run(sync_app.app, "sync", num_single, num_bulk))
+        asyncio.run(run(async_app.app, "async", num_single, num_bulk))
+
+
+if __name__ == "__main__":
+    main()
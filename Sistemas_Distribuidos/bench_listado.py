@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+from sqlalchemy import insert, select
+
+
+def populate(engine, num_rows, batch=50_000):
+    from models import TipoId
+    with engine.begin() as conn:
+        for start in range(0, num_rows, batch):
+            conn.execute(insert(TipoId), [{"cIdTipoId": f"T{i:08d}", "cDescripcion": f"Tipo de identificacion {i}"}
+                                          for i in range(start, min(start + batch, num_rows))])
+
+
+def measure(consume):
+    """Tiempo sin instrumentar y pico de memoria Python (tracemalloc) de una pasada completa."""
+    start = time.perf_counter()
+    rows = consume()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    consume()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{data_dir}/empresa.db")
+        import main as sync_app
+        import main_async as async_app
+        from crud import page_query
+
+        populate(sync_app.engine, num_rows)
+        print(f"{num_rows:,} filas en {os.environ['DATABASE_URL']}\n")
+
+        # Comprobacion de extremo a extremo sobre el endpoint (pocas filas: el transporte ASGI de httpx
+        # acumula el cuerpo entero, asi que la memoria se mide sobre el generador del servidor)
+        async def check(app):
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+                    page = (await client.get("/tiposid/", params={"limit": 3, "after": "T00000010"})).json()
+                    assert [item["cIdTipoId"] for item in page["items"]] == ["T00000011", "T00000012", "T00000013"]
+                    assert page["next_after"] == "T00000013"
+                    head = await client.get("/tiposid/", params={"format": "ndjson", "after": f"T{num_rows - 3:08d}"})
+                    assert [json.loads(line)["cIdTipoId"] for line in head.text.splitlines()] == \
+                        [f"T{i:08d}" for i in range(num_rows - 2, num_rows)]
+        asyncio.run(check(sync_app.app))
+        asyncio.run(check(async_app.app))
+
+        def load_all():
+            # Lo que haria un listado ingenuo: toda la tabla en memoria y un solo JSON
+            with sync_app.SessionLocal() as db:
+                items = db.scalars(page_query(None)).all()
+                body = json.dumps([{"cIdTipoId": r.cIdTipoId, "cDescripcion": r.cDescripcion} for r in items])
+                return len(items) if body else 0
+
+        def stream_sync():
+            return sum(chunk.count("\n") for chunk in sync_app.stream_tipos_id(None))
+
+        def stream_async():
+            async def consume():
+                return sum([chunk.count("\n") async for chunk in async_app.stream_tipos_id(None)])
+            return asyncio.run(consume())
+
+        def keyset_pages(limit=1000):
+            # Recorre la tabla pagina a pagina como un cliente, siguiendo next_after
+            rows, after = 0, None
+            with sync_app.SessionLocal() as db:
+                while True:
+                    items = db.scalars(page_query(after, limit)).all()
+                    rows += len(items)
+                    if len(items) < limit:
+                        return rows
+                    after = items[-1].cIdTipoId
+
+        print(f"{'modo':>28}{'filas':>11}{'tiempo (s)':>12}{'filas/s':>11}{'pico memoria (MiB)':>20}")
+        for label, consume in (("todo en memoria (.all())", load_all), ("NDJSON sync", stream_sync),
+                               ("NDJSON async", stream_async), ("keyset, paginas de 1000", keyset_pages)):
+            rows, elapsed, peak = measure(consume)
+            assert rows == num_rows
+            print(f"{label:>28}{rows:>11,}{elapsed:>12.2f}{rows / elapsed:>11,.0f}{peak / 2**20:>20.1f}")
+
+        # Coste de la ultima pagina: keyset usa el indice, OFFSET recorre todo lo anterior
+        with sync_app.SessionLocal() as db:
+            last = f"T{num_rows - 1001:08d}"
+            start = time.perf_counter()
+            db.scalars(page_query(last, 1000)).all()
+            keyset = time.perf_counter() - start
+            start = time.perf_counter()
+            db.scalars(page_query(None).offset(num_rows - 1000).limit(1000)).all()
+            offset = time.perf_counter() - start
+        print(f"\nUltima pagina: keyset {keyset * 1000:.1f} ms, OFFSET {offset * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
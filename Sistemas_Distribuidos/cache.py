@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+VERSION_TTL = 3600  # Segundos que el backend recuerda la version de una clave tras invalidarla
+
+
+class DictBackend:
+    """Stub local de un cache compartido (mismo contrato que RedisBackend): valores JSON con TTL.
+
+    delete() sube la version de la clave; set() con version solo escribe si no cambio.
+    """
+    blocking = False   # En memoria: se puede llamar desde el event loop
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}   # clave -> (version, expira)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None or item[1] <= time.monotonic():
+                self.data.pop(key, None)
+                return None
+            return item[0]
+
+    def version(self, key):
+        with self.lock:
+            return self._version(key)
+
+    def _version(self, key):
+        item = self.versions.get(key)
+        if item is None or item[1] <= time.monotonic():
+            self.versions.pop(key, None)
+            return 0
+        return item[0]
+
+    def set(self, key, value, ttl, version=None):
+        with self.lock:
+            if version is not None and version != self._version(key):
+                return False
+            self.data[key] = (value, time.monotonic() + ttl)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.versions[key] = (self._version(key) + 1, time.monotonic() + VERSION_TTL)
+            self.data.pop(key, None)
+
+
+class RedisBackend:
+    """Cache compartido entre procesos/replicas de la API sobre Redis (requiere el paquete redis)."""
+    blocking = True    # Cliente sincrono: cada llamada es un viaje de red
+    # Escribe solo si la version de la clave sigue siendo la leida antes de ir a la base
+    SET_IF_VERSION = """
+    if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then return 0 end
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+    """
+
+    def __init__(self, url, prefix="tiposid:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImportError("CACHE_URL=redis://... requiere 'pip install redis'") from exc
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.set_if_version = self.client.register_script(self.SET_IF_VERSION)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else value.decode()
+
+    def version(self, key):
+        return int(self.client.get(self.prefix + "v:" + key) or 0)
+
+    def set(self, key, value, ttl, version=None):
+        if version is None:
+            return bool(self.client.set(self.prefix + key, value, ex=max(1, int(ttl))))
+        keys = [self.prefix + key, self.prefix + "v:" + key]
+        return bool(self.set_if_version(keys=keys, args=[version, value, max(1, int(ttl))]))
+
+    def delete(self, key):
+        with self.client.pipeline() as pipe:   # MULTI/EXEC: version y borrado juntos
+            pipe.incr(self.prefix + "v:" + key)
+            pipe.expire(self.prefix + "v:" + key, VERSION_TTL)
+            pipe.delete(self.prefix + key)
+            pipe.execute()
+
+
+def backend_from_url(url):
+    """CACHE_URL: vacio = solo cache en proceso, memory:// = stub local, redis://... = Redis."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return DictBackend()
+    return RedisBackend(url)
+
+
+def etag_for(data):
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha1(body.encode()).hexdigest()[:16]}"', body
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match puede traer varias etiquetas, debiles (W/) o '*'."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class TTLCache:
+    """Cache LRU en proceso con caducidad por entrada y un cache compartido opcional detras.
+
+    Guarda (datos, etag) por clave. Los manejadores que escriben llaman a
+    invalidate(), que ademas sella la clave con un numero creciente: una lectura
+    que tomo generation() antes de la escritura no puede guardar el valor viejo,
+    ni aqui ni en el backend (que compara su propia version de la clave). Los
+    sellos se descartan como el LRU; una clave sin sello vale el mayor sello
+    descartado, asi que un descarte solo puede hacer fallar un set(), nunca
+    colar un valor viejo. Los endpoints sincronos corren en hilos: todo va con lock.
+
+    Con backend, otra replica puede invalidar una clave sin que este proceso se
+    entere: las entradas locales viven como mucho local_ttl, lo que acota cuanto
+    se sirve un valor viejo; el resto del TTL lo cubre el backend.
+    """
+    def __init__(self, maxsize=1024, ttl=60.0, backend=None, local_ttl=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.local_ttl = local_ttl
+        self.entries = OrderedDict()   # clave -> (expira, datos, etag)
+        self.stamps = OrderedDict()    # clave -> sello de su ultima invalidacion
+        self.next_stamp = itertools.count(1)
+        self.floor = 0                 # Mayor sello descartado
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None:
+                if item[0] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return item[1], item[2]
+                del self.entries[key]
+            stamp = self.stamps.get(key, self.floor)
+        if self.backend is not None and self.ttl > 0:
+            body = self.backend.get(key)
+            if body is not None:
+                data = json.loads(body)
+                etag = etag_for(data)[0]
+                with self.lock:
+                    self.hits += 1
+                    # Una invalidacion durante la lectura: se sirve, pero no se guarda
+                    if stamp == self.stamps.get(key, self.floor):
+                        self._store(key, data, etag)
+                return data, etag
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def generation(self, key):
+        """Tomarla antes de leer la base y pasarla a set()."""
+        with self.lock:
+            stamp = self.stamps.get(key, self.floor)
+        version = self.backend.version(key) if self.backend is not None and self.ttl > 0 else None
+        return stamp, version
+
+    def set(self, key, data, generation=None):
+        """Guarda datos ya serializables y devuelve (datos, etag)."""
+        etag, body = etag_for(data)
+        if self.ttl <= 0:
+            return data, etag
+        stamp, version = generation if generation is not None else (None, None)
+        # Primero el backend (compara su version de forma atomica); si rechaza, tampoco en local
+        if self.backend is not None and not self.backend.set(key, body, self.ttl, version):
+            return data, etag
+        with self.lock:
+            if stamp is None or stamp == self.stamps.get(key, self.floor):
+                self._store(key, data, etag)
+        return data, etag
+
+    def _store(self, key, data, etag):
+        ttl = min(self.ttl, self.local_ttl) if self.backend is not None else self.ttl
+        self.entries[key] = (time.monotonic() + ttl, data, etag)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return data, etag
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.stamps[key] = next(self.next_stamp)
+            self.stamps.move_to_end(key)
+            if len(self.stamps) > self.maxsize:
+                self.floor = self.stamps.popitem(last=False)[1]
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def invalidate_many(self, keys):
+        for key in keys:
+            self.invalidate(key)
+
+    async def run(self, method, *args):
+        """Llama a un metodo del cache desde el event loop; en un hilo si el backend bloquea."""
+        if self.backend is not None and self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.stamps.clear()
+            self.floor = next(self.next_stamp)
+            self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Cache de la tabla TiposId compartido por main.py y main_async.py (CACHE_TTL=0 lo desactiva)
+tipos_cache = TTLCache(
+    maxsize=int(os.getenv("CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("CACHE_TTL", "60")),
+    backend=backend_from_url(os.getenv("CACHE_URL")),
+    local_ttl=float(os.getenv("CACHE_LOCAL_TTL", "1")),
+)
@@ -0,0 +1,167 @@
+import collections
+import heapq
+import random
+import statistics
+import sys
+import time
+
+
+class CausalBroadcast:
+    """Entrega causal de difusiones (Birman-Schiper-Stephenson) con un buffer de espera indexado.
+
+    Un mensaje de j con vector V se entrega cuando V[j] == D[j] + 1 y
+    V[k] <= D[k] para k != j, siendo D lo ya entregado. Los mensajes retenidos
+    se guardan por (remitente, secuencia) y se apuntan en `blocked` bajo la
+    primera dependencia que les falta, (k, c): al entregar el mensaje c de k
+    solo se revisan los que esperaban exactamente eso, sin recorrer el buffer.
+    """
+    def __init__(self, process_id, num_processes, on_deliver=None):
+        self.id = process_id
+        self.delivered = [0] * num_processes
+        self.pending = {}                               # (remitente, secuencia) -> mensaje
+        self.blocked = collections.defaultdict(list)    # (proceso, cuenta) -> claves en espera
+        self.on_deliver = on_deliver
+        self.checks = 0
+        self.max_pending = 0
+
+    def broadcast(self, payload):
+        """Los envios propios cuentan como entregados: el vector del mensaje es D con la nueva secuencia."""
+        self.delivered[self.id] += 1
+        return (self.id, tuple(self.delivered), payload)
+
+    def missing(self, sender, vector):
+        """Primera dependencia sin entregar como (proceso, cuenta que debe alcanzar), o None."""
+        self.checks += 1
+        delivered = self.delivered
+        if vector[sender] != delivered[sender] + 1:
+            return sender, vector[sender] - 1
+        for k, count in enumerate(vector):
+            if count > delivered[k] and k != sender:
+                return k, count
+        return None
+
+    def receive(self, message):
+        sender, vector = message[0], message[1]
+        key = (sender, vector[sender])
+        if vector[sender] <= self.delivered[sender] or key in self.pending:
+            return   # Duplicado
+        self.pending[key] = message
+        self.max_pending = max(self.max_pending, len(self.pending))
+        self.try_deliver(key)
+
+    def try_deliver(self, key):
+        stack = [key]
+        while stack:
+            key = stack.pop()
+            message = self.pending[key]
+            need = self.missing(message[0], message[1])
+            if need is not None:
+                self.blocked[need].append(key)
+                continue
+            del self.pending[key]
+            self.deliver(message)
+            sender = message[0]
+            stack.extend(self.blocked.pop((sender, self.delivered[sender]), ()))
+
+    def deliver(self, message):
+        self.delivered[message[0]] += 1
+        if self.on_deliver is not None:
+            self.on_deliver(self, message)
+
+
+class RescanCausalBroadcast(CausalBroadcast):
+    """Referencia sin indice: cada llegada y cada entrega vuelven a revisar todo el buffer."""
+    def try_deliver(self, key):
+        progress = True
+        while progress:
+            progress = False
+            for key, message in list(self.pending.items()):
+                if self.missing(message[0], message[1]) is None:
+                    del self.pending[key]
+                    self.deliver(message)
+                    progress = True
+
+
+def simulate(layer_class, num_processes=16, messages_per_process=200, jitter=0.05,
+             base_latency=0.001, reply_probability=0.3, seed=0):
+    """Simulacion de eventos discretos: difusiones con retardos aleatorios (reordenamiento) y respuestas.
+
+    Cada difusion provoca de media reply_probability respuestas de quienes la
+    reciben, asi que hay cadenas causales reales. Devuelve la espera en el
+    buffer (entrega menos llegada), su tamano maximo y las comprobaciones por mensaje.
+    """
+    rng = random.Random(seed)
+    events = []        # (instante, orden, destino, mensaje)
+    order = 0
+    arrivals = {}
+    holdbacks = []
+    sent = [0] * num_processes
+    budget = num_processes * messages_per_process
+    now = 0.0
+
+    def send(layer, payload):
+        nonlocal order, budget
+        budget -= 1
+        sent[layer.id] += 1
+        message = layer.broadcast(payload)
+        for dst in range(num_processes):
+            if dst != layer.id:
+                order += 1
+                heapq.heappush(events, (now + base_latency + rng.uniform(0, jitter), order, dst, message))
+
+    def on_deliver(layer, message):
+        # Todo lo que V dice que precede al mensaje ya esta entregado
+        sender, vector = message[0], message[1]
+        assert all(vector[k] <= layer.delivered[k] for k in range(num_processes))
+        holdbacks.append(now - arrivals.pop((layer.id, sender, vector[sender])))
+        if budget > 0 and rng.random() < reply_probability / (num_processes - 1):
+            send(layer, ("respuesta", sender, vector[sender]))
+
+    layers = [layer_class(i, num_processes, on_deliver) for i in range(num_processes)]
+    for layer in layers:
+        for _ in range(messages_per_process // 2):
+            order += 1
+            heapq.heappush(events, (rng.uniform(0, 1.0), order, layer.id, None))
+
+    cpu = time.process_time()
+    while events:
+        now, _, dst, message = heapq.heappop(events)
+        layer = layers[dst]
+        if message is None:
+            if budget > 0:
+                send(layer, ("dato", dst))
+            continue
+        arrivals[(dst, message[0], message[1][message[0]])] = now
+        layer.receive(message)
+    cpu = time.process_time() - cpu
+
+    assert not arrivals and all(not layer.pending for layer in layers)
+    total = sum(sent)
+    assert all(layer.delivered == sent for layer in layers)
+    holdbacks.sort()
+    return {
+        "messages": total,
+        "holdback_mean": statistics.mean(holdbacks),
+        "holdback_p99": holdbacks[int(len(holdbacks) * 0.99)],
+        "held_fraction": sum(1 for h in holdbacks if h > 0) / len(holdbacks),
+        "max_pending": max(layer.max_pending for layer in layers),
+        "checks": sum(layer.checks for layer in layers) / len(holdbacks),
+        "cpu": cpu,
+    }
+
+
+def main():
+    num_processes = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    print(f"Difusion causal: {num_processes} procesos, retardo base 1 ms + uniforme(0, jitter)\n")
+    print(f"{'jitter (ms)':>12}{'buffer':>10}{'msgs':>7}{'retenidos':>11}{'espera media (ms)':>19}"
+          f"{'espera p99 (ms)':>17}{'buffer max':>12}{'checks/entrega':>16}{'CPU (ms)':>10}")
+    for jitter in (0.0, 0.005, 0.02, 0.05, 0.2):
+        for name, layer_class in (("indexado", CausalBroadcast), ("reescaneo", RescanCausalBroadcast)):
+            r = simulate(layer_class, num_processes, jitter=jitter)
+            print(f"{jitter * 1000:>12.0f}{name:>10}{r['messages']:>7}{r['held_fraction']:>11.1%}"
+                  f"{r['holdback_mean'] * 1000:>19.2f}{r['holdback_p99'] * 1000:>17.2f}{r['max_pending']:>12}"
+                  f"{r['checks']:>16.1f}{r['cpu'] * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
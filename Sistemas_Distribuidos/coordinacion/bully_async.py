@@ -0,0 +1,185 @@
+import asyncio
+import random
+import sys
+import time
+
+ELECTION, OK, COORDINATOR = "ELECTION", "OK", "COORDINATOR"
+
+
+class Network:
+    """Red simulada sobre la cola de callbacks del event loop: los envios no bloquean.
+
+    send()/broadcast() programan la entrega tras una latencia aleatoria con
+    call_later; un broadcast a 1000 procesos es un solo temporizador.
+    """
+    def __init__(self, latency=(0.001, 0.005)):
+        self.latency = latency
+        self.processes = {}
+        self.messages = 0
+        self.agreed = 0
+        self.expected_leader = None
+        self.alive = 0
+        self.converged = None
+        self.tasks = set()      # Elecciones en curso (se cancelan en shutdown)
+        self.closed = False
+
+    def register(self, process):
+        self.processes[process.id] = process
+
+    def send(self, dst, message):
+        self.broadcast([dst], message)
+
+    def broadcast(self, dsts, message):
+        if not dsts:
+            return
+        self.messages += len(dsts)
+        delay = random.uniform(*self.latency)
+        asyncio.get_running_loop().call_later(delay, self._deliver, dsts, message)
+
+    def _deliver(self, dsts, message):
+        if self.closed:
+            return
+        for dst in dsts:
+            target = self.processes[dst]
+            if target.active:  # Un proceso caido no recibe ni responde
+                target.receive(message)
+
+    def expect_leader(self, leader_id):
+        """Prepara la medicion: converge cuando todos los activos reconocen a leader_id."""
+        self.expected_leader = leader_id
+        self.agreed = sum(1 for p in self.processes.values() if p.active and p.leader == leader_id)
+        self.alive = sum(1 for p in self.processes.values() if p.active)
+        self.converged = asyncio.Event()
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def shutdown(self):
+        """Descarta los mensajes en vuelo y cancela (y espera) las elecciones pendientes."""
+        self.closed = True
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def leader_changed(self, old, new):
+        if self.expected_leader is None:
+            return
+        self.agreed += (new == self.expected_leader) - (old == self.expected_leader)
+        if self.agreed == self.alive:
+            self.converged.set()
+
+
+class BullyProcess:
+    """Proceso Bully guiado por mensajes: ningun lock ni espera se mantiene durante los envios."""
+    def __init__(self, process_id, network, timeout=0.05, verbose=False):
+        self.id = process_id
+        self.network = network
+        self.timeout = timeout
+        self.verbose = verbose
+        self.leader = -1
+        self.active = True
+        self.electing = False
+        self.ok_received = asyncio.Event()
+        self.coordinator_received = asyncio.Event()
+        network.register(self)
+
+    def log(self, text):
+        if self.verbose:
+            print(f"P{self.id}: {text}")
+
+    def set_leader(self, leader_id):
+        old, self.leader = self.leader, leader_id
+        self.network.leader_changed(old, leader_id)
+        self.log(f"Nuevo lider establecido: P{leader_id}")
+
+    def receive(self, message):
+        kind, sender = message
+        if kind == ELECTION:
+            self.network.send(sender, (OK, self.id))
+            self.begin_election()
+        elif kind == OK:
+            self.ok_received.set()
+        elif kind == COORDINATOR:
+            if sender < self.id:
+                # Un proceso menor se declaro lider: este lo supera
+                self.begin_election()
+            else:
+                self.set_leader(sender)
+                self.coordinator_received.set()
+
+    def begin_election(self):
+        """Lanza una eleccion en segundo plano si no hay una en curso."""
+        if self.active and not self.electing:
+            self.electing = True
+            self.network.spawn(self.start_election())
+
+    async def start_election(self):
+        self.log("INICIA ELECCION")
+        try:
+            while self.active:
+                self.ok_received.clear()
+                self.coordinator_received.clear()
+                higher = [pid for pid in self.network.processes if pid > self.id]
+                # 1. ELECTION a todos los mayores a la vez
+                self.network.broadcast(higher, (ELECTION, self.id))
+
+                # 2. Un unico timeout para todas las respuestas OK
+                if higher:
+                    try:
+                        await asyncio.wait_for(self.ok_received.wait(), self.timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                if not self.ok_received.is_set():
+                    self.set_leader(self.id)
+                    others = [pid for pid in self.network.processes if pid != self.id]
+                    self.network.broadcast(others, (COORDINATOR, self.id))
+                    return
+
+                # 3. Algun mayor respondio: esperar su COORDINATOR o reintentar
+                try:
+                    await asyncio.wait_for(self.coordinator_received.wait(), self.timeout * 4)
+                    return
+                except asyncio.TimeoutError:
+                    self.log("Sin COORDINATOR tras el OK. Reintentando eleccion.")
+        finally:
+            self.electing = False
+
+    def fail(self):
+        self.active = False
+        self.log("HA FALLADO (Inactivo)")
+
+
+async def run_election(num_processes, timeout=0.05, verbose=False):
+    """Falla el lider (mayor id), P0 inicia la eleccion y se mide hasta que todos acuerdan."""
+    network = Network()
+    processes = [BullyProcess(i, network, timeout, verbose) for i in range(num_processes)]
+    for p in processes:
+        p.set_leader(num_processes - 1)
+
+    processes[-1].fail()
+    network.expect_leader(num_processes - 2)
+    start = time.perf_counter()
+    processes[0].begin_election()
+    await network.converged.wait()
+    elapsed = time.perf_counter() - start
+    await network.shutdown()
+    return elapsed, network.messages
+
+
+def main():
+    print("--- ELECCION BULLY ASINCRONA (5 procesos) ---")
+    elapsed, messages = asyncio.run(run_election(5, verbose=True))
+    print(f"Eleccion completada en {elapsed * 1000:.1f} ms con {messages} mensajes.\n")
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 50, 100, 500, 1000]
+    print(f"{'procesos':>9}{'tiempo (ms)':>14}{'mensajes':>12}")
+    for n in sizes:
+        elapsed, messages = asyncio.run(run_election(n))
+        print(f"{n:>9}{elapsed * 1000:>14.1f}{messages:>12,}")
+
+
+if __name__ == "__main__":
+    main()
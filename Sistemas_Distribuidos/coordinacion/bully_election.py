@@ -1,18 +1,43 @@
+# -*- coding: latin-1 -*-
+import os
+import sys
 import threading
 import time
 import random
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tolerancia-fallos"))
+from failure_detector import HeartbeatMonitor, PhiAccrualFailureDetector
+
+# Las elecciones de este ejemplo son llamadas sincronas encadenadas entre locks;
+# si varios detectores disparan a la vez, se ejecutan de a una.
+ELECTION_LOCK = threading.Lock()
+
 class Process:
-    def __init__(self, process_id, num_processes):
+    def __init__(self, process_id, num_processes, heartbeat_interval=0.1, phi_threshold=8.0):
         self.id = process_id
         self.num_processes = num_processes
         self.leader = -1
         self.active = True
-        self.lock = threading.Lock()
+        self.all_processes = []
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_thread = None
+        self.monitor = HeartbeatMonitor(
+            PhiAccrualFailureDetector(phi_threshold, first_heartbeat_estimate=heartbeat_interval),
+            self.on_leader_suspected,
+            check_interval=heartbeat_interval / 5,
+        )
+        # RLock: start_election llama a set_leader y, via receive_election, a receive_ok
+        # con el lock ya tomado; con un Lock normal el mismo hilo se bloquearia.
+        self.lock = threading.RLock()
 
     def set_leader(self, leader_id):
         with self.lock:
+            if leader_id != self.leader:
+                self.monitor.reset()  # El nuevo lider empieza con el beneficio de la duda
             self.leader = leader_id
+            if leader_id == self.id and self.all_processes and self.heartbeat_thread is None:
+                self.heartbeat_thread = threading.Thread(target=self.send_heartbeats, daemon=True)
+                self.heartbeat_thread.start()
             print(f"P{self.id}: Nuevo lder establecido: P{self.leader}")
 
     def start_election(self, all_processes):
@@ -55,8 +80,9 @@ class Process:
             print(f"P{self.id}: Recibido ELECTION de P{sender.id}. Respondiendo OK.")
             sender.receive_ok(self)
             
-            if self.leader != self.id: 
-                pass 
+            # Un proceso mayor y activo toma el relevo con su propia eleccion
+            if self.leader != self.id and self.all_processes:
+                self.start_election(self.all_processes)
             return True
 
     def receive_ok(self, sender):
@@ -74,17 +100,49 @@ class Process:
             if self.active:
                 self.set_leader(leader_id)
 
+    def start_failure_detection(self, all_processes):
+        """Arranca el monitor phi-accrual que vigila los heartbeats del lider."""
+        self.all_processes = all_processes
+        self.monitor.start()
+
+    def send_heartbeats(self):
+        while self.active and self.leader == self.id:
+            for p in self.all_processes:
+                if p is not self:
+                    p.receive_heartbeat(self.id)
+            time.sleep(self.heartbeat_interval)
+        self.heartbeat_thread = None
+
+    def receive_heartbeat(self, leader_id):
+        if self.active and leader_id == self.leader:
+            self.monitor.heartbeat()
+
+    def on_leader_suspected(self, phi):
+        """Callback del monitor: el lider dejo de enviar heartbeats, iniciar eleccion."""
+        suspected = self.leader
+        if not self.active or suspected in (-1, self.id):
+            return
+        with ELECTION_LOCK:
+            # Otra eleccion pudo haber elegido ya un lider nuevo mientras se esperaba
+            if self.active and self.leader == suspected:
+                print(f"P{self.id}: Lider P{suspected} sospechoso (phi={phi:.1f}). Eleccion automatica.")
+                self.start_election(self.all_processes)
+
     def fail(self):
         with self.lock:
             self.active = False
+            self.monitor.stop()
             print(f"--- P{self.id} HA FALLADO (Inactivo) ---")
 
 def main():
     NUM_PROCESSES = 5
     processes = [Process(i, NUM_PROCESSES) for i in range(NUM_PROCESSES)]
     all_processes = processes[:]
+    for p in processes:
+        p.start_failure_detection(all_processes)
     
-    processes[NUM_PROCESSES - 1].set_leader(NUM_PROCESSES - 1)
+    for p in processes:
+        p.set_leader(NUM_PROCESSES - 1)
     
     print("\n--- INICIO DE SIMULACIN ALGORITMO BULLY ---")
     
@@ -92,18 +150,18 @@ def main():
     time.sleep(1)
     processes[NUM_PROCESSES - 1].fail()
     
-    # 2. Iniciar eleccin (ej: P1 detecta el fallo)
+    # 2. Los detectores phi-accrual notan la falta de heartbeats e inician la eleccin solos
     time.sleep(1)
-    initiator_id = 1
-    processes[initiator_id].start_election(all_processes)
     
     # 3. Simular un segundo fallo durante la eleccin (ej: P3)
     time.sleep(2)
     processes[3].fail()
     
-    # 4. Simular una segunda eleccin (ej: P0 detecta el fallo)
+    # 4. La segunda eleccin tambin la dispara la deteccin automtica
     time.sleep(1)
-    processes[0].start_election(all_processes)
+
+    for p in processes:
+        p.monitor.stop()
 
 
 if __name__ == "__main__":
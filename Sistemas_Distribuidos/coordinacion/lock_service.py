@@ -0,0 +1,409 @@
+import asyncio
+import collections
+import contextlib
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+
+MAX_CLOCK_DRIFT = 0.05  # El cliente da por vencido su lease un 5% antes que el servidor
+
+
+class LockState:
+    """Estado de un lock con nombre en el servidor."""
+    __slots__ = ("holder", "token", "expires_at", "waiters", "expiry_handle")
+
+    def __init__(self):
+        self.holder = None        # Sesion que tiene el lease
+        self.token = 0
+        self.expires_at = 0.0
+        self.waiters = collections.deque()   # [sesion, writer, id de peticion, handle del timeout]
+        self.expiry_handle = None
+
+
+class LockServer:
+    """Servicio de locks por TCP (JSON por lineas) con leases y fencing tokens.
+
+    Cada concesion lleva un token global monotonicamente creciente; un recurso
+    que recuerda el mayor token visto rechaza escrituras de un antiguo poseedor
+    cuyo lease ya vencio (p.ej. tras una pausa larga). Las peticiones sobre un
+    lock ocupado esperan en una cola FIFO y se responden al concederse, sin
+    sondeo. Un lease que nadie renueva vence solo, y los locks de una conexion
+    que se cierra se liberan.
+    """
+    def __init__(self, lease_duration=5.0):
+        self.lease_duration = lease_duration
+        self.locks = {}
+        self.next_token = 0
+        self.sessions = {}      # Sesion -> nombres de los locks que tiene
+        self.session_ids = itertools.count(1)
+        self.messages = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        session = next(self.session_ids)
+        self.sessions[session] = set()
+        handlers = {"acquire": self.acquire, "release": self.release, "renew": self.renew}
+        try:
+            async for line in reader:
+                self.messages += 1
+                # Un mensaje mal formado se rechaza sin cerrar la sesion (perderia todos sus locks)
+                message = None
+                try:
+                    message = json.loads(line)
+                    handlers[message["op"]](session, writer, message)
+                except (ValueError, KeyError, TypeError) as exc:
+                    request_id = message.get("id") if isinstance(message, dict) else None
+                    self.reply(writer, {"id": request_id, "ok": False, "error": f"mensaje invalido: {exc!r}"})
+        except ConnectionError:
+            pass
+        finally:
+            self.drop_session(session)
+            writer.close()
+
+    def reply(self, writer, message):
+        if not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b"\n")
+
+    def acquire(self, session, writer, message):
+        name, request_id, timeout = message["lock"], message["id"], message.get("timeout")
+        if timeout is not None:
+            timeout = float(timeout)
+        loop = asyncio.get_running_loop()
+        lock = self.locks.get(name)
+        if lock is not None and lock.holder is not None and lock.expires_at <= loop.time():
+            # Lease vencido que check_expiry aun no proceso: pasa al primero de la cola, no al recien llegado
+            self.sessions[lock.holder].discard(name)
+            lock.holder = None
+            self.grant_next(name, lock)
+            lock = self.locks.get(name)
+        if lock is None:
+            lock = self.locks[name] = LockState()
+        if lock.holder is None:
+            self.grant(name, lock, session, writer, request_id, queued=False)
+        elif lock.holder == session:
+            self.reply(writer, {"id": request_id, "ok": False, "error": "lock ya concedido a esta sesion"})
+        else:
+            waiter = [session, writer, request_id, None]
+            if timeout is not None:
+                waiter[3] = loop.call_later(timeout, self.expire_waiter, name, lock, waiter)
+            lock.waiters.append(waiter)
+
+    def grant(self, name, lock, session, writer, request_id, queued):
+        loop = asyncio.get_running_loop()
+        self.next_token += 1
+        lock.holder, lock.token = session, self.next_token
+        lock.expires_at = loop.time() + self.lease_duration
+        self.sessions[session].add(name)
+        if lock.expiry_handle is None:
+            lock.expiry_handle = loop.call_at(lock.expires_at, self.check_expiry, name, lock)
+        self.reply(writer, {"id": request_id, "ok": True, "token": lock.token,
+                            "lease": self.lease_duration, "queued": queued})
+
+    def check_expiry(self, name, lock):
+        """Un solo temporizador por lock: las renovaciones solo mueven expires_at y aqui se reprograma."""
+        loop = asyncio.get_running_loop()
+        lock.expiry_handle = None
+        if lock.holder is None:
+            return
+        if lock.expires_at > loop.time():
+            lock.expiry_handle = loop.call_at(lock.expires_at, self.check_expiry, name, lock)
+            return
+        self.sessions[lock.holder].discard(name)
+        lock.holder = None
+        self.grant_next(name, lock)
+
+    def grant_next(self, name, lock):
+        while lock.waiters:
+            session, writer, request_id, timeout_handle = lock.waiters.popleft()
+            if session in self.sessions:
+                if timeout_handle is not None:
+                    timeout_handle.cancel()
+                self.grant(name, lock, session, writer, request_id, queued=True)
+                return
+        if lock.expiry_handle is not None:
+            lock.expiry_handle.cancel()
+        del self.locks[name]   # Sin poseedor ni espera: no ocupa memoria
+
+    def expire_waiter(self, name, lock, waiter):
+        if waiter in lock.waiters:
+            lock.waiters.remove(waiter)
+            self.reply(waiter[1], {"id": waiter[2], "ok": False, "error": "timeout"})
+
+    def release(self, session, writer, message):
+        name, request_id, token = message["lock"], message["id"], message["token"]
+        lock = self.locks.get(name)
+        ok = lock is not None and lock.holder == session and lock.token == token
+        if ok:
+            lock.holder = None
+            self.sessions[session].discard(name)
+            self.grant_next(name, lock)
+        self.reply(writer, {"id": request_id, "ok": ok})
+
+    def renew(self, session, writer, message):
+        """Renovacion por lotes: un mensaje extiende todos los leases que lista la sesion."""
+        request_id, locks = message["id"], message["locks"]
+        now = asyncio.get_running_loop().time()
+        renewed = []
+        for name, token in locks:
+            lock = self.locks.get(name)
+            ok = lock is not None and lock.holder == session and lock.token == token and lock.expires_at > now
+            if ok:
+                lock.expires_at = now + self.lease_duration
+            renewed.append(ok)
+        self.reply(writer, {"id": request_id, "ok": True, "renewed": renewed, "lease": self.lease_duration})
+
+    def drop_session(self, session):
+        for name in self.sessions.pop(session, ()):
+            lock = self.locks.get(name)
+            if lock is not None and lock.holder == session:
+                lock.holder = None
+                self.grant_next(name, lock)
+
+
+class LockError(Exception):
+    """El servidor rechazo la peticion de lock por un motivo distinto del timeout."""
+
+
+class Lease:
+    """Lease concedido al cliente: valido mientras no se pierda y no venza su plazo local."""
+    def __init__(self, name, token, expires_at):
+        self.name = name
+        self.token = token
+        self.expires_at = expires_at
+        self.lost = False
+
+    @property
+    def valid(self):
+        return not self.lost and asyncio.get_running_loop().time() < self.expires_at
+
+
+class LockClient:
+    """Cliente asyncio: las peticiones se multiplexan en una conexion y un solo hilo de renovacion por lotes."""
+    def __init__(self, host, port, renew_interval=None):
+        self.host = host
+        self.port = port
+        self.renew_interval = renew_interval
+        self.request_ids = itertools.count(1)
+        self.pending = {}
+        self.held = {}           # Nombre -> Lease
+        self.rtt = 0.0
+        self.reader = self.writer = None
+        self.closed = None       # Error con el que fallan las peticiones tras perder la conexion
+        self.tasks = []
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.tasks = [asyncio.create_task(self._read_replies()), asyncio.create_task(self._renew_loop())]
+        return self
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+    async def _read_replies(self):
+        try:
+            async for line in self.reader:
+                message = json.loads(line)
+                future = self.pending.pop(message["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            # Sin conexion el servidor ya libero los locks de la sesion y nadie respondera
+            self.closed = ConnectionError("Conexion con el servidor de locks cerrada")
+            for lease in self.held.values():
+                lease.lost = True
+            self.held.clear()
+            pending, self.pending = self.pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(self.closed)
+
+    def _call(self, message):
+        if self.closed is not None:
+            raise self.closed
+        message["id"] = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message["id"]] = future
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        return future
+
+    def _lease_end(self, start, lease):
+        return start + lease * (1 - MAX_CLOCK_DRIFT)
+
+    async def acquire(self, name, timeout=None):
+        """Espera en la cola del servidor hasta obtener el lock (o hasta timeout) y devuelve el Lease."""
+        loop = asyncio.get_running_loop()
+        sent = loop.time()
+        reply = await self._call({"op": "acquire", "lock": name, "timeout": timeout})
+        if not reply["ok"]:
+            if reply["error"] == "timeout":
+                raise TimeoutError(f"No se obtuvo el lock '{name}' en {timeout} s")
+            raise LockError(f"No se obtuvo el lock '{name}': {reply['error']}")
+        received = loop.time()
+        if not reply["queued"]:
+            self.rtt = received - sent
+        if self.renew_interval is None:
+            self.renew_interval = reply["lease"] / 3
+        # La concesion pudo ocurrir hasta un viaje de ida y vuelta antes de recibirla
+        lease = Lease(name, reply["token"], self._lease_end(received - self.rtt, reply["lease"]))
+        self.held[name] = lease
+        return lease
+
+    async def release(self, lease):
+        self.held.pop(lease.name, None)
+        reply = await self._call({"op": "release", "lock": lease.name, "token": lease.token})
+        return reply["ok"]
+
+    @contextlib.asynccontextmanager
+    async def lock(self, name, timeout=None):
+        lease = await self.acquire(name, timeout)
+        try:
+            yield lease
+        finally:
+            await self.release(lease)
+
+    async def renew_all(self):
+        """Renueva todos los leases con un solo mensaje; los que el servidor rechaza se marcan perdidos."""
+        leases = list(self.held.values())
+        if not leases:
+            return 0
+        loop = asyncio.get_running_loop()
+        sent = loop.time()
+        reply = await self._call({"op": "renew", "locks": [[lease.name, lease.token] for lease in leases]})
+        for lease, ok in zip(leases, reply["renewed"]):
+            if ok:
+                lease.expires_at = self._lease_end(sent, reply["lease"])
+            else:
+                lease.lost = True
+                if self.held.get(lease.name) is lease:
+                    del self.held[lease.name]
+        return len(leases)
+
+    async def _renew_loop(self):
+        while self.closed is None:
+            await asyncio.sleep(self.renew_interval or 0.1)
+            with contextlib.suppress(ConnectionError):
+                await self.renew_all()
+
+
+class FencedStore:
+    """Recurso protegido: acepta una escritura solo si su token no es menor que el ultimo visto."""
+    def __init__(self):
+        self.data = {}
+        self.max_token = {}
+
+    def write(self, key, value, token):
+        if token < self.max_token.get(key, 0):
+            return False
+        self.max_token[key] = token
+        self.data[key] = value
+        return True
+
+
+async def fencing_demo():
+    server = LockServer(lease_duration=0.5)
+    port = await server.start()
+    store = FencedStore()
+    a = await LockClient("127.0.0.1", port).connect()
+    b = await LockClient("127.0.0.1", port).connect()
+
+    lease_a = await a.acquire("recurso")
+    print(f"Cliente A obtiene 'recurso' con token {lease_a.token}; escribe: {store.write('x', 'A', lease_a.token)}")
+
+    # A sufre una pausa larga (p.ej. GC) sin renovar; B espera en la cola del servidor
+    a.tasks[1].cancel()
+    waiting_b = asyncio.create_task(b.acquire("recurso"))
+    await asyncio.sleep(1.0)
+    lease_b = await waiting_b
+    print(f"El lease de A vence; B obtiene 'recurso' con token {lease_b.token}; escribe: "
+          f"{store.write('x', 'B', lease_b.token)}")
+    print(f"A despierta (lease valido segun A: {lease_a.valid}) e intenta escribir con token {lease_a.token}: "
+          f"{store.write('x', 'A tarde', lease_a.token)}")
+    print(f"Valor final de x: {store.data['x']!r}")
+    await b.release(lease_b)
+    await a.close()
+    await b.close()
+    await server.stop()
+
+
+async def contention_benchmark(num_clients, num_locks, duration=1.0):
+    """Cada cliente adquiere y libera en bucle un lock al azar entre num_locks."""
+    server = LockServer()
+    port = await server.start()
+    clients = [await LockClient("127.0.0.1", port).connect() for _ in range(num_clients)]
+    acquire_latencies, release_latencies = [], []
+    deadline = time.perf_counter() + duration
+
+    async def worker(client, seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            name = f"lock-{rng.randrange(num_locks)}"
+            start = time.perf_counter()
+            lease = await client.acquire(name)
+            acquired = time.perf_counter()
+            await client.release(lease)
+            acquire_latencies.append(acquired - start)
+            release_latencies.append(time.perf_counter() - acquired)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, i) for i, client in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+    await server.stop()
+    acquire_latencies.sort()
+    return (len(acquire_latencies) / elapsed, statistics.median(acquire_latencies),
+            acquire_latencies[int(len(acquire_latencies) * 0.99)], statistics.median(release_latencies))
+
+
+async def renewal_benchmark(num_locks):
+    """Un cliente con num_locks leases: cuanto cuesta renovarlos todos en un mensaje."""
+    server = LockServer()
+    port = await server.start()
+    client = await LockClient("127.0.0.1", port, renew_interval=3600).connect()
+    await asyncio.gather(*(client.acquire(f"lock-{i}") for i in range(num_locks)))
+    messages = server.messages
+    start = time.perf_counter()
+    renewed = await client.renew_all()
+    elapsed = time.perf_counter() - start
+    sent = server.messages - messages
+    await client.close()
+    await server.stop()
+    return renewed, sent, elapsed
+
+
+def main():
+    print("--- Fencing tokens ---")
+    asyncio.run(fencing_demo())
+
+    print("\n--- Contencion (adquirir + liberar por TCP local) ---")
+    print(f"{'clientes':>9}{'locks':>7}{'ops/s':>9}{'acquire p50 (ms)':>18}{'acquire p99 (ms)':>18}{'release p50 (ms)':>18}")
+    scenarios = [(1, 1), (16, 1), (16, 16), (64, 1), (64, 64), (64, 1000)]
+    if len(sys.argv) > 2:
+        scenarios = [(int(sys.argv[1]), int(sys.argv[2]))]
+    for num_clients, num_locks in scenarios:
+        rate, p50, p99, release_p50 = asyncio.run(contention_benchmark(num_clients, num_locks))
+        print(f"{num_clients:>9}{num_locks:>7}{rate:>9,.0f}{p50 * 1000:>18.2f}{p99 * 1000:>18.2f}{release_p50 * 1000:>18.2f}")
+
+    print("\n--- Renovacion por lotes ---")
+    for num_locks in (10, 1000):
+        renewed, sent, elapsed = asyncio.run(renewal_benchmark(num_locks))
+        print(f"{renewed} leases renovados con {sent} mensaje(s) en {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
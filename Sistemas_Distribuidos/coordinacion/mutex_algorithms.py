@@ -0,0 +1,320 @@
+import abc
+import asyncio
+import collections
+import heapq
+import importlib
+import math
+import statistics
+import sys
+import time
+
+# El modulo tiene un guion en el nombre: no se puede importar con "import"
+ricart_agrawala = importlib.import_module("mutual-exclusion")
+Network = ricart_agrawala.Network
+
+REQUEST, TOKEN = "REQUEST", "TOKEN"
+LOCKED, FAILED, INQUIRE, RELINQUISH, RELEASE = "LOCKED", "FAILED", "INQUIRE", "RELINQUISH", "RELEASE"
+
+
+class Mutex(abc.ABC):
+    """API comun de los tres algoritmos: request() espera la seccion critica y release() la libera."""
+    @abc.abstractmethod
+    async def request(self):
+        """Espera hasta entrar en la seccion critica."""
+
+    @abc.abstractmethod
+    def release(self):
+        """Sale de la seccion critica."""
+
+
+class MutexProcess(Mutex):
+    """Base comun por mensajes: un buzon atendido por run(); cada algoritmo implementa request()/release()."""
+    def __init__(self, process_id, network, verbose=False):
+        self.id = process_id
+        self.network = network
+        self.verbose = verbose
+        self.inbox = asyncio.Queue()
+        self.granted = asyncio.Event()
+        self.entries = 0
+        network.register(self)
+
+    def log(self, text):
+        if self.verbose:
+            print(f"P{self.id}: {text}")
+
+    async def run(self):
+        while True:
+            kind, sender_id, data = await self.inbox.get()
+            getattr(self, f"on_{kind.lower()}")(sender_id, data)
+
+    def entered(self):
+        self.entries += 1
+        self.network.entered()
+        self.log("---> ENTRA a la SECCION CRITICA <---")
+
+    def exited(self):
+        self.network.exited()
+        self.log("---> SALE de la SECCION CRITICA <---")
+
+
+class RicartAgrawala(ricart_agrawala.RicartAgrawalaProcess, Mutex):
+    """Ricart-Agrawala de mutual-exclusion.py con la API comun: 2(N-1) mensajes por entrada."""
+    async def request(self):
+        await self.request_critical_section()
+
+    def release(self):
+        self.exit_critical_section()
+
+
+class SuzukiKasami(MutexProcess):
+    """Exclusion mutua por token (Suzuki-Kasami): N mensajes por entrada, 0 si ya se tiene el token.
+
+    Cada proceso guarda RN[j], el mayor numero de peticion visto de j. El token
+    lleva LN[j], el numero de la ultima peticion de j atendida, y la cola de
+    procesos que esperan: j espera si RN[j] == LN[j] + 1.
+    """
+    def __init__(self, process_id, network, has_token=False, verbose=False):
+        super().__init__(process_id, network, verbose)
+        self.request_numbers = collections.defaultdict(int)     # RN
+        self.token = ({}, collections.deque()) if has_token else None   # (LN, cola)
+        self.in_cs = False
+
+    async def request(self):
+        if self.token is None:
+            self.request_numbers[self.id] += 1
+            self.granted.clear()
+            others = [pid for pid in self.network.processes if pid != self.id]
+            self.network.broadcast(others, (REQUEST, self.id, self.request_numbers[self.id]))
+            await self.granted.wait()
+        self.in_cs = True
+        self.entered()
+
+    def on_request(self, sender_id, number):
+        self.request_numbers[sender_id] = max(self.request_numbers[sender_id], number)
+        if self.token is not None and not self.in_cs and \
+                self.request_numbers[sender_id] == self.token[0].get(sender_id, 0) + 1:
+            self.send_token(sender_id)
+
+    def on_token(self, sender_id, token):
+        self.token = token
+        # Reservado para la peticion en curso: no cederlo antes de que la corutina reanude
+        self.in_cs = True
+        self.granted.set()
+
+    def release(self):
+        self.in_cs = False
+        self.exited()
+        last_served, queue = self.token
+        last_served[self.id] = self.request_numbers[self.id]
+        queued = set(queue)
+        for pid, number in self.request_numbers.items():
+            if pid not in queued and number == last_served.get(pid, 0) + 1:
+                queue.append(pid)
+        if queue:
+            self.send_token(queue.popleft())
+
+    def send_token(self, dst):
+        token, self.token = self.token, None
+        self.network.send(dst, (TOKEN, self.id, token))
+
+
+def grid_voting_sets(num_processes):
+    """Conjuntos de votacion de Maekawa en una cuadricula k x k: fila y columna de cada proceso.
+
+    Con k = ceil(sqrt(N)) las celdas fuera de rango se asignan con modulo N;
+    dos conjuntos siempre comparten la celda (fila de uno, columna del otro).
+    Tamano ~2*sqrt(N).
+    """
+    k = math.ceil(math.sqrt(num_processes))
+    sets = []
+    for pid in range(num_processes):
+        row, col = divmod(pid, k)
+        members = {(row * k + c) % num_processes for c in range(k)}
+        members |= {(r * k + col) % num_processes for r in range(k)}
+        sets.append(sorted(members))
+    return sets
+
+
+class Maekawa(MutexProcess):
+    """Maekawa con conjuntos de votacion de ~2*sqrt(N) procesos e INQUIRE/RELINQUISH contra interbloqueos.
+
+    Cada proceso es solicitante (necesita el voto LOCKED de todo su conjunto) y
+    votante (da un solo voto a la vez). Las peticiones se ordenan por
+    (timestamp de Lamport, id). Si llega una peticion mas prioritaria que la que
+    tiene el voto, el votante pregunta (INQUIRE) al poseedor, que devuelve el
+    voto (RELINQUISH) si sabe que no puede entrar todavia (recibio FAILED).
+    Requiere canales FIFO, como los de Network.
+    """
+    def __init__(self, process_id, network, voting_set, verbose=False):
+        super().__init__(process_id, network, verbose)
+        self.voting_set = voting_set
+        self.clock = 0
+        # Como votante
+        self.voted_for = None     # Peticion (timestamp, id) que tiene el voto
+        self.waiting = []         # Heap de peticiones en espera
+        self.inquired = False
+        # Como solicitante
+        self.my_request = None
+        self.votes = set()
+        self.failed = False
+        self.inquiries = set()
+        self.in_cs = False
+
+    async def request(self):
+        self.clock += 1
+        self.my_request = (self.clock, self.id)
+        self.votes.clear()
+        self.inquiries.clear()
+        self.failed = False
+        self.granted.clear()
+        self.network.broadcast(self.voting_set, (REQUEST, self.id, self.my_request))
+        await self.granted.wait()
+        self.in_cs = True
+        self.entered()
+
+    def release(self):
+        self.in_cs = False
+        self.my_request = None
+        self.exited()
+        self.network.broadcast(self.voting_set, (RELEASE, self.id, None))
+
+    # --- Votante ---
+    def grant(self, request):
+        self.voted_for = request
+        self.inquired = False
+        self.network.send(request[1], (LOCKED, self.id, request))
+
+    def on_request(self, sender_id, request):
+        self.clock = max(self.clock, request[0])
+        if self.voted_for is None:
+            self.grant(request)
+            return
+        previous_head = self.waiting[0] if self.waiting else None
+        heapq.heappush(self.waiting, request)
+        if request < self.voted_for and request == self.waiting[0]:
+            # La nueva peticion va primero: preguntar al que tiene el voto
+            if not self.inquired:
+                self.inquired = True
+                self.network.send(self.voted_for[1], (INQUIRE, self.id, self.voted_for))
+            if previous_head is not None:
+                self.network.send(previous_head[1], (FAILED, self.id, previous_head))
+        else:
+            self.network.send(sender_id, (FAILED, self.id, request))
+
+    def on_relinquish(self, sender_id, request):
+        if self.voted_for != request:
+            return
+        heapq.heappush(self.waiting, request)
+        self.grant(heapq.heappop(self.waiting))
+
+    def on_release(self, sender_id, _):
+        if self.voted_for is None or self.voted_for[1] != sender_id:
+            return
+        self.voted_for = None
+        self.inquired = False
+        if self.waiting:
+            self.grant(heapq.heappop(self.waiting))
+
+    # --- Solicitante ---
+    def on_locked(self, sender_id, request):
+        if request != self.my_request:
+            return
+        self.votes.add(sender_id)
+        if len(self.votes) == len(self.voting_set):
+            self.granted.set()
+
+    def on_failed(self, sender_id, request):
+        if request != self.my_request:
+            return
+        self.failed = True
+        for voter in list(self.inquiries):
+            self.relinquish(voter)
+
+    def on_inquire(self, sender_id, request):
+        # En la seccion critica (o a punto de entrar) el voto vuelve con RELEASE
+        if request != self.my_request or self.in_cs or self.granted.is_set():
+            return
+        if self.failed:
+            self.relinquish(sender_id)
+        else:
+            self.inquiries.add(sender_id)
+
+    def relinquish(self, voter):
+        self.inquiries.discard(voter)
+        if voter in self.votes:
+            self.votes.discard(voter)
+            self.network.send(voter, (RELINQUISH, self.id, self.my_request))
+
+
+def build(algorithm, num_processes, network, verbose=False):
+    if algorithm == "ricart-agrawala":
+        return [RicartAgrawala(i, network, verbose) for i in range(num_processes)]
+    if algorithm == "suzuki-kasami":
+        return [SuzukiKasami(i, network, has_token=i == 0, verbose=verbose) for i in range(num_processes)]
+    sets = grid_voting_sets(num_processes)
+    return [Maekawa(i, network, sets[i], verbose) for i in range(num_processes)]
+
+
+ALGORITHMS = ("ricart-agrawala", "suzuki-kasami", "maekawa")
+
+
+async def run_benchmark(algorithm, num_processes, duration=1.0):
+    """Todos los procesos piden la SC en bucle (carga maxima) durante `duration` segundos."""
+    network = Network()
+    processes = build(algorithm, num_processes, network)
+    receivers = [asyncio.create_task(p.run()) for p in processes]
+    deadline = time.perf_counter() + duration
+
+    async def worker(process):
+        while time.perf_counter() < deadline:
+            await process.request()
+            process.release()
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.gather(*(worker(p) for p in processes)), duration + 10)
+    except asyncio.TimeoutError:
+        print(f"  {algorithm} con {num_processes} procesos no avanza (interbloqueo)")
+    elapsed = time.perf_counter() - start
+    for task in receivers:
+        task.cancel()
+    entries = sum(p.entries for p in processes)
+    return (entries / elapsed, network.messages / entries,
+            statistics.mean(network.sync_delays) if network.sync_delays else 0.0, network.violations)
+
+
+async def demo(algorithm, num_processes=4):
+    network = Network(latency=(0.01, 0.05))
+    processes = build(algorithm, num_processes, network, verbose=True)
+    receivers = [asyncio.create_task(p.run()) for p in processes]
+
+    async def activity(process):
+        await asyncio.sleep(0.01 * process.id)
+        await process.request()
+        await asyncio.sleep(0.05)
+        process.release()
+
+    await asyncio.gather(*(activity(p) for p in processes))
+    for task in receivers:
+        task.cancel()
+    return network.messages
+
+
+def main():
+    for algorithm in ALGORITHMS[1:]:
+        print(f"--- {algorithm} (4 procesos) ---")
+        messages = asyncio.run(demo(algorithm))
+        print(f"{messages} mensajes para 4 entradas\n")
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [3, 10, 25, 50, 100, 200]
+    print(f"{'algoritmo':>16}{'procesos':>10}{'entradas/s':>12}{'msgs/entrada':>14}{'retardo sinc (ms)':>19}{'violaciones':>13}")
+    for n in sizes:
+        for algorithm in ALGORITHMS:
+            rate, per_entry, sync_delay, violations = asyncio.run(run_benchmark(algorithm, n))
+            print(f"{algorithm:>16}{n:>10}{rate:>12,.0f}{per_entry:>14.1f}{sync_delay * 1000:>19.2f}{violations:>13}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,181 +1,205 @@
-import threading
-import time
+import asyncio
 import random
+import sys
+import time
 
-# Constantes del Reloj de Lamport
-CLOCK = 0
-CLOCK_LOCK = threading.Lock()
-
-# Estado del proceso: 'RELEASED', 'WANTED', 'HELD'
-STATE = 'RELEASED'
-
-# Conjunto de procesos a los que se les debe enviar un mensaje de peticion
-DEFERRED_REPLIES = []
-
-# Conjunto de procesos a los que se les ha enviado una peticion (para saber cuondo entrar a la seccion crotica)
-REQUEST_SENT_TO = set()
-
-# Lock para la seccion crotica (solo se usa para simular el acceso, el algoritmo se encarga de la exclusion)
-CS_LOCK = threading.Lock() 
-PROCESS_ID = -1
-
-# Lista global de todos los objetos Process para mensajeroa
-ALL_PROCESSES = []
-
-def get_current_time():
-    global CLOCK
-    with CLOCK_LOCK:
-        CLOCK += 1
-        return CLOCK
-
-def send_request(target_id):
-    global CLOCK
-    time_sent = get_current_time()
-    
-    print(f"P{PROCESS_ID}: Enviando REQUEST a P{target_id} en tiempo {time_sent}")
-    
-    # Simular latencia y enviar a la funcion de recepcion
-    time.sleep(random.uniform(0.01, 0.1))
-    ALL_PROCESSES[target_id].receive_request(PROCESS_ID, time_sent)
-
-def receive_request(sender_id, sender_time):
-    global CLOCK, STATE, DEFERRED_REPLIES
-    
-    # 1. Actualizar reloj de Lamport (Regla de Lamport)
-    with CLOCK_LOCK:
-        CLOCK = max(CLOCK, sender_time) + 1
-        current_time = CLOCK
-
-    print(f"P{PROCESS_ID}: Recibido REQUEST de P{sender_id} en tiempo {sender_time}. Mi tiempo actual: {current_time}")
-
-    # 2. Decidir si enviar REPLY o diferirlo
-    
-    # Criterio de prioridad: Si el receptor esto en RELEASED O si el receptor tiene un timestamp MAYOR que el emisor
-    # (El timestamp (tiempo, ID) se usa para el desempate)
-    my_priority = (current_time, PROCESS_ID)
-    sender_priority = (sender_time, sender_id)
-    
-    if STATE == 'RELEASED' or (STATE == 'WANTED' and my_priority > sender_priority):
-        # Enviar REPLY inmediatamente
-        send_reply(sender_id)
-        
-    else: # Si el receptor esto en HELD (Seccion Crotica) o tiene MAYOR prioridad
-        # Diferir el REPLY
-        DEFERRED_REPLIES.append(sender_id)
-        print(f"P{PROCESS_ID}: Difiriendo REPLY a P{sender_id}. Mi estado es {STATE}.")
-
-def send_reply(target_id):
-    global CLOCK
-    reply_time = get_current_time()
-    print(f"P{PROCESS_ID}: Enviando REPLY a P{target_id} en tiempo {reply_time}")
-    
-    # Simular latencia y enviar a la funcion de recepcion
-    time.sleep(random.uniform(0.01, 0.1))
-    ALL_PROCESSES[target_id].receive_reply(PROCESS_ID, reply_time)
-
-def receive_reply(sender_id, reply_time):
-    global REQUEST_SENT_TO
-    
-    with CLOCK_LOCK:
-        global CLOCK
-        CLOCK = max(CLOCK, reply_time) + 1
-        
-    print(f"P{PROCESS_ID}: Recibido REPLY de P{sender_id}. Tiempo: {CLOCK}")
-    
-    # Remover al remitente de la lista de pendientes
-    REQUEST_SENT_TO.discard(sender_id)
-
-    # Verificar si se puede entrar a la seccion crotica (solo si es el oltimo REPLY)
-    if not REQUEST_SENT_TO and STATE == 'WANTED':
-        enter_critical_section()
-
-def enter_critical_section():
-    global STATE
-    STATE = 'HELD'
-    get_current_time() # Toca el reloj antes de entrar
-    print(f"\n---> P{PROCESS_ID} ENTRA a la SECCIoN CRoTICA. Tiempo: {CLOCK} <---")
-    
-    # Simular trabajo en la Seccion Crotica
-    time.sleep(random.uniform(1.0, 2.0))
-    
-    exit_critical_section()
-
-def exit_critical_section():
-    global STATE, DEFERRED_REPLIES
-    STATE = 'RELEASED'
-    get_current_time() # Toca el reloj al salir
-    print(f"\n---> P{PROCESS_ID} SALE de la SECCIoN CRoTICA. Tiempo: {CLOCK} <---")
-    
-    # Enviar REPLY a todos los procesos diferidos
-    for sender_id in DEFERRED_REPLIES:
-        send_reply(sender_id)
-        
-    DEFERRED_REPLIES = []
-
-def request_critical_section(all_processes):
-    global STATE, REQUEST_SENT_TO, PROCESS_ID
-    
-    # 1. Marcar estado como WANTED y obtener tiempo de peticion
-    STATE = 'WANTED'
-    get_current_time() 
-    
-    # 2. Inicializar el conjunto de procesos pendientes (todos menos uno mismo)
-    REQUEST_SENT_TO = set(p.id for p in all_processes if p.id != PROCESS_ID)
-    
-    print(f"\nP{PROCESS_ID}: Pide acceso a la Seccion Crotica. Tiempo de peticion: {CLOCK}")
-    
-    # 3. Enviar REQUEST a todos los demos procesos
-    for process in all_processes:
-        if process.id != PROCESS_ID:
-            send_request(process.id)
-
-class ProcessRunner:
-    def __init__(self, id, all_processes):
-        self.id = id
-        self.thread = threading.Thread(target=process_activity, args=(self, all_processes))
-        
-    def start(self):
-        self.thread.start()
-
-    def join(self):
-        self.thread.join()
-
-def process_activity(process, all_processes):
-    global PROCESS_ID, ALL_PROCESSES
-    PROCESS_ID = process.id
-    ALL_PROCESSES = all_processes
-    
-    # Simular que los procesos piden acceso a la SC en momentos aleatorios
-    time.sleep(random.uniform(0, 3))
-    
-    # Un proceso pide la SC
-    request_critical_section(all_processes)
-    # Dormir para permitir que otros procesos compitan
-    time.sleep(5) 
-
-# --- Simulacion principal ---
-if __name__ == "__main__":
-    NUM_PROCESSES = 3
-    
-    # Se usa una simulacion de objetos para manejar el envoo de mensajes entre hilos
-    ALL_PROCESSES = [
-        type('MockProcess', (object,), {
-            'id': i,
-            'receive_request': lambda self, sender_id, sender_time: receive_request(sender_id, sender_time),
-            'receive_reply': lambda self, sender_id, reply_time: receive_reply(sender_id, reply_time),
-        })() 
-        for i in range(NUM_PROCESSES)
-    ]
-
-    # Ejecutar hilos
-    runners = [ProcessRunner(i, ALL_PROCESSES) for i in range(NUM_PROCESSES)]
-    
+REQUEST, REPLY = "REQUEST", "REPLY"
+RELEASED, WANTED, HELD = "RELEASED", "WANTED", "HELD"
+
+
+class Network:
+    """Red simulada con un buzon (asyncio.Queue) por proceso: los envios no bloquean.
+
+    Los mensajes son tuplas (tipo, remitente, dato). broadcast() programa una
+    sola entrega con call_at que deja el mensaje en los buzones de todos los
+    destinos a la vez; los mensajes de un mismo remitente llegan en orden (FIFO).
+    Los mensajes a uno mismo no se cuentan. Tambien vigila la exclusion mutua
+    (cuantos procesos estan en HELD) y el retardo de sincronizacion: el tiempo
+    entre que un proceso sale de la seccion critica y el siguiente entra.
+    """
+    def __init__(self, latency=(0.001, 0.005)):
+        self.latency = latency
+        self.processes = {}
+        self.messages = 0
+        self.holders = 0
+        self.violations = 0
+        self.sender_clock = {}   # Remitente -> instante de su ultima entrega programada
+        self.last_exit = None
+        self.sync_delays = []
+
+    def register(self, process):
+        self.processes[process.id] = process
+
+    def send(self, dst, message):
+        self.broadcast([dst], message)
+
+    def broadcast(self, dsts, message):
+        if not dsts:
+            return
+        sender = message[1]
+        self.messages += sum(1 for dst in dsts if dst != sender)
+        loop = asyncio.get_running_loop()
+        # Estrictamente creciente por remitente: el heap del loop no ordena instantes iguales
+        when = max(loop.time() + random.uniform(*self.latency), self.sender_clock.get(sender, 0.0) + 1e-6)
+        self.sender_clock[sender] = when
+        loop.call_at(when, self._deliver, dsts, message)
+
+    def _deliver(self, dsts, message):
+        for dst in dsts:
+            self.processes[dst].inbox.put_nowait(message)
+
+    def entered(self):
+        self.holders += 1
+        if self.holders > 1:
+            self.violations += 1
+        if self.last_exit is not None:
+            self.sync_delays.append(time.perf_counter() - self.last_exit)
+            self.last_exit = None
+
+    def exited(self):
+        self.holders -= 1
+        self.last_exit = time.perf_counter()
+
+
+class RicartAgrawalaProcess:
+    """Proceso Ricart-Agrawala con su propio reloj de Lamport, estado y respuestas diferidas."""
+    def __init__(self, process_id, network, verbose=False):
+        self.id = process_id
+        self.network = network
+        self.verbose = verbose
+        self.clock = 0
+        self.state = RELEASED
+        self.request_time = None
+        self.pending_replies = set()
+        self.deferred_replies = []
+        self.granted = asyncio.Event()
+        self.inbox = asyncio.Queue()
+        self.entries = 0
+        network.register(self)
+
+    def log(self, text):
+        if self.verbose:
+            print(f"P{self.id}: {text}")
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def update_clock(self, received_time):
+        # Regla de Lamport al recibir
+        self.clock = max(self.clock, received_time) + 1
+
+    async def run(self):
+        """Atiende el buzon: cada mensaje se procesa sin bloquear al resto del proceso."""
+        while True:
+            kind, sender_id, sender_time = await self.inbox.get()
+            self.update_clock(sender_time)
+            if kind == REQUEST:
+                self.receive_request(sender_id, sender_time)
+            else:
+                self.receive_reply(sender_id)
+
+    async def request_critical_section(self):
+        # 1. Marcar estado como WANTED y fijar el timestamp de la peticion
+        self.state = WANTED
+        self.request_time = self.tick()
+        self.granted.clear()
+        # 2. REQUEST a todos los demas procesos a la vez
+        others = [pid for pid in self.network.processes if pid != self.id]
+        self.pending_replies = set(others)
+        self.log(f"Pide acceso a la Seccion Critica. Tiempo de peticion: {self.request_time}")
+        self.network.broadcast(others, (REQUEST, self.id, self.request_time))
+        # 3. Esperar los REPLY de todos
+        if self.pending_replies:
+            await self.granted.wait()
+        self.state = HELD
+        self.tick()
+        self.entries += 1
+        self.network.entered()
+        self.log(f"---> ENTRA a la SECCION CRITICA. Tiempo: {self.clock} <---")
+
+    def receive_request(self, sender_id, sender_time):
+        # Prioridad por (timestamp de la peticion, id): el menor gana
+        mine_first = self.state == HELD or (
+            self.state == WANTED and (self.request_time, self.id) < (sender_time, sender_id)
+        )
+        if mine_first:
+            self.deferred_replies.append(sender_id)
+            self.log(f"Difiriendo REPLY a P{sender_id}. Mi estado es {self.state}.")
+        else:
+            self.network.send(sender_id, (REPLY, self.id, self.tick()))
+
+    def receive_reply(self, sender_id):
+        self.pending_replies.discard(sender_id)
+        # Se puede entrar a la seccion critica con el ultimo REPLY
+        if not self.pending_replies and self.state == WANTED:
+            self.granted.set()
+
+    def exit_critical_section(self):
+        self.state = RELEASED
+        self.network.exited()
+        reply_time = self.tick()
+        self.log(f"---> SALE de la SECCION CRITICA. Tiempo: {self.clock} <---")
+        # REPLY a todos los procesos diferidos con un solo envio
+        self.network.broadcast(self.deferred_replies, (REPLY, self.id, reply_time))
+        self.deferred_replies = []
+
+
+async def simulate(num_processes=3):
+    network = Network(latency=(0.01, 0.1))
+    processes = [RicartAgrawalaProcess(i, network, verbose=True) for i in range(num_processes)]
+    receivers = [asyncio.create_task(p.run()) for p in processes]
+
+    async def process_activity(process):
+        # Simular que los procesos piden acceso a la SC en momentos aleatorios
+        await asyncio.sleep(random.uniform(0, 1))
+        await process.request_critical_section()
+        # Simular trabajo en la Seccion Critica
+        await asyncio.sleep(random.uniform(0.2, 0.5))
+        process.exit_critical_section()
+
+    await asyncio.gather(*(process_activity(p) for p in processes))
+    for task in receivers:
+        task.cancel()
+    return network
+
+
+async def run_benchmark(num_processes, duration=1.0):
+    """Cada proceso pide la SC en bucle durante `duration` segundos; cuenta entradas y mensajes."""
+    network = Network()
+    processes = [RicartAgrawalaProcess(i, network) for i in range(num_processes)]
+    receivers = [asyncio.create_task(p.run()) for p in processes]
+    deadline = time.perf_counter() + duration
+    waits = []
+
+    async def worker(process):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await process.request_critical_section()
+            waits.append(time.perf_counter() - start)
+            process.exit_critical_section()
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(p) for p in processes))
+    elapsed = time.perf_counter() - start
+    for task in receivers:
+        task.cancel()
+    entries = sum(p.entries for p in processes)
+    return entries / elapsed, network.messages / entries, sum(waits) / len(waits), network.violations
+
+
+def main():
     print("Iniciando simulacion de Exclusion Mutua (Ricart-Agrawala) con 3 procesos...")
-    
-    for runner in runners:
-        runner.start()
-        
-    for runner in runners:
-        runner.join()
-        
-    print("\nSimulacion de Ricart-Agrawala Finalizada.")
+    network = asyncio.run(simulate())
+    print(f"\nSimulacion de Ricart-Agrawala Finalizada. Violaciones de exclusion mutua: {network.violations}\n")
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [2, 4, 8, 16, 32, 64]
+    print(f"{'procesos':>9}{'entradas SC/s':>15}{'msgs/entrada':>14}{'espera media (ms)':>19}{'violaciones':>13}")
+    for n in sizes:
+        rate, per_entry, wait, violations = asyncio.run(run_benchmark(n))
+        print(f"{n:>9}{rate:>15,.0f}{per_entry:>14.1f}{wait * 1000:>19.1f}{violations:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#Consultas compartidas por main.py y main_async.py
+import json
+
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import TipoId
+
+STREAM_CHUNK = 1000   # Filas por lote del cursor del servidor y por trozo de la respuesta NDJSON
+# yield_per solo acota la memoria si el driver tiene cursor de servidor (pymysql, mysqldb,
+# aiomysql); mysqlconnector no lo tiene y cargaria toda la tabla: ahi se pagina por clave
+# con page_query(after, STREAM_CHUNK), una consulta por trozo en la misma transaccion.
+
+def page_query(after, limit=None, columns=False):
+    """Paginacion por clave: filas con cIdTipoId > after, sin OFFSET (no relee lo ya enviado).
+
+    columns=True devuelve tuplas en vez de objetos del ORM (mas barato para streaming).
+    """
+    query = select(TipoId.cIdTipoId, TipoId.cDescripcion) if columns else select(TipoId)
+    query = query.order_by(TipoId.cIdTipoId)
+    if after is not None:
+        query = query.where(TipoId.cIdTipoId > after)
+    return query if limit is None else query.limit(limit)
+
+def ndjson_lines(rows):
+    """Un trozo NDJSON por lote: una linea JSON por fila."""
+    return "".join(json.dumps({"cIdTipoId": r.cIdTipoId, "cDescripcion": r.cDescripcion}) + "\n" for r in rows)
+
+
+#Carga masiva: un INSERT ... ON DUPLICATE KEY UPDATE (MySQL) u ON CONFLICT (SQLite/PostgreSQL) por lote
+BULK_CHUNK = 1000
+MAX_LENGTHS = {column.name: column.type.length for column in TipoId.__table__.columns}
+
+def prepare_bulk(records):
+    """Valida longitudes y quita repetidos (gana el ultimo). Devuelve (filas a escribir, estados por fila)."""
+    statuses = [None] * len(records)
+    last = {}
+    for position, record in enumerate(records):
+        too_long = [name for name, value in record.items() if len(value) > MAX_LENGTHS[name]]
+        if too_long:
+            statuses[position] = {"cIdTipoId": record["cIdTipoId"], "status": "error",
+                                  "detail": f"Longitud maxima superada: {', '.join(too_long)}"}
+            continue
+        if record["cIdTipoId"] in last:
+            previous = last[record["cIdTipoId"]]
+            statuses[previous] = {"cIdTipoId": record["cIdTipoId"], "status": "duplicado",
+                                  "detail": f"Reemplazado por la fila {position}"}
+        last[record["cIdTipoId"]] = position
+    return [(position, records[position]) for position in sorted(last.values())], statuses
+
+def existing_query(ids):
+    return select(TipoId.cIdTipoId, TipoId.cDescripcion).where(TipoId.cIdTipoId.in_(ids))
+
+UPSERT_INSERTS = {"mysql": mysql.insert, "sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def upsert_statement(dialect, rows):
+    statement = UPSERT_INSERTS[dialect](TipoId).values(rows)
+    if dialect == "mysql":
+        return statement.on_duplicate_key_update(cDescripcion=statement.inserted.cDescripcion)
+    return statement.on_conflict_do_update(index_elements=[TipoId.cIdTipoId],
+                                           set_={"cDescripcion": statement.excluded.cDescripcion})
+
+def classify(chunk, existing, statuses):
+    """Estado de cada fila del lote segun lo que habia antes del upsert."""
+    for position, record in chunk:
+        before = existing.get(record["cIdTipoId"])
+        status = "creado" if before is None else "sin_cambios" if before == record["cDescripcion"] else "actualizado"
+        statuses[position] = {"cIdTipoId": record["cIdTipoId"], "status": status}
+
+def chunk_failed(chunk, statuses, error):
+    for position, record in chunk:
+        statuses[position] = {"cIdTipoId": record["cIdTipoId"], "status": "error", "detail": str(getattr(error, "orig", None) or error)}
+
+def bulk_summary(statuses):
+    counts = {}
+    for status in statuses:
+        counts[status["status"]] = counts.get(status["status"], 0) + 1
+    return {"totales": counts, "filas": statuses}
@@ -1,11 +1,43 @@
+import asyncio
+import os
+import weakref
+
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-#Información de conexión a la base de datos
-DATABASE_URL = "mysql+mysqlconnector://root:@localhost:3306/Empresa"
+#Información de conexión a la base de datos (DATABASE_URL=sqlite:///./empresa.db para probar en local)
+DATABASE_URL = os.getenv("DATABASE_URL", "mysql+mysqlconnector://root:@localhost:3306/Empresa")
+
+# Pool: conexiones abiertas, extra en picos, reciclar antes del wait_timeout de MySQL.
+# Una peticion sincrona conserva su conexion entre saltos al threadpool (endpoint,
+# validacion de la respuesta, cierre de la sesion), asi que el tamano del pool frente
+# a los hilos no basta para evitar el bloqueo: PoolGate limita las peticiones en curso.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 
-engine = create_engine(DATABASE_URL)
+def engine_options(url):
+    """Opciones de pool comunes al motor sincrono y al asincrono."""
+    options = {}
+    if url.startswith("sqlite"):
+        if "aiosqlite" not in url:
+            # La conexion pasa entre hilos del threadpool
+            options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url:
+            return options
+    options.update(
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_recycle=POOL_RECYCLE,
+        pool_timeout=POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+    return options
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -16,4 +48,28 @@ def get_db():
         yield db
     finally:
         db.close()
-        
\ No newline at end of file
+
+
+class PoolGate:
+    """Middleware ASGI: como mucho tantas peticiones en curso como conexiones tiene el pool.
+
+    Sin el, las peticiones que esperan hilo para validar su respuesta retienen
+    todas las conexiones mientras los hilos esperan una conexion libre, y todo
+    se detiene hasta POOL_TIMEOUT. La espera ocurre en el event loop, sin hilo,
+    y el semaforo atiende en orden de llegada.
+    """
+    def __init__(self, app, slots=POOL_SIZE + MAX_OVERFLOW):
+        self.app = app
+        self.slots = slots
+        self.semaphores = weakref.WeakKeyDictionary()   # Event loop -> Semaphore
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.slots)
+        async with semaphore:
+            await self.app(scope, receive, send)
+
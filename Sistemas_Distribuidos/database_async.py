@@ -0,0 +1,33 @@
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database import DATABASE_URL, engine_options
+
+# Mismo servidor que database.py con el driver asincrono equivalente
+ASYNC_DRIVERS = {
+    "mysql+mysqlconnector://": "mysql+aiomysql://",
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def async_url(url):
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_url(DATABASE_URL))
+
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+# expire_on_commit=False: tras el commit se puede serializar el objeto sin otra consulta
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+#Dependencia para obtener la sesion asincrona de la base de datos
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
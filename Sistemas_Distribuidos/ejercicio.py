@@ -1,88 +1,356 @@
 # vector_clocks.py
 import random
+import sys
 import time
+import tracemalloc
+from collections import deque
 from threading import Thread, Lock
 
+import numpy as np
+
+LOCAL, SEND, RECEIVE = 0, 1, 2
+KIND_NAMES = {LOCAL: "Evento local", SEND: "Envío", RECEIVE: "Recibido"}
+
+
+class EventLog:
+    """Log compacto compartido: una fila de NumPy por evento en lugar de una lista copiada por evento.
+
+    clocks[i] es el vector del evento i; process, kind y source (evento de
+    envio de un RECEIVE, -1 si no hay) van en arrays paralelos. La capacidad
+    se duplica al llenarse.
+    """
+    def __init__(self, num_processes, capacity=1024):
+        self.num_processes = num_processes
+        self.clocks = np.zeros((capacity, num_processes), dtype=np.uint32)
+        self.process = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.source = np.full(capacity, -1, dtype=np.int64)
+        self.size = 0
+        self.lock = Lock()
+
+    def record(self, process_id, kind, vector, source=-1):
+        with self.lock:
+            if self.size == len(self.process):
+                self._grow()
+            index = self.size
+            if self.clocks.dtype != np.uint32 and int(np.max(vector)) > np.iinfo(self.clocks.dtype).max:
+                self.clocks = self.clocks.astype(np.uint32)   # Log compactado: vuelve al tipo completo
+            self.clocks[index] = vector
+            self.process[index] = process_id
+            self.kind[index] = kind
+            self.source[index] = source
+            self.size += 1
+            return index
+
+    def _grow(self):
+        capacity = max(1, 2 * len(self.process))
+        for name in ("clocks", "process", "kind", "source"):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], -1 if name == "source" else 0, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def compact(self):
+        """Recorta la capacidad sobrante y usa el entero sin signo mas pequeno que cabe.
+
+        El log sigue admitiendo record(): un vector que no cabe en el tipo reducido lo amplia.
+        """
+        clocks = self.clocks[:self.size]
+        top = int(clocks.max()) if self.size else 0
+        dtype = np.uint8 if top < 2**8 else np.uint16 if top < 2**16 else np.uint32
+        self.clocks = clocks.astype(dtype)
+        self.process = self.process[:self.size].copy()
+        self.kind = self.kind[:self.size].copy()
+        self.source = self.source[:self.size].copy()
+        return self
+
+    @property
+    def nbytes(self):
+        return self.clocks.nbytes + self.process.nbytes + self.kind.nbytes + self.source.nbytes
+
+    def describe(self, index):
+        vector = self.clocks[index].tolist()
+        text = f"Proceso {self.process[index]}: {KIND_NAMES[self.kind[index]]}"
+        if self.source[index] >= 0:
+            text += f" de P{self.process[self.source[index]]}"
+        return f"{text} con vector {vector}"
+
+
 class Process:
-    def __init__(self, process_id, num_processes):
+    def __init__(self, process_id, num_processes, events=None, verbose=True):
         self.process_id = process_id
         # TODO: Inicializar el vector de relojes con ceros
-        self.vector_clock = [0] * num_processes
+        self.vector_clock = np.zeros(num_processes, dtype=np.uint32)
         self.lock = Lock()
         self.message_queue = []
-        self.log = []
+        self.events = events if events is not None else EventLog(num_processes)
         self.num_processes = num_processes
-    
+        self.verbose = verbose
+
+    def record(self, kind, source=-1):
+        index = self.events.record(self.process_id, kind, self.vector_clock, source)
+        if self.verbose:
+            print(self.events.describe(index))
+        return index
+
     def local_event(self):
         with self.lock:
             # TODO: Incrementar solo la posición correspondiente al proceso actual
             self.vector_clock[self.process_id] += 1
-            event = f"Proceso {self.process_id}: Evento local con vector {self.vector_clock}"
-            self.log.append((self.vector_clock.copy(), event))
-            print(event)
-    
+            self.record(LOCAL)
+
     def send_message(self, receiver_id):
         with self.lock:
             # TODO: Incrementar la posición del proceso actual en el vector
             self.vector_clock[self.process_id] += 1
+            index = self.record(SEND)
             message = {
                 "sender": self.process_id,
                 "vector_clock": self.vector_clock.copy(),
+                "event": index,
                 "content": f"Mensaje de {self.process_id} a {receiver_id}"
             }
-            event = f"Proceso {self.process_id}: Envío a P{receiver_id} con vector {self.vector_clock}"
-            self.log.append((self.vector_clock.copy(), event))
-            print(event)
             return message
-    
+
     def receive_message(self, message):
         with self.lock:
             # TODO: Actualizar el vector de relojes según las reglas
             # 1. Tomar el máximo elemento por elemento
             # 2. Incrementar la posición del proceso actual
-            received_vector = message["vector_clock"]
-            for i in range(self.num_processes):
-                self.vector_clock[i] = max(self.vector_clock[i], received_vector[i])
+            np.maximum(self.vector_clock, message["vector_clock"], out=self.vector_clock)
             self.vector_clock[self.process_id] += 1
-            
-            event = f"Proceso {self.process_id}: Recibido de P{message['sender']} con vector {self.vector_clock}"
-            self.log.append((self.vector_clock.copy(), event))
-            print(event)
-    
+            self.record(RECEIVE, message["event"])
+
     def run(self, processes):
-        # Mismo código que en el ejemplo anterior
-        pass
+        for _ in range(5):  # Cada proceso ejecuta 5 acciones
+            time.sleep(random.uniform(0.1, 0.5))
+            action = random.choice(["local", "send"])
+
+            if action == "local":
+                self.local_event()
+            else:
+                # Elegir un proceso aleatorio para enviar un mensaje
+                receiver_id = random.choice([i for i in range(self.num_processes) if i != self.process_id])
+                message = self.send_message(receiver_id)
+                processes[receiver_id].message_queue.append(message)
+
+        # Procesar mensajes recibidos
+        while self.message_queue:
+            message = self.message_queue.pop(0)
+            self.receive_message(message)
 
 # TODO: Implementar una función para comparar dos vectores de relojes
 def compare_vectors(vector1, vector2):
     """
     Compara dos vectores de relojes y determina su relación causal.
-    Retorna: 
+    Retorna:
         -1 si vector1 -> vector2 (vector1 sucedió antes que vector2)
         1 si vector2 -> vector1 (vector2 sucedió antes que vector1)
         0 si son concurrentes
     """
     less_than = False
     greater_than = False
-    
+
     for v1, v2 in zip(vector1, vector2):
         if v1 < v2:
             less_than = True
         elif v1 > v2:
             greater_than = True
-        
+
         if less_than and greater_than:
             return 0  # Concurrentes
-    
+
     if less_than:
         return -1  # vector1 sucedió antes que vector2
     if greater_than:
         return 1   # vector2 sucedió antes que vector1
     return 0       # Iguales (mismo evento)
 
+
+class CausalityEngine:
+    """Relaciones causales vectorizadas sobre un EventLog.
+
+    Como cada evento incrementa su propia posicion, V[f][p] es el numero de
+    eventos de p que suceden antes de f (o son f). Por eso e -> f si y solo si
+    V[f][p_e] >= V[e][p_e] con e != f: basta una columna por comparacion, y
+    los conteos por evento salen de sumas y de searchsorted sin formar los N^2 pares.
+    """
+    def __init__(self, events):
+        self.events = events
+        self.clocks = events.clocks[:events.size]
+        self.process = events.process[:events.size]
+        self.size = events.size
+        # Contador propio de cada evento: V[e][p_e]
+        self.local = self.clocks[np.arange(self.size), self.process].astype(np.int64)
+
+    def happens_before(self, a, b):
+        """a -> b elemento a elemento para arrays de indices de eventos."""
+        a, b = np.asarray(a), np.asarray(b)
+        return (self.clocks[b, self.process[a]] >= self.local[a]) & (a != b)
+
+    def relation_matrix(self, indices=None):
+        """Matriz con la convencion de compare_vectors: -1 si i -> j, 1 si j -> i, 0 si concurrentes."""
+        indices = np.arange(self.size) if indices is None else np.asarray(indices)
+        # seen[j, i] = V[j][p_i]
+        seen = self.clocks[np.ix_(indices, self.process[indices])].astype(np.int64)
+        before = seen.T >= self.local[indices][:, None]
+        np.fill_diagonal(before, False)
+        return before.T.astype(np.int8) - before.astype(np.int8)
+
+    def counts(self):
+        """Predecesores, sucesores y concurrentes de cada evento en O(P * N log N)."""
+        predecessors = self.clocks.sum(axis=1, dtype=np.int64) - 1
+        successors = np.empty(self.size, dtype=np.int64)
+        for p in range(self.events.num_processes):
+            mine = np.flatnonzero(self.process == p)
+            if len(mine) == 0:
+                continue
+            column = np.sort(self.clocks[:, p])
+            successors[mine] = self.size - np.searchsorted(column, self.local[mine]) - 1
+        concurrent = self.size - 1 - predecessors - successors
+        return predecessors, successors, concurrent
+
+    def summary(self):
+        predecessors, _, concurrent = self.counts()
+        return {
+            "eventos": self.size,
+            "pares": self.size * (self.size - 1) // 2,
+            "causales": int(predecessors.sum()),
+            "concurrentes": int(concurrent.sum()) // 2,
+        }
+
+    def dag_edges(self):
+        """Aristas del DAG causal reducido: orden de programa de cada proceso y envio -> recepcion."""
+        order = np.lexsort((self.local, self.process))
+        same = self.process[order[1:]] == self.process[order[:-1]]
+        program = np.column_stack((order[:-1][same], order[1:][same]))
+        receives = np.flatnonzero(self.events.source[:self.size] >= 0)
+        messages = np.column_stack((self.events.source[receives], receives))
+        return np.concatenate((program, messages))
+
+    def to_dot(self):
+        lines = ["digraph causal {", "  rankdir=LR;"]
+        for index in range(self.size):
+            label = f"P{self.process[index]} {self.clocks[index].tolist()}"
+            lines.append(f'  e{index} [label="{label}"];')
+        for src, dst in self.dag_edges():
+            style = "" if self.process[src] == self.process[dst] else " [style=dashed]"
+            lines.append(f"  e{src} -> e{dst}{style};")
+        lines.append("}")
+        return "\n".join(lines)
+
+
+def simulate_events(num_processes, num_events, seed=0, send_ratio=0.4):
+    """Genera num_events eventos sin hilos ni pausas: en cada paso un proceso al azar actua."""
+    rng = random.Random(seed)
+    events = EventLog(num_processes, capacity=num_events)
+    processes = [Process(i, num_processes, events, verbose=False) for i in range(num_processes)]
+    inboxes = [deque() for _ in range(num_processes)]
+    while events.size < num_events:
+        process = processes[rng.randrange(num_processes)]
+        roll = rng.random()
+        if inboxes[process.process_id] and roll < 0.5:
+            process.receive_message(inboxes[process.process_id].popleft())
+        elif roll < 0.5 + send_ratio / 2:
+            receiver_id = rng.randrange(num_processes - 1)
+            receiver_id += receiver_id >= process.process_id
+            inboxes[receiver_id].append(process.send_message(receiver_id))
+        else:
+            process.local_event()
+    return events
+
+
+def list_log_bytes(events):
+    """Memoria del log original: una lista copiada y un texto por evento (los enteros se comparten con el vector vivo)."""
+    total = 0
+    for index in range(events.size):
+        vector = events.clocks[index].tolist()
+        total += sys.getsizeof(vector) + sys.getsizeof((vector, "")) + sys.getsizeof(events.describe(index))
+    return total
+
+
+def brute_force_summary(events):
+    """Los mismos conteos con compare_vectors par a par (solo para logs pequenos)."""
+    vectors = events.clocks[:events.size].tolist()
+    causal = concurrent = 0
+    for i in range(len(vectors)):
+        for j in range(i + 1, len(vectors)):
+            if compare_vectors(vectors[i], vectors[j]):
+                causal += 1
+            else:
+                concurrent += 1
+    return causal, concurrent
+
+
 def main():
-    # Código similar al ejemplo anterior, pero añadiendo análisis de causalidad
-    pass
+    num_processes = 3
+    events = EventLog(num_processes)
+    processes = [Process(i, num_processes, events) for i in range(num_processes)]
+
+    # Crear hilos para cada proceso
+    threads = [Thread(target=p.run, args=(processes,)) for p in processes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    engine = CausalityEngine(events)
+    relation = engine.relation_matrix()
+    print("\nAnalisis de causalidad:")
+    for i in range(engine.size):
+        for j in range(i + 1, engine.size):
+            if relation[i, j] == 0:
+                print(f"  e{i} || e{j}  (concurrentes)")
+            else:
+                first, second = (i, j) if relation[i, j] < 0 else (j, i)
+                print(f"  e{first} -> e{second}")
+    print("\nGrafo 'sucedio antes' (DOT, lineas discontinuas = mensajes):")
+    print(engine.to_dot())
+
+    # Comprobacion contra compare_vectors en un log mediano
+    check = simulate_events(8, 1500, seed=1)
+    summary = CausalityEngine(check).summary()
+    assert (summary["causales"], summary["concurrentes"]) == brute_force_summary(check)
+    print(f"\nConteos vectorizados = compare_vectors par a par en {check.size} eventos")
+
+    num_processes, num_events = 64, 100_000
+    if len(sys.argv) > 2:
+        num_processes, num_events = int(sys.argv[1]), int(sys.argv[2])
+    print(f"\n--- {num_events:,} eventos, {num_processes} procesos ---")
+    start = time.perf_counter()
+    tracemalloc.start()
+    events = simulate_events(num_processes, num_events).compact()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"Generacion: {time.perf_counter() - start:.2f} s (pico {peak / 2**20:.1f} MiB)")
+    print(f"Log como listas + texto: {list_log_bytes(events) / 2**20:8.1f} MiB")
+    print(f"Log en NumPy ({events.clocks.dtype}):  {events.nbytes / 2**20:8.1f} MiB")
+
+    engine = CausalityEngine(events)
+    start = time.perf_counter()
+    summary = engine.summary()
+    elapsed = time.perf_counter() - start
+    print(f"Relaciones de {summary['pares']:,} pares en {elapsed * 1000:.0f} ms: "
+          f"{summary['causales']:,} causales, {summary['concurrentes']:,} concurrentes")
+
+    vectors = events.clocks.tolist()
+    rng = random.Random(2)
+    sample = [(rng.randrange(num_events), rng.randrange(num_events)) for _ in range(100_000)]
+    start = time.perf_counter()
+    for i, j in sample:
+        compare_vectors(vectors[i], vectors[j])
+    per_pair = (time.perf_counter() - start) / len(sample)
+    print(f"compare_vectors par a par: {per_pair * 1e6:.2f} us/par -> {per_pair * summary['pares'] / 3600:,.0f} h estimadas")
+
+    a = np.array([i for i, _ in sample])
+    b = np.array([j for _, j in sample])
+    start = time.perf_counter()
+    engine.happens_before(a, b)
+    print(f"happens_before vectorizado: {(time.perf_counter() - start) / len(sample) * 1e9:.0f} ns/par")
+
+    start = time.perf_counter()
+    edges = engine.dag_edges()
+    print(f"DAG causal: {len(edges):,} aristas en {(time.perf_counter() - start) * 1000:.0f} ms")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,413 @@
+import random
+import sys
+import time
+
+# Interval Tree Clocks (Almeida, Baquero y Fonte, 2008).
+# Un id es 0, 1 o (izq, der): la parte del intervalo [0, 1) que posee la replica.
+# Un evento es un entero n o (n, izq, der): n mas lo que sumen los subarboles.
+# Las replicas nacen con fork() y se retiran con join(), sin ids globales,
+# asi que el tamano del reloj sigue al numero de replicas vivas y no al historico.
+
+GROW_PENALTY = 1000   # Coste de expandir el arbol de eventos en grow(): se prefiere no hacerlo
+
+
+def norm_id(i):
+    if i == (0, 0):
+        return 0
+    if i == (1, 1):
+        return 1
+    return i
+
+
+def norm_event(e):
+    if isinstance(e, int):
+        return e
+    n, left, right = e
+    if isinstance(left, int) and isinstance(right, int) and left == right:
+        return n + left
+    m = min(min_event(left), min_event(right))
+    return (n + m, sink(left, m), sink(right, m))
+
+
+def lift(e, m):
+    return e + m if isinstance(e, int) else (e[0] + m, e[1], e[2])
+
+
+def sink(e, m):
+    return e - m if isinstance(e, int) else (e[0] - m, e[1], e[2])
+
+
+def min_event(e):
+    # Normalizado, uno de los hijos tiene minimo 0
+    return e if isinstance(e, int) else e[0]
+
+
+def max_event(e):
+    return e if isinstance(e, int) else e[0] + max(max_event(e[1]), max_event(e[2]))
+
+
+def split_id(i):
+    if i == 0:
+        return 0, 0
+    if i == 1:
+        return (1, 0), (0, 1)
+    left, right = i
+    if left == 0:
+        a, b = split_id(right)
+        return (0, a), (0, b)
+    if right == 0:
+        a, b = split_id(left)
+        return (a, 0), (b, 0)
+    return (left, 0), (0, right)
+
+
+def sum_id(a, b):
+    if a == 0:
+        return b
+    if b == 0:
+        return a
+    return norm_id((sum_id(a[0], b[0]), sum_id(a[1], b[1])))
+
+
+def join_event(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return max(a, b)
+    if isinstance(a, int):
+        a = (a, 0, 0)
+    if isinstance(b, int):
+        b = (b, 0, 0)
+    if a[0] > b[0]:
+        a, b = b, a
+    shift = b[0] - a[0]
+    return norm_event((a[0], join_event(a[1], lift(b[1], shift)), join_event(a[2], lift(b[2], shift))))
+
+
+def leq_event(a, b):
+    if isinstance(a, int):
+        return a <= (b if isinstance(b, int) else b[0])
+    n, left, right = a
+    if isinstance(b, int):
+        return n <= b and leq_event(lift(left, n), b) and leq_event(lift(right, n), b)
+    return (n <= b[0] and leq_event(lift(left, n), lift(b[1], b[0]))
+            and leq_event(lift(right, n), lift(b[2], b[0])))
+
+
+def fill(i, e):
+    """Sube el arbol de eventos en la parte propia del id sin anadir nodos."""
+    if i == 0 or isinstance(e, int):
+        return e
+    if i == 1:
+        return max_event(e)
+    n, left, right = e
+    if i[0] == 1:
+        right = fill(i[1], right)
+        return norm_event((n, max(max_event(left), min_event(right)), right))
+    if i[1] == 1:
+        left = fill(i[0], left)
+        return norm_event((n, left, max(max_event(right), min_event(left))))
+    return norm_event((n, fill(i[0], left), fill(i[1], right)))
+
+
+def grow(i, e):
+    """Anade un evento expandiendo el arbol lo menos posible; devuelve (evento, coste)."""
+    if isinstance(e, int):
+        if i == 1:
+            return e + 1, 0
+        grown, cost = grow(i, (e, 0, 0))
+        return grown, cost + GROW_PENALTY
+    n, left, right = e
+    if i[0] == 0:
+        right, cost = grow(i[1], right)
+        return (n, left, right), cost + 1
+    if i[1] == 0:
+        left, cost = grow(i[0], left)
+        return (n, left, right), cost + 1
+    grown_left, cost_left = grow(i[0], left)
+    grown_right, cost_right = grow(i[1], right)
+    if cost_left < cost_right:
+        return (n, grown_left, right), cost_left + 1
+    return (n, left, grown_right), cost_right + 1
+
+
+class BitWriter:
+    def __init__(self):
+        self.value = 0
+        self.length = 0
+
+    def bits(self, value, width):
+        self.value = (self.value << width) | value
+        self.length += width
+
+    def number(self, n):
+        # Elias gamma de n + 1: 2*log2(n) + 1 bits
+        n += 1
+        width = n.bit_length()
+        self.bits(0, width - 1)
+        self.bits(n, width)
+
+    def to_bytes(self):
+        padding = -self.length % 8
+        return ((self.value << padding)).to_bytes((self.length + padding) // 8, "big")
+
+
+class BitReader:
+    def __init__(self, data):
+        self.value = int.from_bytes(data, "big")
+        self.position = len(data) * 8
+
+    def bits(self, width):
+        self.position -= width
+        return (self.value >> self.position) & ((1 << width) - 1)
+
+    def number(self):
+        zeros = 0
+        while self.bits(1) == 0:
+            zeros += 1
+        return ((1 << zeros) | self.bits(zeros)) - 1
+
+
+def encode_id(i, writer):
+    # 00 hoja (+1 bit de valor), 01 (0, i), 10 (i, 0), 11 (izq, der)
+    if isinstance(i, int):
+        writer.bits(0, 2)
+        writer.bits(i, 1)
+    elif i[0] == 0:
+        writer.bits(1, 2)
+        encode_id(i[1], writer)
+    elif i[1] == 0:
+        writer.bits(2, 2)
+        encode_id(i[0], writer)
+    else:
+        writer.bits(3, 2)
+        encode_id(i[0], writer)
+        encode_id(i[1], writer)
+
+
+def decode_id(reader):
+    tag = reader.bits(2)
+    if tag == 0:
+        return reader.bits(1)
+    if tag == 1:
+        return (0, decode_id(reader))
+    if tag == 2:
+        return (decode_id(reader), 0)
+    return (decode_id(reader), decode_id(reader))
+
+
+def encode_event(e, writer):
+    # 1 hoja (+n), 0 nodo (+bit n==0, +n si no) + hijos
+    if isinstance(e, int):
+        writer.bits(1, 1)
+        writer.number(e)
+        return
+    writer.bits(0, 1)
+    writer.bits(e[0] == 0, 1)
+    if e[0]:
+        writer.number(e[0])
+    encode_event(e[1], writer)
+    encode_event(e[2], writer)
+
+
+def decode_event(reader):
+    if reader.bits(1):
+        return reader.number()
+    n = 0 if reader.bits(1) else reader.number()
+    return (n, decode_event(reader), decode_event(reader))
+
+
+class Stamp:
+    """Sello ITC inmutable (id, evento) con la API fork/join/event/compare."""
+    __slots__ = ("id", "event_tree")
+
+    def __init__(self, identity=1, event_tree=0):
+        self.id = identity
+        self.event_tree = event_tree
+
+    def fork(self):
+        a, b = split_id(self.id)
+        return Stamp(a, self.event_tree), Stamp(b, self.event_tree)
+
+    def peek(self):
+        """Solo el evento (id 0): lo que viaja en un mensaje."""
+        return Stamp(0, self.event_tree)
+
+    def join(self, other):
+        return Stamp(sum_id(self.id, other.id), join_event(self.event_tree, other.event_tree))
+
+    def event(self):
+        if self.id == 0:
+            raise ValueError("Un sello anonimo (id 0) no puede registrar eventos")
+        filled = fill(self.id, self.event_tree)
+        if filled != self.event_tree:
+            return Stamp(self.id, filled)
+        return Stamp(self.id, grow(self.id, self.event_tree)[0])
+
+    def leq(self, other):
+        return leq_event(self.event_tree, other.event_tree)
+
+    def compare(self, other):
+        """Misma convencion que compare_vectors: -1 si self -> other, 1 si other -> self, 0 si concurrentes o iguales."""
+        before, after = self.leq(other), other.leq(self)
+        if before and not after:
+            return -1
+        if after and not before:
+            return 1
+        return 0
+
+    def encode(self):
+        writer = BitWriter()
+        encode_id(self.id, writer)
+        encode_event(self.event_tree, writer)
+        return writer.to_bytes()
+
+    @classmethod
+    def decode(cls, data):
+        reader = BitReader(data)
+        return cls(decode_id(reader), decode_event(reader))
+
+    def __repr__(self):
+        return f"Stamp({self.id}, {self.event_tree})"
+
+
+class VectorClock:
+    """Reloj vectorial con membresia dinamica (dict id -> contador) para comparar con ITC.
+
+    Los ids retirados no se pueden borrar sin coordinacion global: sus entradas
+    se quedan en todos los relojes que las vieron.
+    """
+    __slots__ = ("id", "counters")
+
+    def __init__(self, identity, counters=None):
+        self.id = identity
+        self.counters = counters if counters is not None else {}
+
+    def event(self):
+        counters = dict(self.counters)
+        counters[self.id] = counters.get(self.id, 0) + 1
+        return VectorClock(self.id, counters)
+
+    def join(self, other):
+        counters = dict(self.counters)
+        for key, value in other.counters.items():
+            if value > counters.get(key, 0):
+                counters[key] = value
+        return VectorClock(self.id, counters)
+
+    def leq(self, other):
+        theirs = other.counters
+        return all(value <= theirs.get(key, 0) for key, value in self.counters.items())
+
+    def compare(self, other):
+        before, after = self.leq(other), other.leq(self)
+        if before and not after:
+            return -1
+        if after and not before:
+            return 1
+        return 0
+
+    def encode(self):
+        writer = BitWriter()
+        writer.number(len(self.counters))
+        for key, value in self.counters.items():
+            writer.number(key)
+            writer.number(value)
+        return writer.to_bytes()
+
+
+def simulate_churn(replicas=32, steps=20000, churn=0.05, seed=0):
+    """Misma historia con ITC y con vectores: eventos, mensajes y replicas que entran (fork) y salen (join).
+
+    Devuelve para cada tipo de reloj el tiempo por operacion y el tamano medio
+    codificado de un mensaje, y cuantas comparaciones coincidieron entre ambos.
+    """
+    rng = random.Random(seed)
+    itc = [Stamp()]
+    while len(itc) < replicas:
+        itc.extend(itc.pop(0).fork())
+    next_vc_id = replicas
+    vcs = [VectorClock(i) for i in range(replicas)]
+    stats = {kind: {"ops": 0, "time": 0.0, "bytes": 0, "messages": 0} for kind in ("itc", "vector")}
+
+    def timed(kind, operation):
+        start = time.perf_counter()
+        result = operation()
+        stats[kind]["time"] += time.perf_counter() - start
+        stats[kind]["ops"] += 1
+        return result
+
+    for _ in range(steps):
+        roll = rng.random()
+        a = rng.randrange(len(itc))
+        if roll < churn / 2 and len(itc) > 2:
+            # Sale la replica a: su id (y su historia) se funden con otra
+            b = rng.randrange(len(itc) - 1)
+            b += b >= a
+            itc[b] = timed("itc", lambda: itc[b].join(itc[a]))
+            vcs[b] = timed("vector", lambda: vcs[b].join(vcs[a]))
+            for clocks in (itc, vcs):
+                clocks[a] = clocks[-1]
+                clocks.pop()
+        elif roll < churn:
+            # Entra una replica nueva a partir de a
+            itc[a], fresh = timed("itc", itc[a].fork)
+            itc.append(fresh)
+            vcs.append(timed("vector", lambda: VectorClock(next_vc_id, dict(vcs[a].counters))))
+            next_vc_id += 1
+        elif roll < 0.5:
+            itc[a] = timed("itc", itc[a].event)
+            vcs[a] = timed("vector", vcs[a].event)
+        else:
+            # Mensaje de a a b: envio (evento + sello en el mensaje), recepcion (join + evento)
+            b = rng.randrange(len(itc) - 1)
+            b += b >= a
+            for kind, clocks in (("itc", itc), ("vector", vcs)):
+                clocks[a] = timed(kind, clocks[a].event)
+                message = clocks[a].peek() if kind == "itc" else clocks[a]
+                stats[kind]["bytes"] += len(message.encode())
+                stats[kind]["messages"] += 1
+                clocks[b] = timed(kind, lambda: clocks[b].join(message).event())
+
+    # Comparar todos los pares de replicas vivas con ambos relojes
+    agree = pairs = 0
+    for kind, clocks in (("itc", itc), ("vector", vcs)):
+        start = time.perf_counter()
+        results = [clocks[i].compare(clocks[j]) for i in range(len(clocks)) for j in range(i + 1, len(clocks))]
+        stats[kind]["compare"] = (time.perf_counter() - start) / max(1, len(results))
+        stats[kind]["results"] = results
+    for x, y in zip(stats["itc"]["results"], stats["vector"]["results"]):
+        pairs += 1
+        agree += x == y
+    stats["itc"]["size"] = sum(len(stamp.encode()) for stamp in itc) / len(itc)
+    stats["vector"]["size"] = sum(len(clock.encode()) for clock in vcs) / len(vcs)
+    stats["vector"]["entries"] = sum(len(clock.counters) for clock in vcs) / len(vcs)
+    return stats, len(itc), next_vc_id, agree, pairs
+
+
+def main():
+    # Ejemplo: dos replicas que nacen de una, eventos concurrentes y union
+    seed = Stamp()
+    a, b = seed.fork()
+    a = a.event()
+    b = b.event().event()
+    print(f"a = {a}  b = {b}  compare(a, b) = {a.compare(b)} (concurrentes)")
+    c = a.join(b).event()
+    print(f"c = a.join(b).event() = {c}  compare(a, c) = {a.compare(c)}  compare(c, b) = {c.compare(b)}")
+    assert Stamp.decode(c.encode()).event_tree == c.event_tree
+    print(f"c codificado: {c.encode().hex()} ({len(c.encode())} bytes)\n")
+
+    configs = [(8, 0.0), (32, 0.0), (32, 0.05), (32, 0.2), (128, 0.05)]
+    if len(sys.argv) > 2:
+        configs = [(int(sys.argv[1]), float(sys.argv[2]))]
+    print(f"{'replicas':>9}{'churn':>7}{'ids usados':>11}{'reloj':>8}{'bytes/msg':>11}{'bytes/reloj':>13}"
+          f"{'entradas':>10}{'us/op':>8}{'us/compare':>12}{'acuerdo':>9}")
+    for replicas, churn in configs:
+        stats, alive, ids_used, agree, pairs = simulate_churn(replicas, churn=churn)
+        for kind in ("itc", "vector"):
+            s = stats[kind]
+            entries = f"{s['entries']:.0f}" if kind == "vector" else "-"
+            print(f"{replicas:>9}{churn:>7.2f}{ids_used:>11}{kind:>8}{s['bytes'] / s['messages']:>11.1f}{s['size']:>13.1f}"
+                  f"{entries:>10}{s['time'] / s['ops'] * 1e6:>8.2f}{s['compare'] * 1e6:>12.2f}{agree / pairs:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import asyncio
+import importlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import event
+
+from cache import tipos_cache
+
+
+async def seed(client, keys):
+    for key in range(keys):
+        response = await client.post("/tiposid/", json={"cIdTipoId": f"T{key}", "cDescripcion": f"Tipo {key}"})
+        if response.status_code not in (201, 400):
+            response.raise_for_status()
+
+
+async def run_load(client, concurrency, duration, keys, write_ratio=0.1, revalidate=False):
+    """Clientes en bucle cerrado: lecturas por clave y una fraccion de actualizaciones.
+
+    Con revalidate cada cliente recuerda el ETag de cada clave y lo envia en If-None-Match.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        nonlocal errors
+        rng = random.Random(worker_id)
+        etags = {}
+        while time.perf_counter() < deadline:
+            key = f"T{rng.randrange(keys)}"
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    response = await client.put(f"/tiposid/{key}", json={"cIdTipoId": key, "cDescripcion": f"v{rng.random()}"})
+                else:
+                    headers = {"If-None-Match": etags[key]} if revalidate and key in etags else None
+                    response = await client.get(f"/tiposid/{key}", headers=headers)
+                    if "etag" in response.headers:
+                        etags[key] = response.headers["etag"]
+            except httpx.TimeoutException:
+                response = None
+            latencies.append(time.perf_counter() - start)
+            errors += response is None or response.status_code not in (200, 304)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], errors
+
+
+async def measure(target, concurrency, duration=3.0, keys=200, **load):
+    """target: "sync" (main.py), "async" (main_async.py) o la URL de un servidor ya levantado."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if target.startswith("http"):
+        async with httpx.AsyncClient(base_url=target, limits=limits, timeout=10) as client:
+            await seed(client, keys)
+            return await run_load(client, concurrency, duration, keys, **load)
+    app = app_module(target).app
+    # En proceso: el mismo event loop que usaria uvicorn, sin el coste del socket.
+    # Un fallo del servidor cuenta como error (500) en lugar de abortar la prueba.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", limits=limits, timeout=10) as client:
+            await seed(client, keys)
+            return await run_load(client, concurrency, duration, keys, **load)
+
+
+def app_module(target):
+    return importlib.import_module("main" if target == "sync" else "main_async")
+
+
+def count_queries(target):
+    """Cuenta las sentencias SQL que llegan a la base desde la app indicada."""
+    module = app_module(target)
+    engine = module.engine if target == "sync" else module.engine.sync_engine
+    counter = {"queries": 0}
+
+    def on_execute(*_):
+        counter["queries"] += 1
+    event.listen(engine, "before_cursor_execute", on_execute)
+    return counter
+
+
+def cache_report(concurrency=64, duration=3.0):
+    """GET /tiposid/{id} con 1% de escrituras: sin cache, con cache y con cache + If-None-Match."""
+    print(f"{'modo':>8}{'cache':>16}{'RPS':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'aciertos':>10}{'SQL/peticion':>14}{'errores':>9}")
+    for target in ("sync", "async"):
+        counter = count_queries(target)
+        for label, ttl, revalidate in (("no", 0, False), ("TTL 60 s", 60, False), ("TTL + ETag", 60, True)):
+            tipos_cache.clear()
+            tipos_cache.ttl = ttl
+            queries = counter["queries"]
+            rps, p50, p99, errors = asyncio.run(measure(target, concurrency, duration, write_ratio=0.01,
+                                                        revalidate=revalidate))
+            requests = rps * duration
+            print(f"{target:>8}{label:>16}{rps:>8,.0f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}"
+                  f"{tipos_cache.hit_rate:>10.1%}{(counter['queries'] - queries) / requests:>14.2f}{errors:>9}")
+
+
+def main():
+    # Uso: python load_test.py [url ...]   (sin URLs compara main.py y main_async.py en proceso sobre SQLite)
+    #      python load_test.py cache       (efecto del cache de lecturas)
+    targets = sys.argv[1:] or ["sync", "async"]
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{data_dir}/empresa.db")
+        # Sin conexion libre en 5 s la peticion falla (y cuenta como error) en vez de esperar 30 s
+        os.environ.setdefault("DB_POOL_TIMEOUT", "5")
+        print(f"Base de datos: {os.environ['DATABASE_URL']}\n")
+        if targets == ["cache"]:
+            cache_report()
+            return
+        # Sin cache: la comparacion mide el camino hasta la base, no aciertos en memoria
+        tipos_cache.clear()
+        tipos_cache.ttl = 0
+        print(f"{'modo':>24}{'concurrencia':>14}{'RPS':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'errores':>9}")
+        for concurrency in (1, 16, 64, 256):
+            for target in targets:
+                rps, p50, p99, errors = asyncio.run(measure(target, concurrency))
+                print(f"{target:>24}{concurrency:>14}{rps:>8,.0f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}{errors:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from typing import List
 
-from database import get_db, engine
+from database import get_db, engine, SessionLocal, PoolGate
 from models import TipoId
-from schemas import TipoIdCreate, TipoIdResponse
+from schemas import TipoIdCreate, TipoIdResponse, TipoIdPage, BulkResult
+from cache import tipos_cache, etag_matches
+from crud import (STREAM_CHUNK, page_query, ndjson_lines, BULK_CHUNK, UPSERT_INSERTS, prepare_bulk,
+                  existing_query, upsert_statement, classify, chunk_failed, bulk_summary)
 import models
 
 # Crear las tablas en la base de datos
 models.Base.metadata.create_all(bind=engine)
 app = FastAPI(title="API Tipos ID", version="1.0.0")
+app.add_middleware(PoolGate)
 
 #CREAR un tipo ID
 @app.post("/tiposid/", response_model=TipoIdResponse, status_code=status.HTTP_201_CREATED)
@@ -25,15 +31,74 @@ def create_tipo_id(tipo_id: TipoIdCreate, db: Session = Depends(get_db)):
     db_tipo_id = TipoId(**tipo_id.dict())
     db.add(db_tipo_id)
     db.commit()
+    tipos_cache.invalidate(tipo_id.cIdTipoId)
     db.refresh(db_tipo_id)
     return db_tipo_id
-#OBTENER todos los tipos ID
+
+#CARGA MASIVA: crea o actualiza muchos tipos ID con un upsert por lote, cada lote en su transaccion
+@app.post("/tiposid/bulk", response_model=BulkResult)
+def bulk_tipos_id(tipos_id: List[TipoIdCreate], chunk: int = Query(BULK_CHUNK, ge=1, le=5000),
+                  db: Session = Depends(get_db)):
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise HTTPException(status_code=501, detail=f"Carga masiva no soportada para {dialect}")
+    rows, statuses = prepare_bulk([tipo_id.model_dump() for tipo_id in tipos_id])
+    for start in range(0, len(rows), chunk):
+        batch = rows[start:start + chunk]
+        try:
+            existing = dict(db.execute(existing_query([record["cIdTipoId"] for _, record in batch])).all())
+            db.execute(upsert_statement(dialect, [record for _, record in batch]))
+            db.commit()
+        except SQLAlchemyError as error:
+            db.rollback()
+            chunk_failed(batch, statuses, error)
+            continue
+        classify(batch, existing, statuses)
+        for _, record in batch:
+            tipos_cache.invalidate(record["cIdTipoId"])
+    return bulk_summary(statuses)
+
+def stream_tipos_id(after):
+    # Sesion propia: vive lo que dure la respuesta, no lo que dure el endpoint
+    with SessionLocal() as db:
+        if db.bind.dialect.supports_server_side_cursors:
+            result = db.execute(page_query(after, columns=True).execution_options(yield_per=STREAM_CHUNK))
+            for rows in result.partitions():
+                yield ndjson_lines(rows)
+            return
+        while True:
+            rows = db.execute(page_query(after, STREAM_CHUNK, columns=True)).all()
+            if rows:
+                yield ndjson_lines(rows)
+            if len(rows) < STREAM_CHUNK:
+                return
+            after = rows[-1].cIdTipoId
+
+#LISTAR tipos ID: paginacion por clave (after = ultimo cIdTipoId recibido) o todo en NDJSON
+@app.get("/tiposid/", response_model=TipoIdPage)
+def listar_tipos_id(after: str | None = None, limit: int = Query(100, ge=1, le=1000),
+                    format: str = Query("json", pattern="^(json|ndjson)$"), db: Session = Depends(get_db)):
+    if format == "ndjson":
+        return StreamingResponse(stream_tipos_id(after), media_type="application/x-ndjson")
+    items = db.scalars(page_query(after, limit)).all()
+    next_after = items[-1].cIdTipoId if len(items) == limit else None
+    return {"items": items, "next_after": next_after}
+
+#OBTENER un tipo ID a traves del cache; con If-None-Match vigente responde 304 sin tocar la base
 @app.get("/tiposid/{cIdTipoId}", response_model=TipoIdResponse)
-def obtener_tipo_id(cIdTipoId: str, db: Session = Depends(get_db)):
-    db_tipo_id = db.query(TipoId).filter(TipoId.cIdTipoId == cIdTipoId).first()
-    if db_tipo_id is None:
-        raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
-    return db_tipo_id
+def obtener_tipo_id(cIdTipoId: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = tipos_cache.get(cIdTipoId)
+    if cached is None:
+        generation = tipos_cache.generation(cIdTipoId)
+        db_tipo_id = db.query(TipoId).filter(TipoId.cIdTipoId == cIdTipoId).first()
+        if db_tipo_id is None:
+            raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
+        cached = tipos_cache.set(cIdTipoId, TipoIdResponse.model_validate(db_tipo_id).model_dump(), generation)
+    data, etag = cached
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return data
 
 #ACTUALIZAR un tipo ID
 @app.put("/tiposid/{cIdTipoId}", response_model=TipoIdResponse)
@@ -43,6 +108,7 @@ def actualizar_tipo_id(cIdTipoId: str, tipo_id: TipoIdCreate, db: Session = Depe
         raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
     db_tipo_id.cDescripcion = tipo_id.cDescripcion
     db.commit()
+    tipos_cache.invalidate(cIdTipoId)
     db.refresh(db_tipo_id)
     return db_tipo_id
 
@@ -54,6 +120,7 @@ def eliminar_tipo_id(cIdTipoId: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
     db.delete(db_tipo_id)
     db.commit()
+    tipos_cache.invalidate(cIdTipoId)
     return {"mensaje": "Tipo ID eliminado exitosamente"}
 
 
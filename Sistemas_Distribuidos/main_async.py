@@ -0,0 +1,133 @@
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import PoolGate
+from database_async import get_db, engine, SessionLocal
+from models import TipoId
+from schemas import TipoIdCreate, TipoIdResponse, TipoIdPage, BulkResult
+from cache import tipos_cache, etag_matches
+from crud import (STREAM_CHUNK, page_query, ndjson_lines, BULK_CHUNK, UPSERT_INSERTS, prepare_bulk,
+                  existing_query, upsert_statement, classify, chunk_failed, bulk_summary)
+import models
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Crear las tablas en la base de datos
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield
+    await engine.dispose()
+
+app = FastAPI(title="API Tipos ID (async)", version="1.0.0", lifespan=lifespan)
+# Sin cola FIFO el pool asincrono no es justo: quien llega cuando se devuelve una
+# conexion se la lleva y el que esperaba vuelve al final (p99 de segundos).
+app.add_middleware(PoolGate)
+
+#CREAR un tipo ID
+@app.post("/tiposid/", response_model=TipoIdResponse, status_code=status.HTTP_201_CREATED)
+async def create_tipo_id(tipo_id: TipoIdCreate, db: AsyncSession = Depends(get_db)):
+    #Verificar si el tipo ID ya existe
+    if await db.get(TipoId, tipo_id.cIdTipoId) is not None:
+        raise HTTPException(
+            status_code = 400,
+            detail = "El tipo ID ya existe"
+        )
+    db_tipo_id = TipoId(**tipo_id.model_dump())
+    db.add(db_tipo_id)
+    await db.commit()
+    await tipos_cache.run(tipos_cache.invalidate, tipo_id.cIdTipoId)
+    return db_tipo_id
+
+#CARGA MASIVA: crea o actualiza muchos tipos ID con un upsert por lote, cada lote en su transaccion
+@app.post("/tiposid/bulk", response_model=BulkResult)
+async def bulk_tipos_id(tipos_id: List[TipoIdCreate], chunk: int = Query(BULK_CHUNK, ge=1, le=5000),
+                        db: AsyncSession = Depends(get_db)):
+    dialect = db.bind.dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise HTTPException(status_code=501, detail=f"Carga masiva no soportada para {dialect}")
+    rows, statuses = prepare_bulk([tipo_id.model_dump() for tipo_id in tipos_id])
+    for start in range(0, len(rows), chunk):
+        batch = rows[start:start + chunk]
+        try:
+            existing = dict((await db.execute(existing_query([record["cIdTipoId"] for _, record in batch]))).all())
+            await db.execute(upsert_statement(dialect, [record for _, record in batch]))
+            await db.commit()
+        except SQLAlchemyError as error:
+            await db.rollback()
+            chunk_failed(batch, statuses, error)
+            continue
+        classify(batch, existing, statuses)
+        await tipos_cache.run(tipos_cache.invalidate_many, [record["cIdTipoId"] for _, record in batch])
+    return bulk_summary(statuses)
+
+async def stream_tipos_id(after):
+    # Sesion propia: vive lo que dure la respuesta, no lo que dure el endpoint
+    async with SessionLocal() as db:
+        if db.bind.dialect.supports_server_side_cursors:
+            result = await db.stream(page_query(after, columns=True).execution_options(yield_per=STREAM_CHUNK))
+            async for rows in result.partitions():
+                yield ndjson_lines(rows)
+            return
+        while True:
+            rows = (await db.execute(page_query(after, STREAM_CHUNK, columns=True))).all()
+            if rows:
+                yield ndjson_lines(rows)
+            if len(rows) < STREAM_CHUNK:
+                return
+            after = rows[-1].cIdTipoId
+
+#LISTAR tipos ID: paginacion por clave (after = ultimo cIdTipoId recibido) o todo en NDJSON
+@app.get("/tiposid/", response_model=TipoIdPage)
+async def listar_tipos_id(after: str | None = None, limit: int = Query(100, ge=1, le=1000),
+                          format: str = Query("json", pattern="^(json|ndjson)$"), db: AsyncSession = Depends(get_db)):
+    if format == "ndjson":
+        return StreamingResponse(stream_tipos_id(after), media_type="application/x-ndjson")
+    items = (await db.scalars(page_query(after, limit))).all()
+    next_after = items[-1].cIdTipoId if len(items) == limit else None
+    return {"items": items, "next_after": next_after}
+
+#OBTENER un tipo ID a traves del cache; con If-None-Match vigente responde 304 sin tocar la base
+@app.get("/tiposid/{cIdTipoId}", response_model=TipoIdResponse)
+async def obtener_tipo_id(cIdTipoId: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    # Con Redis cada llamada al cache es un viaje de red: fuera del event loop
+    cached = await tipos_cache.run(tipos_cache.get, cIdTipoId)
+    if cached is None:
+        generation = await tipos_cache.run(tipos_cache.generation, cIdTipoId)
+        db_tipo_id = await db.get(TipoId, cIdTipoId)
+        if db_tipo_id is None:
+            raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
+        cached = await tipos_cache.run(tipos_cache.set, cIdTipoId,
+                                       TipoIdResponse.model_validate(db_tipo_id).model_dump(), generation)
+    data, etag = cached
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return data
+
+#ACTUALIZAR un tipo ID
+@app.put("/tiposid/{cIdTipoId}", response_model=TipoIdResponse)
+async def actualizar_tipo_id(cIdTipoId: str, tipo_id: TipoIdCreate, db: AsyncSession = Depends(get_db)):
+    db_tipo_id = await db.get(TipoId, cIdTipoId)
+    if db_tipo_id is None:
+        raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
+    db_tipo_id.cDescripcion = tipo_id.cDescripcion
+    await db.commit()
+    await tipos_cache.run(tipos_cache.invalidate, cIdTipoId)
+    return db_tipo_id
+
+#ELIMINAR un tipo ID
+@app.delete("/tiposid/{cIdTipoId}")
+async def eliminar_tipo_id(cIdTipoId: str, db: AsyncSession = Depends(get_db)):
+    db_tipo_id = await db.get(TipoId, cIdTipoId)
+    if db_tipo_id is None:
+        raise HTTPException(status_code=404, detail="Tipo ID no encontrado")
+    await db.delete(db_tipo_id)
+    await db.commit()
+    await tipos_cache.run(tipos_cache.invalidate, cIdTipoId)
+    return {"mensaje": "Tipo ID eliminado exitosamente"}
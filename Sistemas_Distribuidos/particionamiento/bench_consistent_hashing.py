@@ -0,0 +1,39 @@
+import sys
+import time
+
+from consistent_hashing import ConsistentHashRing, HASH_FUNCTIONS, np
+
+
+def measure(label, fn, num_keys):
+    """Ejecuta fn una vez y muestra el rendimiento en claves por segundo."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {num_keys / elapsed:>14,.0f} claves/s  ({elapsed:.3f} s)")
+    return num_keys / elapsed
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    nodes = [f"Servidor_{i}" for i in range(10)]
+    keys = [f"usuario_{i}" for i in range(num_keys)]
+
+    print(f"Benchmark de enrutamiento: {num_keys:,} claves, {len(nodes)} nodos, 100 replicas virtuales")
+    if np is None:
+        print("(numpy no esta instalado: get_nodes recurre a get_node)")
+
+    for name, hash_fn in HASH_FUNCTIONS.items():
+        ring = ConsistentHashRing(replicas=100, hash_fn=hash_fn, verbose=False)
+        for node in nodes:
+            ring.add_node(node)
+
+        measure(f"[{name}] get_node (bisect)", lambda: [ring.get_node(k) for k in keys], num_keys)
+        measure(f"[{name}] get_nodes (lote)", lambda: ring.get_nodes(keys), num_keys)
+
+        # Ambas rutas deben coincidir clave por clave
+        sample = keys[:1000]
+        assert ring.get_nodes(sample) == [ring.get_node(k) for k in sample]
+
+
+if __name__ == "__main__":
+    main()
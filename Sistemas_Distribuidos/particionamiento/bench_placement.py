@@ -0,0 +1,64 @@
+import sys
+import time
+import tracemalloc
+
+from consistent_hashing import load_report
+from placement import ENGINES
+
+
+def build(engine_cls, nodes):
+    """Construye un esquema con los nodos dados y mide la memoria que retiene."""
+    tracemalloc.start()
+    engine = engine_cls(verbose=False)
+    for node in nodes:
+        engine.add_node(node)
+    engine.get_nodes(["calentamiento"])  # Fuerza las tablas perezosas (p.ej. la copia NumPy del anillo)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return engine, memory
+
+
+def moved(before, after):
+    return sum(1 for old, new in zip(before, after) if old != new)
+
+
+def main():
+    num_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    nodes = [f"Servidor_{i}" for i in range(num_nodes)]
+    keys = [f"usuario_{i}" for i in range(num_keys)]
+    single_keys = keys[:min(num_keys, 100_000)]
+
+    print(f"Comparacion de esquemas: {num_keys:,} claves, {num_nodes} nodos")
+    print(f"Movimiento ideal: anadir {1 / (num_nodes + 1):.2%}, quitar {1 / num_nodes:.2%}\n")
+    header = f"{'esquema':<12}{'get_node/s':>14}{'get_nodes/s':>14}{'memoria':>12}{'max/prom':>10}{'anadir':>9}{'quitar':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for name, engine_cls in ENGINES.items():
+        engine, memory = build(engine_cls, nodes)
+
+        start = time.perf_counter()
+        for key in single_keys:
+            engine.get_node(key)
+        single_rate = len(single_keys) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        before = engine.get_nodes(keys)
+        batch_rate = num_keys / (time.perf_counter() - start)
+
+        balance = load_report(before)["max_mean_ratio"]
+
+        engine.add_node(f"Servidor_{num_nodes}")
+        after_add = engine.get_nodes(keys)
+        engine.remove_node(f"Servidor_{num_nodes}")
+        engine.remove_node(nodes[num_nodes // 2])
+        after_remove = engine.get_nodes(keys)
+
+        print(f"{name:<12}{single_rate:>14,.0f}{batch_rate:>14,.0f}{memory / 1024:>10,.0f}KB"
+              f"{balance:>10.3f}{moved(before, after_add) / num_keys:>9.2%}"
+              f"{moved(before, after_remove) / num_keys:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import threading
+import time
+
+from sharded_kv import ProcessShardedKV, ShardedKV
+
+
+def client(engine, num_keys, batch_size, deadline, counts, idx):
+    """Cliente: lotes de multi_get (90%) y multi_put (10%) hasta el plazo."""
+    rng = random.Random(idx)
+    done = 0
+    while time.perf_counter() < deadline:
+        keys = [rng.randrange(num_keys) for _ in range(batch_size)]
+        if rng.random() < 0.1:
+            engine.multi_put({key: f"valor_{key}" for key in keys})
+        else:
+            engine.multi_get(keys)
+        done += batch_size
+    counts[idx] = done
+
+
+def run(engine, num_clients, num_keys, batch_size, duration):
+    counts = [0] * num_clients
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(engine, num_keys, batch_size, deadline, counts, i))
+        for i in range(num_clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / duration
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    num_keys, batch_size, num_clients = 100_000, 256, 8
+    print(f"Benchmark KV particionado: {num_clients} clientes, lotes de {batch_size}, "
+          f"{duration:.1f} s por caso, {os.cpu_count()} CPU")
+    print(f"{'shards':>7}{'hilos (claves/s)':>20}{'procesos (claves/s)':>22}")
+
+    preload = {key: f"valor_{key}" for key in range(num_keys)}
+    for num_shards in (1, 2, 4, 8):
+        rates = []
+        for engine in (ShardedKV(num_shards), ProcessShardedKV(num_shards)):
+            engine.multi_put(preload)
+            rates.append(run(engine, num_clients, num_keys, batch_size, duration))
+            engine.close()
+        print(f"{num_shards:>7}{rates[0]:>20,.0f}{rates[1]:>22,.0f}")
+
+
+if __name__ == "__main__":
+    main()
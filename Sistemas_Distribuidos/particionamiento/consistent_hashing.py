@@ -1,33 +1,164 @@
 import hashlib
 import bisect
+import math
+import statistics
+
+try:
+    import numpy as np
+except ImportError:  # Sin numpy, get_nodes recurre a bisect clave por clave
+    np = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def sha1_hash(key):
+    """Hash original: SHA-1 truncado a 32 bits (hexdigest + int(..., 16), lento)."""
+    return int(hashlib.sha1(key.encode()).hexdigest(), 16) & 0xFFFFFFFF
+
+
+def blake2b_hash(key):
+    """Hash de 64 bits con BLAKE2b (digest_size=8) convertido con int.from_bytes."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def _blake2b_hash_batch(keys):
+    """Version por lotes de blake2b_hash: une los digests y los lee como uint64."""
+    blake2b = hashlib.blake2b
+    digests = b"".join([blake2b(k.encode(), digest_size=8).digest() for k in keys])
+    return np.frombuffer(digests, dtype="<u8")
+
+
+blake2b_hash.batch = _blake2b_hash_batch
+
+HASH_FUNCTIONS = {"sha1": sha1_hash, "blake2b": blake2b_hash}
+
+if xxhash is not None:
+    def xxhash64(key):
+        """Hash de 64 bits con xxHash (solo si el paquete xxhash esta instalado)."""
+        return xxhash.xxh64_intdigest(key.encode())
+
+    HASH_FUNCTIONS["xxhash"] = xxhash64
+
 
 class ConsistentHashRing:
     """Implementa un anillo simple de Hashing Consistente."""
-    def __init__(self, replicas=100):
+    def __init__(self, replicas=100, hash_fn=blake2b_hash, verbose=True):
         self.replicas = replicas # Numero de replicas virtuales por nodo
         self.ring = {}           # Almacena el hash del nodo y el nombre del nodo
         self.sorted_keys = []    # Claves de hash ordenadas para busqueda binaria
+        self.hash_fn = hash_fn   # Funcion de hash intercambiable (ver HASH_FUNCTIONS)
+        self.verbose = verbose
+        self.nodes = {}          # Nodo fisico -> numero de replicas virtuales en el anillo
+        self._vnode_ids = {}     # Nodo fisico -> indices i de los vnodes "nodo:i" insertados
+        self.weights = {}        # Nodo fisico -> peso relativo (capacidad)
+        self._next_distinct = {} # Hash de vnode -> hash del siguiente vnode (horario) de otro nodo
+        self._lookup_table = None  # Copia NumPy de sorted_keys para get_nodes
 
     def _gen_hash(self, key):
-        """Genera un hash numerico (de 0 a 2^32 - 1) para una clave."""
-        return int(hashlib.sha1(key.encode()).hexdigest(), 16) & 0xFFFFFFFF
+        """Genera un hash numerico para una clave con la funcion configurada."""
+        return self.hash_fn(key)
+
+    def _gen_hashes(self, keys):
+        """Genera los hashes de un lote de claves como arreglo uint64."""
+        batch = getattr(self.hash_fn, "batch", None)
+        if batch is not None:
+            return batch(keys)
+        return np.fromiter(map(self.hash_fn, keys), dtype=np.uint64, count=len(keys))
+
+    def _get_lookup_table(self):
+        """Construye (y cachea) los arreglos NumPy de claves y duenos del anillo."""
+        if self._lookup_table is None:
+            nodes = list(dict.fromkeys(self.ring.values()))
+            codes = {node: i for i, node in enumerate(nodes)}
+            keys = np.array(self.sorted_keys, dtype=np.uint64)
+            owners = np.array([codes[self.ring[k]] for k in self.sorted_keys], dtype=np.int32)
+            self._lookup_table = (keys, owners, np.array(nodes, dtype=object))
+        return self._lookup_table
+
+    def _insert_vnode(self, key, node):
+        """Inserta un vnode y actualiza la tabla de siguiente nodo distinto localmente."""
+        keys = self.sorted_keys
+        idx = bisect.bisect_left(keys, key)
+        keys.insert(idx, key)
+        self.ring[key] = node
+        n = len(keys)
+
+        # Puntero propio: el sucesor si es de otro nodo, si no el puntero del sucesor
+        succ = keys[(idx + 1) % n]
+        if n == 1:
+            self._next_distinct[key] = None
+        elif self.ring[succ] != node:
+            self._next_distinct[key] = succ
+        else:
+            self._next_distinct[key] = self._next_distinct[succ]
+
+        # Solo la racha de vnodes inmediatamente anterior (de otro nodo) pasa a apuntar aqui
+        j = (idx - 1) % n
+        prev_node = self.ring[keys[j]]
+        if prev_node == node:
+            return
+        while j != idx and self.ring[keys[j]] == prev_node:
+            self._next_distinct[keys[j]] = key
+            j = (j - 1) % n
+
+    def _delete_vnode(self, key):
+        """Elimina un vnode y repara los punteros de la racha que apuntaba a el."""
+        keys = self.sorted_keys
+        idx = bisect.bisect_left(keys, key)
+        del keys[idx]
+        node = self.ring.pop(key)
+        self._next_distinct.pop(key)
+        n = len(keys)
+        if n == 0:
+            return
 
-    def add_node(self, node):
-        """Anade un nodo (fisico) al anillo con sus replicas virtuales."""
-        for i in range(self.replicas):
+        j = (idx - 1) % n
+        prev_node = self.ring[keys[j]]
+        if prev_node == node:
+            return
+        succ = keys[idx % n]
+        target = succ if self.ring[succ] != prev_node else self._next_distinct[succ]
+        if target == key:
+            target = None  # Solo queda un nodo fisico en el anillo
+        for _ in range(n):
+            if self.ring[keys[j]] != prev_node:
+                break
+            self._next_distinct[keys[j]] = target
+            j = (j - 1) % n
+
+    def add_node(self, node, weight=1.0):
+        """Anade un nodo (fisico) al anillo con replicas virtuales proporcionales a su peso."""
+        if node in self.nodes:
+            raise ValueError(f"El nodo {node} ya esta en el anillo")
+        num_vnodes = max(1, round(self.replicas * weight))
+        inserted = []
+        for i in range(num_vnodes):
             key = self._gen_hash(f"{node}:{i}")
-            self.ring[key] = node
-            self.sorted_keys.append(key)
-        self.sorted_keys.sort()
-        print(f"Anadido nodo: {node} (Total de claves en el anillo: {len(self.sorted_keys)})")
+            if key in self.ring:
+                continue  # Colision de hash: el vnode ya pertenece a otro nodo
+            self._insert_vnode(key, node)
+            inserted.append(i)
+        if not inserted:
+            raise ValueError(f"Todos los vnodes de {node} colisionan con otros nodos del anillo")
+        self.nodes[node] = len(inserted)
+        self._vnode_ids[node] = inserted
+        self.weights[node] = weight
+        self._lookup_table = None
+        if self.verbose:
+            print(f"Anadido nodo: {node} (Total de claves en el anillo: {len(self.sorted_keys)})")
 
     def remove_node(self, node):
         """Elimina un nodo (fisico) y sus replicas virtuales del anillo."""
-        for i in range(self.replicas):
-            key = self._gen_hash(f"{node}:{i}")
-            del self.ring[key]
-            self.sorted_keys.remove(key)
-        print(f"Eliminado nodo: {node} (Total de claves en el anillo: {len(self.sorted_keys)})")
+        for i in self._vnode_ids.pop(node, ()):
+            self._delete_vnode(self._gen_hash(f"{node}:{i}"))
+        self.nodes.pop(node, None)
+        self.weights.pop(node, None)
+        self._lookup_table = None
+        if self.verbose:
+            print(f"Eliminado nodo: {node} (Total de claves en el anillo: {len(self.sorted_keys)})")
 
     def get_node(self, key):
         """Encuentra el nodo responsable de una clave de dato."""
@@ -47,6 +178,125 @@ class ConsistentHashRing:
         node_key = self.sorted_keys[idx]
         return self.ring[node_key]
 
+    def get_nodes_for_key(self, key, n):
+        """Devuelve los primeros n nodos fisicos distintos en sentido horario (lista de preferencia)."""
+        if not self.ring:
+            return []
+        n = min(n, len(self.nodes))  # Solo se registran nodos con al menos un vnode en el anillo
+
+        idx = bisect.bisect(self.sorted_keys, self._gen_hash(key)) % len(self.sorted_keys)
+        vnode = self.sorted_keys[idx]
+        replicas = []
+        # Cada salto de la tabla cae en un vnode de otro servidor; nunca se recorren rachas
+        while len(replicas) < n:
+            node = self.ring[vnode]
+            if node not in replicas:
+                replicas.append(node)
+            vnode = self._next_distinct[vnode]
+        return replicas
+
+    def _ring_positions(self, keys):
+        """Indice en sorted_keys del vnode responsable de cada clave del lote."""
+        if np is None:
+            n = len(self.sorted_keys)
+            return [bisect.bisect(self.sorted_keys, self._gen_hash(k)) % n for k in keys]
+        ring_keys = self._get_lookup_table()[0]
+        # side="right" equivale a bisect.bisect; el modulo cierra el anillo
+        idx = np.searchsorted(ring_keys, self._gen_hashes(keys), side="right")
+        idx %= len(ring_keys)
+        return idx
+
+    def get_nodes(self, keys):
+        """Encuentra el nodo responsable de cada clave de un lote (vectorizado)."""
+        keys = list(keys)
+        if not self.ring:
+            return [None] * len(keys)
+        if np is None:
+            return [self.get_node(key) for key in keys]
+
+        _, owners, nodes = self._get_lookup_table()
+        return nodes[owners[self._ring_positions(keys)]].tolist()
+
+    def capacities(self, num_keys, epsilon):
+        """Carga maxima por nodo: ceil((1 + epsilon) * promedio ponderado).
+
+        Solo cuentan los nodos con vnodes en el anillo: son los unicos alcanzables.
+        """
+        weights = {node: self.weights[node] for node in set(self.ring.values())}
+        total_weight = sum(weights.values())
+        return {
+            node: math.ceil((1 + epsilon) * num_keys * weight / total_weight)
+            for node, weight in weights.items()
+        }
+
+    def assign_bounded(self, keys, epsilon=0.25):
+        """Hashing consistente con cargas acotadas: si el dueno esta lleno, la clave
+        pasa al siguiente nodo distinto en sentido horario."""
+        keys = list(keys)
+        if not self.ring:
+            return [None] * len(keys)
+        capacity = self.capacities(len(keys), epsilon)
+        if sum(capacity.values()) < len(keys):
+            raise ValueError(f"Capacidad total insuficiente para {len(keys)} claves (epsilon={epsilon})")
+        loads = dict.fromkeys(capacity, 0)
+        sorted_keys, ring, next_distinct = self.sorted_keys, self.ring, self._next_distinct
+
+        positions = self._ring_positions(keys)
+        if np is not None:
+            positions = positions.tolist()
+
+        assignment = []
+        for idx in positions:
+            vnode = sorted_keys[idx]
+            node = ring[vnode]
+            hops = 0
+            while loads[node] >= capacity[node]:
+                hops += 1
+                vnode = next_distinct[vnode]
+                if vnode is None or hops > len(sorted_keys):  # Vuelta completa sin hueco
+                    raise RuntimeError("Ningun nodo del anillo tiene capacidad libre para la clave")
+                node = ring[vnode]
+            loads[node] += 1
+            assignment.append(node)
+        return assignment
+
+
+def load_report(assignment, weights=None, previous=None):
+    """Resume la distribucion de carga de una asignacion clave -> nodo.
+
+    Devuelve las claves por nodo, la razon max/promedio, la desviacion estandar
+    y, si se pasa la asignacion anterior, cuantas claves cambiaron de nodo.
+    Con weights, las metricas se calculan sobre la carga dividida por el peso.
+    """
+    weights = weights or {}
+    loads = dict.fromkeys(weights, 0)
+    for node in assignment:
+        loads[node] = loads.get(node, 0) + 1
+    counts = [count / weights.get(node, 1.0) for node, count in loads.items()]
+    total_weight = sum(weights.get(node, 1.0) for node in loads)
+    mean = len(assignment) / total_weight if loads else 0.0
+    report = {
+        "loads": loads,
+        "max_mean_ratio": max(counts) / mean if mean else 0.0,
+        "stdev": statistics.pstdev(counts) if counts else 0.0,
+        "relocated": None,
+    }
+    if previous is not None:
+        report["relocated"] = sum(1 for old, new in zip(previous, assignment) if old != new)
+    return report
+
+
+def print_load_report(title, report):
+    """Muestra un reporte generado por load_report."""
+    total = sum(report["loads"].values())
+    print(f"\n--- {title} ---")
+    for node, count in sorted(report["loads"].items()):
+        print(f"{node}: {count:,} claves ({100 * count / total:.2f}%)")
+    print(f"Max/promedio: {report['max_mean_ratio']:.3f} | Desviacion estandar: {report['stdev']:,.1f}")
+    if report["relocated"] is not None:
+        print(f"Reubicadas: {report['relocated']:,} de {total:,} ({100 * report['relocated'] / total:.2f}%)")
+
+
 def main():
     ring = ConsistentHashRing(replicas=100)
     
@@ -84,5 +334,30 @@ def main():
 
     print(f"\nResumen: {relocated_count} de {len(data_items)} datos reubicados.")
 
+    # 5. Conjuntos de replicas (lista de preferencia de 3 nodos distintos)
+    print("\n--- Replicas por Dato (N=3) ---")
+    for item in data_items:
+        print(f"Dato '{item}' -> {ring.get_nodes_for_key(item, 3)}")
+
+    # 6. Reubicacion a gran escala: 1M claves, nodo nuevo con el doble de peso
+    num_keys = 1_000_000
+    keys = [f"clave_{i}" for i in range(num_keys)]
+    big_ring = ConsistentHashRing(replicas=100, verbose=False)
+    for node in nodes:
+        big_ring.add_node(node)
+    before = big_ring.get_nodes(keys)
+    bounded_before = big_ring.assign_bounded(keys, epsilon=0.1)
+    print_load_report(f"Carga inicial ({num_keys:,} claves)", load_report(before))
+
+    big_ring.add_node("Servidor_D", weight=2.0)
+    after = big_ring.get_nodes(keys)
+    print_load_report("Tras anadir Servidor_D (peso 2)",
+                      load_report(after, big_ring.weights, previous=before))
+
+    # 7. Cargas acotadas: ningun nodo supera (1 + epsilon) veces su carga promedio ponderada
+    bounded_after = big_ring.assign_bounded(keys, epsilon=0.1)
+    print_load_report("Cargas acotadas (epsilon=0.1) tras anadir Servidor_D",
+                      load_report(bounded_after, big_ring.weights, previous=bounded_before))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,198 @@
+import bisect
+import itertools
+import random
+
+from consistent_hashing import blake2b_hash
+from sharding_simulation import NUM_SHARDS, SHARDS
+
+
+class CountMinSketch:
+    """Count-min sketch con ventana que decae: cada `window` accesos todo se multiplica por `decay`.
+
+    Ademas guarda como candidatos a clave caliente las claves cuya estimacion
+    supera `hot_threshold` del trafico de la ventana actual.
+    """
+    def __init__(self, width=2048, depth=4, window=50_000, decay=0.5, hot_threshold=0.002):
+        self.width = width
+        self.depth = depth
+        self.window = window
+        self.decay = decay
+        self.hot_threshold = hot_threshold
+        self.table = [[0.0] * width for _ in range(depth)]
+        self.total = 0.0
+        self.updates = 0
+        self.heavy = {}  # Clave -> estimacion, solo para candidatas a caliente
+
+    def _indexes(self, key):
+        # Doble hashing (Kirsch-Mitzenmacher): un solo hash de 64 bits para todas las filas
+        h = blake2b_hash(str(key))
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        estimate = None
+        for row, idx in zip(self.table, self._indexes(key)):
+            row[idx] += count
+            estimate = row[idx] if estimate is None else min(estimate, row[idx])
+        self.total += count
+        if estimate >= self.hot_threshold * self.total:
+            self.heavy[key] = estimate
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._decay()
+        return estimate
+
+    def estimate(self, key):
+        return min(row[idx] for row, idx in zip(self.table, self._indexes(key)))
+
+    def _decay(self):
+        for row in self.table:
+            for i, value in enumerate(row):
+                if value:
+                    row[i] = value * self.decay
+        self.total *= self.decay
+        threshold = self.hot_threshold * self.total
+        self.heavy = {k: v * self.decay for k, v in self.heavy.items() if v * self.decay >= threshold}
+
+    def hot_keys(self, n=10):
+        return sorted(self.heavy.items(), key=lambda item: -item[1])[:n]
+
+
+class AdaptiveRouter:
+    """Enrutador por buckets con contadores de acceso y rebalanceo de rangos calientes.
+
+    Con num_buckets multiplo de NUM_SHARDS, el directorio inicial reproduce
+    exactamente get_shard_id (user_id % NUM_SHARDS). El rebalanceador mueve
+    buckets calientes a shards frios y, si un bucket es demasiado grande para
+    moverlo entero, lo divide sacando sus claves calientes a otro shard.
+    """
+    def __init__(self, num_shards=NUM_SHARDS, num_buckets=64, window=50_000, decay=0.5):
+        self.num_shards = num_shards
+        self.num_buckets = num_buckets
+        self.directory = [b % num_shards for b in range(num_buckets)]
+        self.overrides = {}   # Clave caliente separada de su bucket -> shard
+        self.sketch = CountMinSketch(window=window, decay=decay)
+        self.window = window
+        self.decay = decay
+        self.bucket_load = [0.0] * num_buckets    # Sin contar las claves separadas
+        self.override_load = {}
+        self.accesses = 0
+
+    def get_shard_id(self, user_id):
+        shard_id = self.overrides.get(user_id)
+        if shard_id is None:
+            shard_id = self.directory[user_id % self.num_buckets]
+        return shard_id
+
+    def record(self, user_id):
+        """Registra un acceso y devuelve el shard que lo atiende."""
+        self.sketch.add(user_id)
+        if user_id in self.overrides:
+            self.override_load[user_id] += 1
+        else:
+            self.bucket_load[user_id % self.num_buckets] += 1
+        self.accesses += 1
+        if self.accesses % self.window == 0:
+            self.bucket_load = [load * self.decay for load in self.bucket_load]
+            self.override_load = {k: v * self.decay for k, v in self.override_load.items()}
+        return self.get_shard_id(user_id)
+
+    def shard_loads(self):
+        loads = [0.0] * self.num_shards
+        for bucket, load in enumerate(self.bucket_load):
+            loads[self.directory[bucket]] += load
+        for key, load in self.override_load.items():
+            loads[self.overrides[key]] += load
+        return loads
+
+    def _candidates(self, shard_id):
+        """Unidades movibles del shard: buckets enteros o claves calientes (division del bucket)."""
+        for bucket, owner in enumerate(self.directory):
+            if owner == shard_id and self.bucket_load[bucket]:
+                yield "bucket", bucket, self.bucket_load[bucket]
+        for key, estimate in self.sketch.hot_keys(50):
+            if key not in self.overrides and self.directory[key % self.num_buckets] == shard_id:
+                # La estimacion no puede superar lo que el bucket registro realmente
+                yield "key", key, min(estimate, self.bucket_load[key % self.num_buckets])
+
+    def rebalance(self, tolerance=0.1, max_moves=32):
+        """Mueve o divide rangos del shard mas cargado al mas frio hasta acercarse al promedio."""
+        moves = []
+        for _ in range(max_moves):
+            loads = self.shard_loads()
+            mean = sum(loads) / len(loads)
+            hot = max(range(self.num_shards), key=loads.__getitem__)
+            cold = min(range(self.num_shards), key=loads.__getitem__)
+            gap = loads[hot] - loads[cold]
+            if loads[hot] <= mean * (1 + tolerance):
+                break
+            # La mejor unidad deja ambos shards lo mas parejos posible: carga cercana a gap / 2
+            options = [c for c in self._candidates(hot) if 0 < c[2] < gap]
+            if not options:
+                break
+            kind, unit, load = min(options, key=lambda c: abs(c[2] - gap / 2))
+            if kind == "bucket":
+                self.directory[unit] = cold
+            else:
+                self.overrides[unit] = cold
+                self.override_load[unit] = load
+                self.bucket_load[unit % self.num_buckets] -= load
+            moves.append((kind, unit, hot, cold, load))
+        return moves
+
+
+def zipf_workload(num_users, num_requests, s=1.1, seed=0, mapping_seed=42):
+    """Genera ids de usuario con popularidad Zipf(s).
+
+    mapping_seed fija que usuario ocupa cada rango de popularidad, de modo que
+    varias llamadas con distinta seed simulan ventanas del mismo trafico.
+    """
+    cum_weights = list(itertools.accumulate(1 / rank ** s for rank in range(1, num_users + 1)))
+    user_ids = list(range(num_users))
+    random.Random(mapping_seed).shuffle(user_ids)
+    rng = random.Random(seed)
+    total = cum_weights[-1]
+    return [user_ids[bisect.bisect(cum_weights, rng.random() * total)] for _ in range(num_requests)]
+
+
+def serve(router, requests):
+    """Reproduce las peticiones y cuenta cuantas atiende cada shard."""
+    served = [0] * router.num_shards
+    for user_id in requests:
+        served[router.record(user_id)] += 1
+    return served
+
+
+def print_loads(title, served):
+    mean = sum(served) / len(served)
+    print(f"\n--- {title} ---")
+    for shard_id, count in enumerate(served):
+        name = SHARDS[shard_id]["name"] if shard_id in SHARDS else f"Shard_{shard_id}"
+        print(f"{name} (Shard {shard_id}): {count:,} peticiones")
+    print(f"Carga max/promedio: {max(served) / mean:.3f}")
+
+
+def main():
+    num_users, window = 100_000, 50_000
+    router = AdaptiveRouter(window=window)
+    print(f"Trafico Zipf(1.1) sobre {num_users:,} usuarios, {NUM_SHARDS} shards, ventana de {window:,} accesos")
+
+    before = serve(router, zipf_workload(num_users, 200_000, seed=1))
+    print_loads("Con user_id % NUM_SHARDS", before)
+
+    print("\nClaves mas calientes (count-min sketch):")
+    for key, estimate in router.sketch.hot_keys(5):
+        print(f"  Usuario {key}: ~{estimate:,.0f} accesos (Shard {router.get_shard_id(key)})")
+
+    moves = router.rebalance()
+    print(f"\nRebalanceo: {len(moves)} movimientos")
+    for kind, unit, src, dst, load in moves:
+        label = "bucket" if kind == "bucket" else "clave caliente"
+        print(f"  {label} {unit}: Shard {src} -> Shard {dst} (~{load:,.0f} accesos)")
+
+    after = serve(router, zipf_workload(num_users, 200_000, seed=2))
+    print_loads("Tras el rebalanceo", after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import abc
+
+from consistent_hashing import ConsistentHashRing, blake2b_hash, np
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def mix64(x):
+    """Mezclador splitmix64 sobre enteros de Python (64 bits)."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def mix64_array(x):
+    """Mezclador splitmix64 vectorizado sobre arreglos uint64 (el desborde es modulo 2^64)."""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class PlacementEngine(abc.ABC):
+    """Interfaz comun de los esquemas de ubicacion (la misma que ConsistentHashRing).
+
+    Cada esquema implementa add_node, remove_node y get_node; get_nodes resuelve
+    un lote de claves y las subclases lo vectorizan cuando numpy esta disponible.
+    """
+    name = "base"
+
+    def __init__(self, hash_fn=blake2b_hash, verbose=True):
+        self.hash_fn = hash_fn
+        self.verbose = verbose
+        self.nodes = []
+
+    def _gen_hash(self, key):
+        return self.hash_fn(key)
+
+    def _gen_hashes(self, keys):
+        batch = getattr(self.hash_fn, "batch", None)
+        if batch is not None:
+            return batch(keys)
+        return np.fromiter(map(self.hash_fn, keys), dtype=np.uint64, count=len(keys))
+
+    def _log(self, action, node):
+        if self.verbose:
+            print(f"[{self.name}] {action} nodo: {node} (Total de nodos: {len(self.nodes)})")
+
+    def add_node(self, node):
+        self.nodes.append(node)
+        self._rebuild()
+        self._log("Anadido", node)
+
+    def remove_node(self, node):
+        self.nodes.remove(node)
+        self._rebuild()
+        self._log("Eliminado", node)
+
+    def _rebuild(self):
+        """Recalcula las estructuras derivadas de la lista de nodos."""
+
+    @abc.abstractmethod
+    def get_node(self, key):
+        """Nodo responsable de una clave (None si no hay nodos)."""
+
+    def get_nodes(self, keys):
+        return [self.get_node(key) for key in keys]
+
+
+class JumpHash(PlacementEngine):
+    """Jump Consistent Hash (Lamping y Veach): sin tabla, O(ln n) por clave.
+
+    Los buckets son posiciones 0..n-1, asi que solo quitar el ultimo nodo es
+    minimo. Para quitar otro, el ultimo ocupa su posicion: se mueven las claves
+    del nodo eliminado y las del ultimo bucket.
+    """
+    name = "jump"
+
+    def remove_node(self, node):
+        idx = self.nodes.index(node)
+        last = self.nodes.pop()
+        if idx < len(self.nodes):
+            self.nodes[idx] = last
+        self._log("Eliminado", node)
+
+    @staticmethod
+    def jump(key_hash, num_buckets):
+        b, j = -1, 0
+        while j < num_buckets:
+            b = j
+            key_hash = (key_hash * 2862933555777941757 + 1) & MASK64
+            j = int((b + 1) * ((1 << 31) / ((key_hash >> 33) + 1)))
+        return b
+
+    def get_node(self, key):
+        if not self.nodes:
+            return None
+        return self.nodes[self.jump(self._gen_hash(key), len(self.nodes))]
+
+    def get_nodes(self, keys):
+        keys = list(keys)
+        if np is None or not self.nodes:
+            return super().get_nodes(keys)
+
+        num_buckets = len(self.nodes)
+        key_hash = self._gen_hashes(keys).copy()
+        b = np.full(len(keys), -1, dtype=np.int64)
+        j = np.zeros(len(keys), dtype=np.int64)
+        active = np.arange(len(keys))
+        # Todas las claves avanzan a la vez; cada vuelta descarta las que ya salieron
+        while active.size:
+            b[active] = j[active]
+            kh = key_hash[active] * np.uint64(2862933555777941757) + np.uint64(1)
+            key_hash[active] = kh
+            step = (1 << 31) / ((kh >> np.uint64(33)).astype(np.float64) + 1)
+            j[active] = ((b[active] + 1) * step).astype(np.int64)
+            active = active[j[active] < num_buckets]
+        return np.array(self.nodes, dtype=object)[b].tolist()
+
+
+class RendezvousHash(PlacementEngine):
+    """Rendezvous / Highest Random Weight: cada clave elige el nodo de mayor puntaje.
+
+    El puntaje es mix64(hash(clave) ^ semilla(nodo)): un hash por clave y O(n)
+    mezclas baratas, en lugar de un hash criptografico por par clave-nodo.
+    """
+    name = "rendezvous"
+
+    def __init__(self, hash_fn=blake2b_hash, verbose=True, chunk_size=65536):
+        super().__init__(hash_fn, verbose)
+        self.chunk_size = chunk_size
+        self.seeds = []
+
+    def _rebuild(self):
+        self.seeds = [self._gen_hash(str(node)) for node in self.nodes]
+
+    def get_node(self, key):
+        if not self.nodes:
+            return None
+        key_hash = self._gen_hash(key)
+        scores = [mix64(key_hash ^ seed) for seed in self.seeds]
+        return self.nodes[scores.index(max(scores))]
+
+    def get_nodes(self, keys):
+        keys = list(keys)
+        if np is None or not self.nodes:
+            return super().get_nodes(keys)
+
+        hashes = self._gen_hashes(keys)
+        seeds = np.array(self.seeds, dtype=np.uint64)
+        winners = np.empty(len(keys), dtype=np.int64)
+        # Por bloques para acotar la matriz claves x nodos
+        for start in range(0, len(keys), self.chunk_size):
+            block = hashes[start:start + self.chunk_size, None] ^ seeds[None, :]
+            winners[start:start + self.chunk_size] = mix64_array(block).argmax(axis=1)
+        return np.array(self.nodes, dtype=object)[winners].tolist()
+
+
+class MaglevHash(PlacementEngine):
+    """Tabla de busqueda Maglev (Eisenbud et al.): O(1) por clave con un arreglo de tamano primo."""
+    name = "maglev"
+
+    def __init__(self, hash_fn=blake2b_hash, verbose=True, table_size=65537):
+        super().__init__(hash_fn, verbose)
+        self.table_size = table_size  # Debe ser primo y mucho mayor que el numero de nodos
+        self.table = []
+
+    def _rebuild(self):
+        """Llena la tabla por turnos: cada nodo toma la siguiente casilla libre de su permutacion."""
+        m = self.table_size
+        self.table = [-1] * m
+        if not self.nodes:
+            return
+        offsets, skips = [], []
+        for node in self.nodes:
+            h = self._gen_hash(str(node))
+            offsets.append((h & 0xFFFFFFFF) % m)
+            skips.append((h >> 32) % (m - 1) + 1)
+
+        next_idx = [0] * len(self.nodes)
+        filled = 0
+        while True:
+            for i in range(len(self.nodes)):
+                slot = (offsets[i] + next_idx[i] * skips[i]) % m
+                while self.table[slot] >= 0:
+                    next_idx[i] += 1
+                    slot = (offsets[i] + next_idx[i] * skips[i]) % m
+                self.table[slot] = i
+                next_idx[i] += 1
+                filled += 1
+                if filled == m:
+                    if np is not None:
+                        self._np_table = np.array(self.table, dtype=np.int64)
+                    return
+
+    def get_node(self, key):
+        if not self.nodes:
+            return None
+        return self.nodes[self.table[self._gen_hash(key) % self.table_size]]
+
+    def get_nodes(self, keys):
+        keys = list(keys)
+        if np is None or not self.nodes:
+            return super().get_nodes(keys)
+        slots = self._gen_hashes(keys) % np.uint64(self.table_size)
+        return np.array(self.nodes, dtype=object)[self._np_table[slots]].tolist()
+
+
+# Todos los esquemas se construyen igual: Engine(verbose=False) y luego add_node
+ENGINES = {
+    "ring": ConsistentHashRing,
+    "jump": JumpHash,
+    "rendezvous": RendezvousHash,
+    "maglev": MaglevHash,
+}
+
+
+def main():
+    nodes = ["Servidor_A", "Servidor_B", "Servidor_C"]
+    data_items = ["usuario_1", "usuario_2", "producto_a", "orden_55", "cache_key_x", "video_id_7"]
+
+    for name, engine_cls in ENGINES.items():
+        engine = engine_cls(verbose=False)
+        for node in nodes:
+            engine.add_node(node)
+        before = engine.get_nodes(data_items)
+        engine.add_node("Servidor_D")
+        after = engine.get_nodes(data_items)
+
+        print(f"\n--- {name} ---")
+        for item, old, new in zip(data_items, before, after):
+            marker = "  <--- REUBICADO" if old != new else ""
+            print(f"Dato '{item}' -> {old} / {new}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import copy
+import random
+import threading
+import time
+
+from consistent_hashing import blake2b_hash
+from sharding_simulation import SHARDS, _index_user, _unindex_user, find_users_by_name, query_users_by_name_range
+
+
+class ReshardingEngine:
+    """Sharding con un directorio de buckets virtuales y migracion de datos en linea.
+
+    Cada usuario cae en un bucket fijo (hash(user_id) % num_buckets) y el
+    directorio dice que shard guarda cada bucket. Anadir o quitar un shard solo
+    reasigna los buckets necesarios para equilibrar, y sus datos se copian en
+    segundo plano por lotes mientras las lecturas consultan destino y origen.
+    Los indices secundarios de cada shard (name_index, sorted_index) se
+    mantienen en cada escritura y en cada clave que cambia de shard.
+    """
+    def __init__(self, shards, num_buckets=1024, batch_size=1000, verbose=True):
+        self.shards = shards              # Mismo formato que SHARDS: {id: {"name", "data", indices}}
+        self.num_buckets = num_buckets
+        self.batch_size = batch_size
+        self.verbose = verbose
+        shard_ids = sorted(shards)
+        self.directory = [shard_ids[b % len(shard_ids)] for b in range(num_buckets)]
+        self.migrating = {}               # Bucket -> (shard origen, shard destino)
+        self.lock = threading.Lock()
+        self.migration_thread = None
+        self.stats = {"keys_moved": 0, "buckets_moved": 0, "double_reads": 0, "elapsed": 0.0}
+
+        # Redistribuir datos existentes segun el directorio (p.ej. si venian por modulo)
+        for shard_id in shard_ids:
+            data = shards[shard_id]["data"]
+            for user_id in [u for u in data if self.get_shard_id(u) != shard_id]:
+                shards[self.get_shard_id(user_id)]["data"][user_id] = data.pop(user_id)
+        for shard in shards.values():
+            self._rebuild_indexes(shard)
+
+    @staticmethod
+    def _rebuild_indexes(shard):
+        shard["name_index"] = {}
+        for user_id, user_name in shard["data"].items():
+            shard["name_index"].setdefault(user_name, set()).add(user_id)
+        shard["sorted_index"] = sorted((user_name, user_id) for user_id, user_name in shard["data"].items())
+
+    def get_bucket(self, user_id):
+        return blake2b_hash(str(user_id)) % self.num_buckets
+
+    def get_shard_id(self, user_id):
+        """Shard dueno del usuario segun el directorio (destino si su bucket migra)."""
+        bucket = self.get_bucket(user_id)
+        if bucket in self.migrating:
+            return self.migrating[bucket][1]
+        return self.directory[bucket]
+
+    def write_user_data(self, user_id, user_name):
+        """Escribe en el shard dueno; durante la migracion, siempre en el destino."""
+        with self.lock:
+            shard_id = self.get_shard_id(user_id)
+            _index_user(self.shards[shard_id], user_id, user_name)
+            self.shards[shard_id]["data"][user_id] = user_name
+        return shard_id
+
+    def read_user_data(self, user_id):
+        """Lee del shard dueno; si su bucket esta migrando, lee destino y luego origen."""
+        bucket = self.get_bucket(user_id)
+        with self.lock:
+            if bucket in self.migrating:
+                src, dst = self.migrating[bucket]
+                self.stats["double_reads"] += 1
+                value = self.shards[dst]["data"].get(user_id)
+                if value is None:
+                    value = self.shards[src]["data"].get(user_id)
+                return value
+            return self.shards[self.directory[bucket]]["data"].get(user_id)
+
+    def _buckets_per_shard(self):
+        owned = {shard_id: [] for shard_id in self.shards}
+        for bucket, shard_id in enumerate(self.directory):
+            owned[shard_id].append(bucket)
+        return owned
+
+    def _plan_add(self, new_id):
+        """Toma buckets de los shards mas cargados hasta que el nuevo tenga su cuota."""
+        owned = self._buckets_per_shard()
+        quota = self.num_buckets // len(self.shards)
+        moves = []
+        while len(moves) < quota:
+            donor = max((s for s in owned if s != new_id), key=lambda s: len(owned[s]))
+            moves.append((owned[donor].pop(), donor, new_id))
+        return moves
+
+    def _plan_remove(self, old_id):
+        """Reparte los buckets del shard eliminado entre los que tienen menos."""
+        owned = self._buckets_per_shard()
+        moves = []
+        for bucket in owned.pop(old_id):
+            target = min(owned, key=lambda s: len(owned[s]))
+            owned[target].append(bucket)
+            moves.append((bucket, old_id, target))
+        return moves
+
+    def add_shard(self, shard_id, name):
+        """Anade un shard vacio y empieza a migrarle buckets en segundo plano."""
+        if shard_id in self.shards:
+            raise ValueError(f"El shard {shard_id} ya existe")
+        self.wait()
+        with self.lock:
+            self.shards[shard_id] = {"name": name, "data": {}, "name_index": {}, "sorted_index": []}
+        moves = self._plan_add(shard_id)
+        self._start_migration(moves)
+        return moves
+
+    def remove_shard(self, shard_id):
+        """Vacia un shard migrando sus buckets; se elimina cuando termina la copia."""
+        self.wait()
+        moves = self._plan_remove(shard_id)
+        self._start_migration(moves, drop_shard=shard_id)
+        return moves
+
+    def wait(self):
+        """Espera a que termine la migracion en curso (si la hay)."""
+        if self.migration_thread is not None:
+            self.migration_thread.join()
+            self.migration_thread = None
+
+    def _start_migration(self, moves, drop_shard=None):
+        with self.lock:
+            for bucket, src, dst in moves:
+                self.migrating[bucket] = (src, dst)
+        self.migration_thread = threading.Thread(
+            target=self._migrate, args=(moves, drop_shard), daemon=True
+        )
+        self.migration_thread.start()
+
+    def _migrate(self, moves, drop_shard):
+        """Copia los buckets en lotes; cada lote toma el lock solo mientras copia."""
+        buckets = {bucket: (src, dst) for bucket, src, dst in moves}
+        # Un solo recorrido por shard origen para agrupar sus claves por bucket
+        pending = {bucket: [] for bucket in buckets}
+        with self.lock:
+            for src in {src for src, _ in buckets.values()}:
+                for user_id in list(self.shards[src]["data"]):
+                    bucket = self.get_bucket(user_id)
+                    if bucket in pending and buckets[bucket][0] == src:
+                        pending[bucket].append(user_id)
+
+        start = time.perf_counter()
+        moved = 0
+        for bucket, (src, dst) in buckets.items():
+            keys = pending[bucket]
+            for i in range(0, len(keys), self.batch_size):
+                with self.lock:
+                    src_shard, dst_shard = self.shards[src], self.shards[dst]
+                    src_data, dst_data = src_shard["data"], dst_shard["data"]
+                    for user_id in keys[i:i + self.batch_size]:
+                        value = src_data.pop(user_id, None)
+                        if value is None:
+                            continue
+                        _unindex_user(src_shard, user_id, value)
+                        # Una escritura durante la migracion ya fue al destino y es mas nueva
+                        if user_id not in dst_data:
+                            _index_user(dst_shard, user_id, value)
+                            dst_data[user_id] = value
+                            moved += 1
+                    self.stats["keys_moved"] = moved
+                time.sleep(0)  # Cede el GIL a las peticiones en curso entre lotes
+            with self.lock:
+                self.directory[bucket] = dst
+                del self.migrating[bucket]
+                self.stats["buckets_moved"] += 1
+            if self.verbose and self.stats["buckets_moved"] % 64 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  Migracion: {self.stats['buckets_moved']}/{len(buckets)} buckets, "
+                      f"{moved:,} claves ({moved / elapsed:,.0f} claves/s)")
+
+        with self.lock:
+            if drop_shard is not None:
+                del self.shards[drop_shard]
+            self.stats["elapsed"] = time.perf_counter() - start
+
+    def display_shards_status(self):
+        print("\n--- Estado Actual de los Shards ---")
+        owned = self._buckets_per_shard()
+        for shard_id, shard in sorted(self.shards.items()):
+            print(f"{shard['name']} (Shard {shard_id}): {len(shard['data']):,} usuarios, "
+                  f"{len(owned[shard_id])} buckets")
+        print("---------------------------------")
+
+
+def run_traffic(engine, users, stop, counters):
+    """Cliente concurrente: lee y escribe usuarios al azar; cuenta lecturas fallidas."""
+    ids = list(users)
+    while not stop.is_set():
+        user_id = random.choice(ids)
+        if random.random() < 0.2:
+            engine.write_user_data(user_id, users[user_id])
+        elif engine.read_user_data(user_id) is None:
+            counters["misses"] += 1
+        counters["ops"] += 1
+
+
+def migrate_with_traffic(engine, action, users):
+    stop = threading.Event()
+    counters = {"ops": 0, "misses": 0}
+    client = threading.Thread(target=run_traffic, args=(engine, users, stop, counters))
+    client.start()
+    moves = action()
+    engine.wait()
+    stop.set()
+    client.join()
+    stats = engine.stats
+    print(f"Buckets movidos: {len(moves)} | Claves movidas: {stats['keys_moved']:,} "
+          f"de {len(users):,} ({stats['keys_moved'] / len(users):.1%}) "
+          f"en {stats['elapsed']:.2f} s ({stats['keys_moved'] / stats['elapsed']:,.0f} claves/s)")
+    print(f"Peticiones durante la migracion: {counters['ops']:,} "
+          f"(lecturas dobles: {stats['double_reads']:,}, fallidas: {counters['misses']})")
+
+
+def main():
+    num_users = 200_000
+    users = {user_id: f"Usuario_{user_id}" for user_id in range(num_users)}
+    shards = copy.deepcopy(SHARDS)
+    num_shards = len(shards)
+
+    # Con modulo, pasar de 4 a 5 shards reubica a casi todos los usuarios
+    modulo_moved = sum(1 for u in users if u % num_shards != u % (num_shards + 1))
+    print(f"Con user_id % N, anadir un shard movera {modulo_moved:,} de {num_users:,} usuarios "
+          f"({modulo_moved / num_users:.1%}).")
+
+    engine = ReshardingEngine(shards)
+    for user_id, name in users.items():
+        engine.write_user_data(user_id, name)
+    engine.display_shards_status()
+
+    print("\n--- Anadiendo Shard_Africa en caliente ---")
+    migrate_with_traffic(engine, lambda: engine.add_shard(4, "Shard_Africa"), users)
+    engine.display_shards_status()
+
+    print("\n--- Retirando Shard_Oceania en caliente ---")
+    engine.stats.update(keys_moved=0, buckets_moved=0, double_reads=0)
+    migrate_with_traffic(engine, lambda: engine.remove_shard(3), users)
+    engine.display_shards_status()
+
+    assert all(engine.read_user_data(u) == name for u, name in users.items())
+    # Los indices secundarios siguieron a los datos: las consultas scatter-gather los ven
+    assert find_users_by_name("Usuario_12345", shards=engine.shards) == [12345]
+    assert len(list(query_users_by_name_range("Usuario_", shards=engine.shards))) == num_users
+    print("Verificacion: todos los usuarios siguen accesibles, tambien por nombre.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import collections
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from sharding_simulation import SHARDS
+
+
+class Shard:
+    """Un shard en memoria con su propio lock: operaciones en shards distintos no compiten."""
+    def __init__(self, name):
+        self.name = name
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def put_many(self, items):
+        with self.lock:
+            self.data.update(items)
+        return len(items)
+
+    def get_many(self, keys):
+        with self.lock:
+            data = self.data
+            return [data.get(key) for key in keys]
+
+
+class ShardedKV:
+    """Motor clave-valor particionado con un lock por shard (en lugar de un dict global).
+
+    put/get van directo al shard de la clave; multi_get/multi_put agrupan las
+    claves por shard y las resuelven en paralelo con un pool de hilos.
+    """
+    def __init__(self, num_shards=len(SHARDS), names=None, max_workers=None):
+        names = names or [SHARDS[i]["name"] if i in SHARDS else f"Shard_{i}" for i in range(num_shards)]
+        self.shards = [Shard(name) for name in names]
+        self.num_shards = len(self.shards)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or self.num_shards)
+
+    def get_shard_id(self, key):
+        """Mismo enrutamiento que sharding_simulation.get_shard_id: modulo del numero de shards."""
+        return key % self.num_shards
+
+    def _group(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(key % self.num_shards, []).append(key)
+        return groups
+
+    def put(self, key, value):
+        shard = self.shards[self.get_shard_id(key)]
+        with shard.lock:
+            shard.data[key] = value
+
+    def get(self, key):
+        shard = self.shards[self.get_shard_id(key)]
+        with shard.lock:
+            return shard.data.get(key)
+
+    def multi_put(self, items):
+        groups = {}
+        for key, value in items.items():
+            groups.setdefault(key % self.num_shards, {})[key] = value
+        futures = [self.executor.submit(self.shards[s].put_many, batch) for s, batch in groups.items()]
+        return sum(f.result() for f in futures)
+
+    def multi_get(self, keys):
+        groups = self._group(keys)
+        futures = {s: self.executor.submit(self.shards[s].get_many, batch) for s, batch in groups.items()}
+        result = {}
+        for shard_id, future in futures.items():
+            result.update(zip(groups[shard_id], future.result()))
+        return result
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def _shard_worker(conn):
+    """Proceso dueno de un shard: atiende lotes de put/get por su extremo del Pipe."""
+    data = {}
+    while True:
+        op, payload = conn.recv()
+        if op == "put":
+            data.update(payload)
+            conn.send(len(payload))
+        elif op == "get":
+            conn.send([data.get(key) for key in payload])
+        else:
+            break
+
+
+class ProcessShardedKV:
+    """Motor clave-valor con un proceso por shard (sin GIL compartido entre shards).
+
+    Cada shard vive en su propio proceso y recibe lotes por un Pipe. multi_get
+    envia primero un lote a cada shard implicado y despues recoge las respuestas,
+    de modo que todos los shards trabajan a la vez. Cada Pipe tiene un lock para
+    enviar y otro para recibir, y una cola FIFO de respuestas pendientes: quien
+    recibe entrega cada respuesta a su peticion, y varias llamadas concurrentes
+    comparten los shards sin esperar a que termine la anterior.
+    """
+    def __init__(self, num_shards=len(SHARDS)):
+        self.num_shards = num_shards
+        self.conns = []
+        self.send_locks = [threading.Lock() for _ in range(num_shards)]
+        self.recv_locks = [threading.Lock() for _ in range(num_shards)]
+        self.pending = [collections.deque() for _ in range(num_shards)]
+        self.processes = []
+        for _ in range(num_shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_worker, args=(child,), daemon=True)
+            process.start()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def get_shard_id(self, key):
+        return key % self.num_shards
+
+    def _send(self, shard_id, op, payload):
+        future = Future()
+        with self.send_locks[shard_id]:
+            # Encolar junto con el envio: la cola sigue el orden del Pipe
+            self.conns[shard_id].send((op, payload))
+            self.pending[shard_id].append(future)
+        return future
+
+    def _recv(self, shard_id, future):
+        with self.recv_locks[shard_id]:
+            while not future.done():
+                self.pending[shard_id].popleft().set_result(self.conns[shard_id].recv())
+        return future.result()
+
+    def _fan_out(self, op, groups):
+        """Envia un lote a cada shard y despues recoge las respuestas."""
+        futures = {shard_id: self._send(shard_id, op, payload) for shard_id, payload in groups.items()}
+        return {shard_id: self._recv(shard_id, future) for shard_id, future in futures.items()}
+
+    def put(self, key, value):
+        self.multi_put({key: value})
+
+    def get(self, key):
+        return self.multi_get([key])[key]
+
+    def multi_put(self, items):
+        groups = {}
+        for key, value in items.items():
+            groups.setdefault(key % self.num_shards, {})[key] = value
+        return sum(self._fan_out("put", groups).values())
+
+    def multi_get(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(key % self.num_shards, []).append(key)
+        result = {}
+        for shard_id, values in self._fan_out("get", groups).items():
+            result.update(zip(groups[shard_id], values))
+        return result
+
+    def close(self):
+        for shard_id, conn in enumerate(self.conns):
+            with self.send_locks[shard_id]:
+                conn.send(("stop", None))
+        for process in self.processes:
+            process.join()
+
+
+def main():
+    users = {
+        101: "Alice",
+        202: "Bob",
+        303: "Charlie",
+        400: "David",
+        1005: "Eve",
+        1008: "Frank",
+    }
+    for engine in (ShardedKV(), ProcessShardedKV()):
+        print(f"\n--- {type(engine).__name__} con {engine.num_shards} shards ---")
+        engine.multi_put(users)
+        engine.put(110, "Grace")
+        print(f"get(101) -> {engine.get(101)}")
+        print(f"multi_get -> {engine.multi_get([400, 1005, 110, 999])}")
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
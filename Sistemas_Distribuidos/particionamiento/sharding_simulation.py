@@ -1,23 +1,49 @@
+import bisect
+import heapq
 import random
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 # Simulaci�n de las bases de datos (shards)
 SHARDS = {
-    0: {"name": "Shard_Europa", "data": {}},
-    1: {"name": "Shard_America", "data": {}},
-    2: {"name": "Shard_Asia", "data": {}},
-    3: {"name": "Shard_Oceania", "data": {}},
+    0: {"name": "Shard_Europa", "data": {}, "name_index": {}, "sorted_index": []},
+    1: {"name": "Shard_America", "data": {}, "name_index": {}, "sorted_index": []},
+    2: {"name": "Shard_Asia", "data": {}, "name_index": {}, "sorted_index": []},
+    3: {"name": "Shard_Oceania", "data": {}, "name_index": {}, "sorted_index": []},
 }
 NUM_SHARDS = len(SHARDS)
+# Indices secundarios por shard sobre user_name:
+#   name_index:   hash   user_name -> {user_id}
+#   sorted_index: lista ordenada de (user_name, user_id) para consultas por rango
+EXECUTOR = ThreadPoolExecutor(max_workers=NUM_SHARDS)
 
 def get_shard_id(user_id):
     """Calcula el ID del shard usando la operacion modulo."""
     return user_id % NUM_SHARDS
 
+def _unindex_user(shard, user_id, user_name):
+    """Quita un usuario de los indices secundarios del shard."""
+    ids = shard["name_index"][user_name]
+    ids.discard(user_id)
+    if not ids:
+        del shard["name_index"][user_name]
+    pos = bisect.bisect_left(shard["sorted_index"], (user_name, user_id))
+    del shard["sorted_index"][pos]
+
+def _index_user(shard, user_id, user_name):
+    """Mantiene los indices secundarios del shard al escribir un usuario."""
+    old_name = shard["data"].get(user_id)
+    if old_name is not None:
+        _unindex_user(shard, user_id, old_name)
+    shard["name_index"].setdefault(user_name, set()).add(user_id)
+    bisect.insort(shard["sorted_index"], (user_name, user_id))
+
 def write_user_data(user_id, user_name):
     """Simula la escritura de datos del usuario en el shard correspondiente."""
     shard_id = get_shard_id(user_id)
     shard_name = SHARDS[shard_id]["name"]
     
+    _index_user(SHARDS[shard_id], user_id, user_name)
     SHARDS[shard_id]["data"][user_id] = user_name
     print(f"ESCRITO: Usuario {user_id} ({user_name}) -> {shard_name} (Shard {shard_id})")
     
@@ -36,6 +62,35 @@ def read_user_data(user_id):
         print(f"FALLO: Usuario {user_id} no encontrado en {shard_name} (Shard {shard_id})")
         return None
 
+def scatter_gather(shard_query, limit=None, shards=None):
+    """Ejecuta shard_query en todos los shards a la vez y entrega sus resultados
+    (ya ordenados por shard) mezclados en orden global, cortando en limit.
+    shards: otro diccionario con el formato de SHARDS (p.ej. el de ReshardingEngine)."""
+    shards = SHARDS if shards is None else shards
+    futures = [EXECUTOR.submit(shard_query, shard) for shard in shards.values()]
+    merged = heapq.merge(*(future.result() for future in futures))
+    yield from islice(merged, limit)
+
+def find_users_by_name(user_name, shards=None):
+    """Busca por nombre exacto con el indice hash de cada shard (sin recorrer los datos)."""
+    return list(scatter_gather(lambda shard: sorted(shard["name_index"].get(user_name, ())), shards=shards))
+
+def query_users_by_name_range(start, end=None, limit=None, shards=None):
+    """Devuelve (user_name, user_id) con start <= user_name < end en orden global.
+
+    Cada shard corta su rango en limit filas: el resultado global nunca
+    necesita mas de limit filas de un mismo shard.
+    """
+    def shard_range(shard):
+        index = shard["sorted_index"]
+        lo = bisect.bisect_left(index, (start,))
+        hi = bisect.bisect_left(index, (end,)) if end is not None else len(index)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return index[lo:hi]
+
+    return scatter_gather(shard_range, limit, shards)
+
 def display_shards_status():
     """Muestra el estado actual y el tamano de cada shard."""
     print("\n--- Estado Actual de los Shards ---")
@@ -72,5 +127,12 @@ def main():
     # 3. Lectura de un ID que no existe (y verificacion de la ruta)
     read_user_data(110) # 110 % 4 = 2. Buscar en Shard_Asia.
 
+    # 4. Consultas por nombre (scatter-gather sobre los indices secundarios)
+    print("\n--- 4. Consultas por Nombre en Todos los Shards ---")
+    write_user_data(2021, "Alice")  # 2021 % 4 = 1: otra Alice en otro usuario
+    print(f"Usuarios llamados 'Alice': {find_users_by_name('Alice')}")
+    print(f"Nombres en [B, F): {list(query_users_by_name_range('B', 'F'))}")
+    print(f"Primeros 3 por nombre: {list(query_users_by_name_range('', limit=3))}")
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 class TipoIdBase(BaseModel):
     cIdTipoId: str
@@ -11,4 +11,19 @@ class TipoIdCreate(TipoIdBase):
 class TipoIdResponse(TipoIdBase):
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TipoIdPage(BaseModel):
+    items: List[TipoIdResponse]
+    # cIdTipoId desde el que pedir la pagina siguiente (None si no hay mas)
+    next_after: Optional[str] = None
+
+class BulkRowStatus(BaseModel):
+    cIdTipoId: str
+    # creado, actualizado, sin_cambios, duplicado o error
+    status: str
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    totales: Dict[str, int]
+    filas: List[BulkRowStatus]
@@ -0,0 +1,63 @@
+import asyncio
+import sys
+import time
+
+from raft_simplified import State, build_cluster
+
+
+async def measure(num_nodes, steady=2.0):
+    """Latencia de la eleccion inicial y tras caer el lider, y CPU en reposo con el cluster vivo."""
+    loop = asyncio.get_running_loop()
+    # Una ronda de RequestVote cuesta O(n) en este unico proceso: con la ventana fija de
+    # 150-300 ms, a 500 nodos casi todos expiran antes de procesarla y las elecciones se encadenan
+    election_timeout = (0.15, max(0.3, 0.002 * num_nodes))
+    nodes, transport, wheel = build_cluster(num_nodes, loop, verbose=False, election_timeout=election_timeout)
+    elected = asyncio.Event()
+
+    def on_leader_elected(node, latency):
+        elected.set()
+
+    for node in nodes:
+        node.on_leader_elected = on_leader_elected
+
+    start = loop.time()
+    for node in nodes:
+        node.start()
+    await elected.wait()
+    initial = loop.time() - start
+
+    # Reposo: sin peticiones de clientes, el lider envia heartbeats y cada seguidor
+    # mantiene armado su temporizador de eleccion (es el coste que la rueda abarata)
+    await asyncio.sleep(0.5)
+    messages = transport.messages
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(steady)
+    idle_ratio = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    msg_rate = (transport.messages - messages) / steady
+    timers = wheel.count
+
+    leader = next(node for node in nodes if node.state == State.LEADER)
+    elected.clear()
+    crash = loop.time()
+    leader.fail()
+    await elected.wait()
+    failover = loop.time() - crash
+
+    for node in nodes:
+        if node.active:
+            node.fail()
+    return initial, failover, idle_ratio, msg_rate, timers
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5, 50, 500]
+    print(f"{'nodos':>6}{'eleccion (ms)':>15}{'failover (ms)':>15}{'CPU reposo':>12}{'msgs/s':>10}"
+          f"{'temporizadores':>16}")
+    for n in sizes:
+        initial, failover, idle_ratio, msg_rate, timers = asyncio.run(measure(n))
+        print(f"{n:>6}{initial * 1000:>15.0f}{failover * 1000:>15.0f}{idle_ratio:>12.1%}"
+              f"{msg_rate:>10,.0f}{timers:>16,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import statistics
+import sys
+import time
+
+from raft_simplified import State, build_cluster
+
+
+async def measure(num_nodes, max_batch, max_inflight=8, clients=512, duration=1.0):
+    """Comandos confirmados por segundo y latencia de commit con clientes en bucle cerrado."""
+    loop = asyncio.get_running_loop()
+    nodes, transport, _ = build_cluster(num_nodes, loop, verbose=False,
+                                        max_batch=max_batch, max_inflight=max_inflight)
+    for node in nodes:
+        node.start()
+    while not any(node.state == State.LEADER for node in nodes):
+        await asyncio.sleep(0.01)
+    leader = next(node for node in nodes if node.state == State.LEADER)
+
+    latencies = []
+    deadline = loop.time() + duration
+
+    async def client(client_id):
+        count = 0
+        while loop.time() < deadline:
+            start = time.perf_counter()
+            await leader.submit((client_id, count))
+            latencies.append(time.perf_counter() - start)
+            count += 1
+
+    messages = transport.messages
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    for node in nodes:
+        node.fail()
+    latencies.sort()
+    return (len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)],
+            (transport.messages - messages) / len(latencies))
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [3, 5, 9]
+    print(f"{'nodos':>6}{'lote max':>10}{'en vuelo':>10}{'cmds/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'msgs/cmd':>10}")
+    for n in sizes:
+        for max_batch, max_inflight in ((1, 1), (1, 8), (16, 8), (256, 1), (256, 8)):
+            rate, p50, p99, per_command = asyncio.run(measure(n, max_batch, max_inflight))
+            print(f"{n:>6}{max_batch:>10}{max_inflight:>10}{rate:>10,.0f}{p50 * 1000:>10.1f}"
+                  f"{p99 * 1000:>10.1f}{per_command:>10.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+
+from raft_simplified import State, build_cluster
+
+
+async def measure(num_nodes, mode, data_dir, clients=256, duration=1.0, keys=1000):
+    """Lecturas por segundo y latencia de un modo de lectura linealizable con clientes en bucle cerrado.
+
+    Los nodos persisten en un WAL con fsync, asi que las lecturas por el log pagan tambien el disco.
+    """
+    loop = asyncio.get_running_loop()
+    nodes, transport, _ = build_cluster(num_nodes, loop, verbose=False, lease_duration=0.15, data_dir=data_dir)
+    for node in nodes:
+        node.start()
+    while not any(node.state == State.LEADER for node in nodes):
+        await asyncio.sleep(0.01)
+    leader = next(node for node in nodes if node.state == State.LEADER)
+    await asyncio.gather(*(leader.submit((key, key)) for key in range(keys)))
+    await asyncio.sleep(0.2)  # Al menos un heartbeat confirmado: el lease ya es valido
+
+    latencies = []
+    deadline = loop.time() + duration
+
+    async def client(client_id):
+        key = client_id
+        while loop.time() < deadline:
+            start = time.perf_counter()
+            value = await leader.read(key % keys, mode)
+            latencies.append(time.perf_counter() - start)
+            assert value == key % keys
+            key += clients
+
+    messages, log_size, syncs = transport.messages, leader.last_index, leader.storage.syncs
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    for node in nodes:
+        node.fail()
+    latencies.sort()
+    reads = len(latencies)
+    return (reads / elapsed, statistics.median(latencies), latencies[int(reads * 0.99)],
+            (transport.messages - messages) / reads, (leader.last_index - log_size) / reads,
+            (leader.storage.syncs - syncs) / elapsed)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [3, 5]
+    print(f"{'nodos':>6}{'modo':>12}{'lecturas/s':>12}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'msgs/lectura':>14}{'entradas/lectura':>18}{'fsync/s lider':>15}")
+    for n in sizes:
+        for mode in ("log", "read_index", "lease"):
+            with tempfile.TemporaryDirectory() as data_dir:
+                rate, p50, p99, per_read, entries, syncs = asyncio.run(measure(n, mode, data_dir))
+            print(f"{n:>6}{mode:>12}{rate:>12,.0f}{p50 * 1000:>10.2f}{p99 * 1000:>10.2f}"
+                  f"{per_read:>14.3f}{entries:>18.2f}{syncs:>15,.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
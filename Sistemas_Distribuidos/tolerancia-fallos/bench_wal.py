@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+
+from wal import WriteAheadLog
+
+
+def write_throughput(directory, group_size, duration=1.0, fsync=True):
+    """Entradas por segundo escribiendo lotes de group_size entradas con un fsync por lote."""
+    wal = WriteAheadLog(directory, fsync=fsync)
+    wal.load()
+    index = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for _ in range(group_size):
+            index += 1
+            wal.append(index, 1, (f"user:{index}", "x" * 64))
+        wal.sync()
+    elapsed = time.perf_counter() - start
+    wal.close()
+    return index / elapsed, wal.syncs / elapsed
+
+
+def recovery_time(directory, num_entries, snapshot_at=None):
+    """Escribe num_entries entradas (con snapshot opcional) y mide cuanto tarda load()."""
+    wal = WriteAheadLog(directory, fsync=False)
+    wal.load()
+    wal.save_state(1, 0)
+    for index in range(1, num_entries + 1):
+        wal.append(index, 1, (f"user:{index}", "x" * 64))
+        if index % 1000 == 0:
+            wal.sync()
+    wal.sync()
+    if snapshot_at is not None:
+        wal.save_snapshot(snapshot_at, 1, {f"user:{i}": "x" * 64 for i in range(0, snapshot_at, 100)})
+    wal.close()
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    start = time.perf_counter()
+    _, _, snapshot, entries = WriteAheadLog(directory).load()
+    elapsed = time.perf_counter() - start
+    return elapsed, size, snapshot[0], len(entries)
+
+
+def main():
+    print("--- Escritura limitada por fsync (group commit) ---")
+    print(f"{'entradas/fsync':>15}{'entradas/s':>12}{'fsync/s':>10}")
+    for group_size in (1, 8, 64, 512, 4096):
+        with tempfile.TemporaryDirectory() as directory:
+            rate, syncs = write_throughput(directory, group_size)
+        print(f"{group_size:>15}{rate:>12,.0f}{syncs:>10,.0f}")
+    with tempfile.TemporaryDirectory() as directory:
+        rate, _ = write_throughput(directory, 512, fsync=False)
+    print(f"{'512 sin fsync':>15}{rate:>12,.0f}")
+
+    print("\n--- Recuperacion (segmentos de 4 MiB leidos con mmap) ---")
+    print(f"{'entradas':>10}{'snapshot':>10}{'disco (MiB)':>13}{'en log':>10}{'tiempo (ms)':>13}")
+    for num_entries in (100_000, 1_000_000):
+        for snapshot_at in (None, num_entries - 1000):
+            with tempfile.TemporaryDirectory() as directory:
+                elapsed, size, snapshot_index, replayed = recovery_time(directory, num_entries, snapshot_at)
+            print(f"{num_entries:>10,}{snapshot_index:>10,}{size / 2 ** 20:>13.1f}{replayed:>10,}{elapsed * 1000:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import math
+import random
+import threading
+import time
+from collections import deque
+
+
+class PhiAccrualFailureDetector:
+    """Detector de fallos phi-accrual (Hayashibara et al.), como el de Akka y Cassandra.
+
+    En lugar de un timeout fijo entrega un nivel de sospecha continuo:
+    phi = -log10(P(el siguiente heartbeat llegue aun mas tarde)), estimado con
+    la media y desviacion de los ultimos intervalos entre heartbeats.
+    phi = 1 equivale a ~10% de error, phi = 3 a ~0.1%, phi = 8 a ~1e-8.
+    """
+    def __init__(self, threshold=8.0, window=100, min_std=0.01,
+                 acceptable_pause=0.0, first_heartbeat_estimate=0.1, now=None):
+        self.threshold = threshold
+        self.min_std = min_std
+        self.acceptable_pause = acceptable_pause
+        self.intervals = deque(maxlen=window)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        # Historia inicial: sin ella phi no creceria si el nodo cae antes del primer heartbeat
+        estimate = first_heartbeat_estimate
+        self._add_interval(estimate - estimate / 4)
+        self._add_interval(estimate + estimate / 4)
+        self.last_heartbeat = time.monotonic() if now is None else now
+
+    def _add_interval(self, interval):
+        if len(self.intervals) == self.intervals.maxlen:
+            old = self.intervals[0]
+            self._sum -= old
+            self._sum_sq -= old * old
+        self.intervals.append(interval)
+        self._sum += interval
+        self._sum_sq += interval * interval
+
+    def heartbeat(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._add_interval(now - self.last_heartbeat)
+        self.last_heartbeat = now
+
+    def reset(self, now=None):
+        """Reinicia el reloj del ultimo heartbeat (p.ej. al cambiar de lider) sin perder la historia."""
+        self.last_heartbeat = time.monotonic() if now is None else now
+
+    def phi(self, now=None):
+        now = time.monotonic() if now is None else now
+        n = len(self.intervals)
+        mean = self._sum / n + self.acceptable_pause
+        std = max(math.sqrt(max(self._sum_sq / n - (self._sum / n) ** 2, 0.0)), self.min_std)
+        y = (now - self.last_heartbeat - mean) / std
+        # Aproximacion logistica de la CDF normal usada por Akka:
+        # phi = -log10(e / (1 + e)) con e = exp(-z), reescrita como log10(1 + exp(z))
+        # para no desbordar cuando el nodo lleva mucho tiempo en silencio
+        z = y * (1.5976 + 0.070566 * y * y)
+        if z > 30:
+            return z / math.log(10) + math.log10(1.0 + math.exp(-z))
+        return math.log10(1.0 + math.exp(z))
+
+    def is_available(self, now=None):
+        return self.phi(now) < self.threshold
+
+    def time_to_suspect(self, now=None):
+        """Segundos que faltan para que phi alcance el umbral si no llegan mas heartbeats.
+
+        Invierte phi en forma cerrada (la cubica en y tiene una sola raiz real),
+        lo que permite programar un temporizador en lugar de consultar phi periodicamente.
+        """
+        now = time.monotonic() if now is None else now
+        n = len(self.intervals)
+        mean = self._sum / n + self.acceptable_pause
+        std = max(math.sqrt(max(self._sum_sq / n - (self._sum / n) ** 2, 0.0)), self.min_std)
+        # log10(1 + exp(z)) = threshold  =>  z = ln(10^threshold - 1)
+        z = self.threshold * math.log(10) + math.log1p(-10.0 ** -self.threshold)
+        # y * (1.5976 + 0.070566 * y^2) = z, resuelta con Cardano
+        p, q = 1.5976 / 0.070566, -z / 0.070566
+        root = math.sqrt(q * q / 4 + p ** 3 / 27)
+        y = math.copysign(abs(-q / 2 + root) ** (1 / 3), -q / 2 + root) + \
+            math.copysign(abs(-q / 2 - root) ** (1 / 3), -q / 2 - root)
+        return max(0.0, self.last_heartbeat + mean + y * std - now)
+
+
+class HeartbeatMonitor:
+    """Hilo que evalua phi periodicamente y llama a on_suspect una vez por episodio de sospecha."""
+    def __init__(self, detector, on_suspect, check_interval=0.02):
+        self.detector = detector
+        self.on_suspect = on_suspect
+        self.check_interval = check_interval
+        self.suspected = False
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def heartbeat(self):
+        with self.lock:
+            self.detector.heartbeat()
+            self.suspected = False
+
+    def reset(self):
+        with self.lock:
+            self.detector.reset()
+            self.suspected = False
+
+    def _run(self):
+        while not self.stopped.wait(self.check_interval):
+            with self.lock:
+                phi = self.detector.phi()
+                fire = not self.suspected and phi >= self.detector.threshold
+                if fire:
+                    self.suspected = True
+            if fire:
+                self.on_suspect(phi)
+
+
+def simulate(detector_factory, interval, jitter, num_heartbeats=5000, seed=0):
+    """Simula heartbeats con jitter gaussiano (reloj simulado) y mide el detector.
+
+    Devuelve (tasa de falsos positivos, tiempo de deteccion en s). Un falso
+    positivo es un intervalo en el que phi supero el umbral antes de que
+    llegara el heartbeat (phi crece con el tiempo, basta mirar justo antes).
+    El tiempo de deteccion se mide desde el ultimo heartbeat antes de la caida.
+    """
+    rng = random.Random(seed)
+    now = 0.0
+    detector = detector_factory(now)
+    false_positives = 0
+    for _ in range(num_heartbeats):
+        now += max(0.0, rng.gauss(interval, jitter))
+        if not detector.is_available(now - 1e-9):
+            false_positives += 1
+        detector.heartbeat(now)
+
+    crash = now
+    step = interval / 100
+    while detector.is_available(now):
+        now += step
+    return false_positives / num_heartbeats, now - crash
+
+
+class FixedTimeoutDetector:
+    """Referencia: timeout fijo desde el ultimo heartbeat (lo que hace raft_simplified)."""
+    def __init__(self, timeout, now=0.0):
+        self.timeout = timeout
+        self.last_heartbeat = now
+
+    def heartbeat(self, now):
+        self.last_heartbeat = now
+
+    def is_available(self, now):
+        return now - self.last_heartbeat < self.timeout
+
+
+def main():
+    interval = 0.1
+    print(f"Heartbeats cada {interval * 1000:.0f} ms con jitter gaussiano (reloj simulado)\n")
+    print(f"{'detector':<22}{'jitter':>8}{'falsos positivos':>18}{'deteccion (ms)':>16}")
+    for jitter in (0.005, 0.02, 0.05):
+        for threshold in (1.0, 3.0, 8.0, 12.0):
+            fp, detect = simulate(
+                lambda now: PhiAccrualFailureDetector(threshold, first_heartbeat_estimate=interval, now=now),
+                interval, jitter,
+            )
+            print(f"{f'phi >= {threshold:g}':<22}{jitter * 1000:>6.0f}ms{fp:>18.2%}{detect * 1000:>16.0f}")
+        for timeout in (0.15, 0.3):
+            fp, detect = simulate(lambda now: FixedTimeoutDetector(timeout, now), interval, jitter)
+            print(f"{f'timeout {timeout * 1000:.0f} ms':<22}{jitter * 1000:>6.0f}ms{fp:>18.2%}{detect * 1000:>16.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import collections
+import sys
+import threading
+import time
+
+from raft_simplified import LocalTransport, RaftNode, State
+from timer_wheel import TimerWheel
+
+
+class GroupTransport:
+    """Transporte que ve un RaftNode: envia a traves de su host etiquetando el grupo."""
+    def __init__(self, host, group_id):
+        self.host = host
+        self.group_id = group_id
+
+    def register(self, node):
+        self.host.groups[self.group_id] = node
+
+    def send(self, src, dst, handler, message, on_reply=None):
+        self.host.send(self.group_id, dst, handler, message, on_reply)
+
+
+class MultiRaftHost:
+    """Un proceso que aloja un RaftNode por grupo (p.ej. uno por shard) sobre un solo event loop.
+
+    Todos los grupos comparten la rueda de temporizadores y el transporte del
+    host. Los mensajes de cualquier grupo hacia el mismo host que se generan en
+    una vuelta del loop viajan juntos en un solo sobre, y las respuestas vuelven
+    en otro: con una rueda de tick grueso, los heartbeats de todos los grupos que
+    vencen en el mismo tick quedan agrupados en un mensaje por par de hosts.
+    Asi el trafico agrupado queda acotado por 2 sobres (ida y vuelta) por par
+    ordenado de hosts y tick, sea cual sea el numero de grupos; con pocos grupos
+    apenas coinciden heartbeats en un tick y agrupar no ahorra mensajes.
+    """
+    def __init__(self, host_id, transport, wheel, coalesce=True):
+        self.id = host_id
+        self.transport = transport
+        self.wheel = wheel
+        self.coalesce = coalesce
+        self.active = True
+        self.groups = {}
+        self.outbox = collections.defaultdict(list)  # Host destino -> [(grupo, manejador, mensaje, on_reply)]
+        self.flush_scheduled = False
+        transport.register(self)
+
+    def add_group(self, group_id, host_ids, **options):
+        node = RaftNode(self.id, host_ids, GroupTransport(self, group_id), self.wheel, **options)
+        node.group_id = group_id
+        return node
+
+    def send(self, group_id, dst, handler, message, on_reply):
+        self.outbox[dst].append((group_id, handler, message, on_reply))
+        if not self.coalesce:
+            self.flush()
+        elif not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.wheel.loop.call_soon(self.flush)
+
+    def flush(self):
+        self.flush_scheduled = False
+        outbox, self.outbox = self.outbox, collections.defaultdict(list)
+        for dst, batch in outbox.items():
+            callbacks = [on_reply for _, _, _, on_reply in batch]
+            self.transport.send(
+                self.id, dst, "receive_batch", [item[:3] for item in batch],
+                lambda replies, callbacks=callbacks: self.receive_replies(callbacks, replies),
+            )
+
+    def receive_batch(self, batch):
+        """Entrega cada mensaje a su grupo y devuelve todas las respuestas en un solo sobre."""
+        replies = []
+        for group_id, handler, message in batch:
+            node = self.groups.get(group_id)
+            replies.append(getattr(node, handler)(message) if node is not None and node.active else None)
+        return replies
+
+    def receive_replies(self, callbacks, replies):
+        for on_reply, reply in zip(callbacks, replies):
+            if on_reply is not None and reply is not None:
+                on_reply(reply)
+
+    def start(self):
+        for node in self.groups.values():
+            node.start()
+
+    def fail(self):
+        self.active = False
+        for node in self.groups.values():
+            node.fail()
+
+
+def build_hosts(num_hosts, num_groups, loop, coalesce=True, tick=0.02, latency=(0.001, 0.003), **options):
+    """Crea num_hosts hosts con un miembro de cada uno de los num_groups grupos en cada host."""
+    transport = LocalTransport(loop, latency)
+    wheel = TimerWheel(loop, tick=tick)
+    host_ids = list(range(num_hosts))
+    hosts = [MultiRaftHost(i, transport, wheel, coalesce) for i in host_ids]
+    for group_id in range(num_groups):
+        for host in hosts:
+            host.add_group(group_id, host_ids, verbose=False, phi_threshold=8.0, **options)
+    return hosts, transport
+
+
+def leaders_by_group(hosts):
+    leaders = {}
+    for host in hosts:
+        for group_id, node in host.groups.items():
+            if node.active and node.state == State.LEADER:
+                leaders[group_id] = host.id
+    return leaders
+
+
+async def measure(num_groups, num_hosts=3, coalesce=True, steady=2.0, tick=0.02):
+    loop = asyncio.get_running_loop()
+    hosts, transport = build_hosts(num_hosts, num_groups, loop, coalesce, tick)
+    start = loop.time()
+    for host in hosts:
+        host.start()
+    while len(leaders_by_group(hosts)) < num_groups:
+        await asyncio.sleep(0.01)
+    elected = loop.time() - start
+
+    # Una escritura por grupo para comprobar que todos replican
+    leaders = leaders_by_group(hosts)
+    await asyncio.gather(*(hosts[leaders[g]].groups[g].submit(("k", g)) for g in range(num_groups)))
+
+    await asyncio.sleep(0.5)
+    messages = transport.messages
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(steady)
+    cpu_ratio = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    msg_rate = (transport.messages - messages) / steady
+    threads = threading.active_count()
+    per_host = collections.Counter(leaders.values())
+    for host in hosts:
+        host.fail()
+    return elected, threads, cpu_ratio, msg_rate, [per_host[h.id] for h in hosts]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 500, 1000]
+    num_hosts, tick = 3, 0.02
+    ceiling = 2 * num_hosts * (num_hosts - 1) / tick
+    print(f"Multi-Raft: {num_hosts} hosts en un solo event loop, un miembro de cada grupo por host")
+    print(f"Tope de msgs/s agrupados: 2 sobres x {num_hosts * (num_hosts - 1)} pares x {1 / tick:.0f} ticks/s "
+          f"= {ceiling:,.0f}\n")
+    print(f"{'grupos':>7}{'agrupado':>10}{'eleccion (ms)':>15}{'hilos':>7}{'hilos antes':>13}"
+          f"{'CPU':>8}{'CPU/grupo (us/s)':>18}{'msgs/s':>9}{'lideres por host':>19}")
+    for n in sizes:
+        for coalesce in (False, True):
+            elected, threads, cpu_ratio, msg_rate, leaders = asyncio.run(measure(n, num_hosts, coalesce, tick=tick))
+            # Antes: un hilo por RaftNode y otro de heartbeats por cada lider
+            threads_before = num_hosts * n + n + 1
+            print(f"{n:>7}{'si' if coalesce else 'no':>10}{elected * 1000:>15.0f}{threads:>7}{threads_before:>13,}"
+                  f"{cpu_ratio:>8.1%}{cpu_ratio / n * 1e6:>18.0f}{msg_rate:>9,.0f}{str(leaders):>19}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,143 +1,711 @@
-import threading
-import time
+import asyncio
+import heapq
+import itertools
+import os
 import random
+import tempfile
+from collections import deque
 from enum import Enum
 
+from failure_detector import PhiAccrualFailureDetector
+from timer_wheel import TimerWheel
+from wal import WriteAheadLog
+
+MAX_CLOCK_DRIFT = 0.05  # Deriva maxima supuesta entre relojes para acortar el lease
+
 # Estados de un nodo Raft
 class State(Enum):
     FOLLOWER = 1
     CANDIDATE = 2
     LEADER = 3
 
+class LocalTransport:
+    """Red simulada dentro de un event loop: cada mensaje se entrega con call_at.
+
+    send() no bloquea: el manejador del destino se ejecuta tras la latencia y su
+    respuesta vuelve al remitente por on_reply tras otra latencia. Cada enlace
+    entrega en orden, como una conexion TCP, para que el pipelining no reordene
+    los AppendEntries. Un nodo inactivo no recibe ni responde, igual que un proceso caido.
+    """
+    def __init__(self, loop, latency=(0.001, 0.003)):
+        self.loop = loop
+        self.latency = latency
+        self.nodes = {}
+        self.messages = 0
+        self.link_clock = {}  # (origen, destino) -> instante de la ultima entrega
+
+    def register(self, node):
+        self.nodes[node.id] = node
+
+    def _delivery_time(self, src, dst):
+        # Estrictamente creciente: el heap del loop no conserva el orden de instantes iguales
+        when = max(self.loop.time() + random.uniform(*self.latency), self.link_clock.get((src, dst), 0.0) + 1e-6)
+        self.link_clock[(src, dst)] = when
+        return when
+
+    def send(self, src, dst, handler, message, on_reply=None):
+        self.messages += 1
+        self.loop.call_at(self._delivery_time(src, dst), self._deliver, src, dst, handler, message, on_reply)
+
+    def _deliver(self, src, dst, handler, message, on_reply):
+        node = self.nodes.get(dst)
+        if node is None or not node.active:
+            return
+        reply = getattr(node, handler)(message)
+        if on_reply is not None and reply is not None:
+            self.messages += 1
+            self.loop.call_at(self._delivery_time(dst, src), self._reply, src, on_reply, reply)
+
+    def _reply(self, src, on_reply, reply):
+        node = self.nodes.get(src)
+        if node is not None and node.active:
+            on_reply(reply)
+
 class RaftNode:
-    def __init__(self, node_id, all_nodes):
+    """Nodo Raft dirigido por eventos: sin hilos ni sondeo.
+
+    Los plazos de eleccion y de heartbeat son temporizadores de una TimerWheel
+    compartida; los RequestVote y AppendEntries salen a todos los pares a la vez
+    por el transporte y sus respuestas llegan como callbacks. Sin mensajes ni
+    plazos vencidos el nodo no ejecuta nada.
+
+    Con storage (un WriteAheadLog) term, voted_for y las entradas sobreviven a
+    un reinicio: se persisten antes de responder, con un fsync por lote. Con
+    snapshot_interval el estado se guarda como snapshot cada tantas entradas
+    aplicadas y el log anterior se descarta.
+
+    El log replicado agrupa hasta max_batch comandos por AppendEntries y mantiene
+    hasta max_inflight lotes en vuelo por seguidor (pipelining): next_index avanza
+    al enviar, match_index al confirmar, y el commit avanza por mayoria.
+
+    Las lecturas linealizables no necesitan pasar por el log: con ReadIndex el
+    lider fija commit_index y confirma que sigue siendo lider con una ronda de
+    AppendEntries (compartida por todas las lecturas que llegan mientras tanto).
+    Con lease_duration, cada ronda confirmada le da un lease durante el que lee
+    localmente; a cambio los seguidores no votan durante lease_duration desde el
+    ultimo contacto con el lider.
+    """
+    def __init__(self, node_id, peers, transport, wheel, heartbeat_interval=0.1,
+                 phi_threshold=None, verbose=True, max_batch=256, max_inflight=8,
+                 storage=None, snapshot_interval=None, lease_duration=None, election_timeout=(0.15, 0.3)):
         self.id = node_id
         self.state = State.FOLLOWER
-        self.all_nodes = all_nodes
+        self.peers = [peer for peer in peers if peer != node_id]
+        self.transport = transport
+        self.wheel = wheel
         self.term = 0
         self.leader_id = None
         self.voted_for = None
-        self.votes = 0
-        self.timeout_lock = threading.Lock()
+        self.votes = set()
+        self.active = True
+        self.verbose = verbose
+        self.heartbeat_interval = heartbeat_interval
+        # Ventana aleatoria del plazo de eleccion: debe superar con holgura lo que tarda
+        # una ronda de RequestVote, que en la simulacion crece con el numero de nodos
+        self.election_timeout = election_timeout
+        # Con phi_threshold, el plazo tras cada heartbeat lo fija el detector phi-accrual
+        self.detector = None
+        if phi_threshold is not None:
+            self.detector = PhiAccrualFailureDetector(
+                phi_threshold, first_heartbeat_estimate=heartbeat_interval, now=wheel.loop.time()
+            )
+        self.election_timer = None
+        self.heartbeat_timer = None
+        self.election_started_at = None
+
+        # Log replicado: entries[i - log_start - 1] = (termino, comando); las entradas
+        # hasta log_start (inclusive) estan compactadas en el snapshot
+        self.entries = []
+        self.log_start = 0
+        self.log_start_term = 0
+        self.snapshot = (0, 0, {})
+        self.commit_index = 0
+        self.last_applied = 0
+        self.state_machine = {}
+        self.storage = storage
+        self.snapshot_interval = snapshot_interval
+        if storage is not None:
+            # Recuperacion tras un reinicio: lo confirmado esta en el snapshot o en el log
+            self.term, self.voted_for, self.snapshot, self.entries = storage.load()
+            self.log_start, self.log_start_term, state = self.snapshot
+            self.state_machine = dict(state)
+            self.commit_index = self.last_applied = self.log_start
+        self.durable_index = self.last_index  # Ultima entrada ya escrita con fsync
+
+        # Lecturas: cada ronda de AppendEntries lleva un numero que los seguidores devuelven
+        self.lease_duration = lease_duration
+        self.lease_expiry = 0.0
+        self.last_leader_contact = None
+        self.term_start = 0          # Indice de la entrada vacia con la que empezo el liderazgo
+        self.read_round = 0
+        self.confirmed_round = 0
+        self.acked_round = {}
+        self.round_sent = {}         # Ronda -> instante de envio, hasta confirmarla
+        self.round_scheduled = False
+        self.reads_awaiting_round = deque()   # (ronda, read_index, clave, futuro), rondas crecientes
+        self.reads_awaiting_apply = []   # Heap de (read_index, secuencia, clave, futuro)
+        self.read_sequence = itertools.count()
+        self.max_batch = max_batch
+        self.max_inflight = max_inflight
+        # Estado del lider por seguidor
+        self.next_index = {}
+        self.match_index = {}
+        self.inflight = {}
+        self.last_reply = {}
+        self.waiting = {}          # Indice -> futuro del cliente que espera su commit
+        self.flush_scheduled = False
+        self.on_leader_elected = None  # Callback opcional (nodo, latencia) para mediciones
+        transport.register(self)
+
+    def log(self, text):
+        if self.verbose:
+            print(text)
+
+    @property
+    def majority(self):
+        return (len(self.peers) + 1) // 2 + 1
+
+    @property
+    def last_index(self):
+        return self.log_start + len(self.entries)
+
+    def term_at(self, index):
+        if index == self.log_start:
+            return self.log_start_term
+        return self.entries[index - self.log_start - 1][0]
+
+    def persist_state(self):
+        """Term y voto deben estar en disco antes de responder o pedir votos."""
+        if self.storage is not None:
+            self.storage.save_state(self.term, self.voted_for)
+            self.storage.sync()
+
+    def append_entry(self, command):
+        self.entries.append((self.term, command))
+        if self.storage is None:
+            self.durable_index = self.last_index
+        else:
+            self.storage.append(self.last_index, self.term, command)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.wheel.loop.call_soon(self.flush)
+
+    def start(self):
         self.reset_election_timeout()
-        self.thread = threading.Thread(target=self.run_node)
-    
-    def reset_election_timeout(self):
-        # Timeout de eleccion entre 150ms y 300ms
-        self.election_timeout = time.time() + random.uniform(0.15, 0.3) 
 
-    def run_node(self):
-        while True:
-            time.sleep(0.05) # Intervalo de chequeo
-            
-            with self.timeout_lock:
-                if time.time() > self.election_timeout:
-                    if self.state == State.FOLLOWER:
-                        self.start_election()
-                    elif self.state == State.CANDIDATE:
-                        # Si el timeout expira de nuevo, iniciar otra eleccion
-                        print(f"P{self.id}: El tiempo de espera del CANDIDATE expiro. Reiniciando eleccion.")
-                        self.start_election()
-                    
+    def reset_election_timeout(self, suspicion=False):
+        if self.election_timer is not None:
+            self.election_timer.cancel()
+        low, high = self.election_timeout
+        if suspicion and self.detector is not None:
+            # Plazo adaptativo: cuando phi alcanzaria el umbral, mas el ancho de la ventana para desempatar
+            delay = self.detector.time_to_suspect(self.wheel.loop.time()) + random.uniform(0, high - low)
+        else:
+            # Timeout de eleccion entre low y high (150ms y 300ms por defecto)
+            delay = random.uniform(low, high)
+        self.election_timer = self.wheel.schedule(delay, self.on_election_timeout)
+
+    def on_election_timeout(self):
+        self.election_timer = None
+        if not self.active or self.state == State.LEADER:
+            return
+        if self.state == State.CANDIDATE:
+            # Si el timeout expira de nuevo, iniciar otra eleccion
+            self.log(f"P{self.id}: El tiempo de espera del CANDIDATE expiro. Reiniciando eleccion.")
+        elif self.leader_id is not None:
+            self.log(f"P{self.id}: Lider P{self.leader_id} sospechoso. Inicia eleccion.")
+        self.start_election()
+
     def start_election(self):
         self.state = State.CANDIDATE
         self.term += 1
         self.voted_for = self.id
-        self.votes = 1
+        self.votes = {self.id}
+        self.leader_id = None
+        if self.election_started_at is None:
+            self.election_started_at = self.wheel.loop.time()
+        self.persist_state()
         self.reset_election_timeout()
-        
-        print(f"\n---> P{self.id} (CANDIDATE) inicia eleccion para ToRMINO {self.term} <---")
-        
-        # Simular envoo de RequestVote a todos los demos
-        for node in self.all_nodes:
-            if node.id != self.id:
-                if node.receive_request_vote(self.id, self.term):
-                    self.votes += 1
-        
-        # Comprobar si gano
-        majority = len(self.all_nodes) // 2 + 1
-        if self.votes >= majority:
+
+        self.log(f"\n---> P{self.id} (CANDIDATE) inicia eleccion para TERMINO {self.term} <---")
+
+        # RequestVote a todos los pares en paralelo; los votos llegan en on_vote_reply
+        request = {"term": self.term, "candidate_id": self.id,
+                   "last_log_index": self.last_index, "last_log_term": self.term_at(self.last_index)}
+        for peer in self.peers:
+            self.transport.send(self.id, peer, "receive_request_vote", request, self.on_vote_reply)
+        if len(self.votes) >= self.majority:
             self.become_leader()
-        else:
-            print(f"P{self.id}: No obtuvo mayoroa ({self.votes} de {majority}). Vuelve a FOLLOWER.")
-            self.state = State.FOLLOWER
-
-
-    def receive_request_vote(self, candidate_id, candidate_term):
-        with self.timeout_lock:
-            # 1. Si el tormino del candidato es mayor, actualizar el tormino
-            if candidate_term > self.term:
-                self.term = candidate_term
-                self.state = State.FOLLOWER
-                self.voted_for = None
-            
-            # 2. Votar si el tormino es igual y aon no ha votado en este tormino
-            if candidate_term == self.term and self.voted_for is None:
-                self.voted_for = candidate_id
-                self.reset_election_timeout()
-                print(f"P{self.id} (FOLLOWER): Vota por P{candidate_id} en T{candidate_term}")
-                return True
-            else:
-                return False
+
+    def receive_request_vote(self, request):
+        candidate_id, candidate_term = request["candidate_id"], request["term"]
+        if self.lease_duration and self.leader_id not in (None, self.id, candidate_id) and \
+                self.wheel.loop.time() - self.last_leader_contact < self.lease_duration:
+            # El lider actual puede seguir sirviendo lecturas con su lease: no votar ni cambiar de termino
+            return {"term": self.term, "vote_granted": False, "voter": self.id}
+        # 1. Si el termino del candidato es mayor, actualizar el termino
+        if candidate_term > self.term:
+            self.step_down(candidate_term)
+
+        # 2. Votar si el termino es igual, aun no ha votado en este termino
+        #    y el log del candidato esta al menos tan actualizado como el propio
+        up_to_date = (request["last_log_term"], request["last_log_index"]) >= \
+            (self.term_at(self.last_index), self.last_index)
+        granted = candidate_term == self.term and self.voted_for in (None, candidate_id) and up_to_date
+        if granted:
+            self.voted_for = candidate_id
+            self.persist_state()
+            self.reset_election_timeout()
+            self.log(f"P{self.id} (FOLLOWER): Vota por P{candidate_id} en T{candidate_term}")
+        return {"term": self.term, "vote_granted": granted, "voter": self.id}
+
+    def on_vote_reply(self, reply):
+        if reply["term"] > self.term:
+            self.step_down(reply["term"])
+            return
+        if self.state != State.CANDIDATE or reply["term"] != self.term or not reply["vote_granted"]:
+            return
+        self.votes.add(reply["voter"])
+        if len(self.votes) >= self.majority:
+            self.become_leader()
+
+    def step_down(self, term):
+        if term > self.term:
+            self.term = term
+            self.voted_for = None  # El voto solo se reinicia al cambiar de termino
+            self.persist_state()
+        self.state = State.FOLLOWER
+        if self.heartbeat_timer is not None:
+            self.heartbeat_timer.cancel()
+            self.heartbeat_timer = None
+        self.fail_waiting()
+
+    def fail_waiting(self):
+        """Un lider depuesto no sabe si sus comandos pendientes llegaran a confirmarse."""
+        pending_reads = [read[3] for read in itertools.chain(self.reads_awaiting_round, self.reads_awaiting_apply)]
+        for future in list(self.waiting.values()) + pending_reads:
+            if not future.done():
+                future.set_exception(RuntimeError(f"P{self.id} dejo de ser lider"))
+        self.waiting.clear()
+        self.reads_awaiting_round.clear()
+        self.reads_awaiting_apply.clear()
+        self.lease_expiry = 0.0
 
     def become_leader(self):
         self.state = State.LEADER
         self.leader_id = self.id
-        print(f"\n!!! P{self.id} GANo y es el LoDER para ToRMINO {self.term} !!!")
-        
-        # Simular envoo de Heartbeats para mantener el liderazgo
-        threading.Thread(target=self.send_heartbeats).start()
+        if self.election_timer is not None:
+            self.election_timer.cancel()
+            self.election_timer = None
+        self.log(f"\n!!! P{self.id} GANO y es el LIDER para TERMINO {self.term} !!!")
+        if self.on_leader_elected is not None:
+            self.on_leader_elected(self, self.wheel.loop.time() - self.election_started_at)
+        self.election_started_at = None
+
+        now = self.wheel.loop.time()
+        for peer in self.peers:
+            self.next_index[peer] = self.last_index + 1
+            self.match_index[peer] = 0
+            self.inflight[peer] = 0
+            self.last_reply[peer] = now
+            self.acked_round[peer] = 0
+        self.read_round = self.confirmed_round = 0
+        self.round_sent.clear()
+        # Entrada vacia del nuevo termino: permite confirmar las de terminos anteriores
+        self.append_entry(None)
+        self.term_start = self.last_index
+
+        # Heartbeats inmediatos para afirmar el liderazgo
+        self.send_heartbeats()
+        self.advance_commit()
+
+    def submit(self, command):
+        """Anade un comando (clave, valor) al log; el futuro se resuelve con su indice al confirmarse."""
+        if self.state != State.LEADER or not self.active:
+            raise RuntimeError(f"P{self.id} no es el lider (lider actual: P{self.leader_id})")
+        # Los comandos que llegan en la misma vuelta del loop salen juntos en un solo lote
+        self.append_entry(command)
+        future = self.wheel.loop.create_future()
+        self.waiting[self.last_index] = future
+        return future
+
+    def read(self, key, mode="read_index"):
+        """Lectura linealizable de key; el futuro se resuelve con su valor.
+
+        mode: "log" (entrada vacia en el log, como una escritura), "read_index"
+        (ronda de confirmacion de liderazgo) o "lease" (local mientras dure el
+        lease; si expiro se hace ReadIndex).
+        """
+        if self.state != State.LEADER or not self.active:
+            raise RuntimeError(f"P{self.id} no es el lider (lider actual: P{self.leader_id})")
+        future = self.wheel.loop.create_future()
+        if mode == "log":
+            self.append_entry(None)
+            self.await_apply(self.last_index, key, future)
+            return future
+        # Hasta confirmar la entrada vacia de este termino commit_index puede estar atrasado
+        read_index = max(self.commit_index, self.term_start)
+        if mode == "lease" and self.wheel.loop.time() < self.lease_expiry:
+            self.await_apply(read_index, key, future)
+        else:
+            self.reads_awaiting_round.append((self.read_round + 1, read_index, key, future))
+            if not self.round_scheduled:
+                self.round_scheduled = True
+                self.wheel.loop.call_soon(self.send_read_round)
+        return future
+
+    def await_apply(self, read_index, key, future):
+        heapq.heappush(self.reads_awaiting_apply, (read_index, next(self.read_sequence), key, future))
+        self.serve_reads()
+
+    def send_read_round(self):
+        """Ronda de AppendEntries (vacios si no hay nada pendiente) para confirmar el liderazgo."""
+        self.round_scheduled = False
+        if self.state != State.LEADER or not self.active:
+            return
+        self.start_round()
+        for peer in self.peers:
+            self.replicate(peer, force=True)
+        self.confirm_rounds()
+
+    def start_round(self):
+        self.read_round += 1
+        self.round_sent[self.read_round] = self.wheel.loop.time()
+
+    def confirm_rounds(self):
+        """Una ronda esta confirmada cuando una mayoria (con el lider) ha respondido a ella o a una posterior."""
+        if self.majority == 1:
+            confirmed = self.read_round
+        else:
+            confirmed = sorted(self.acked_round.values(), reverse=True)[self.majority - 2]
+        if confirmed <= self.confirmed_round:
+            return
+        if self.lease_duration:
+            # Los seguidores no votaran hasta lease_duration despues de recibir la ronda,
+            # que salio en round_sent: el lease se cuenta desde el envio, no desde la respuesta
+            expiry = self.round_sent[confirmed] + self.lease_duration * (1 - MAX_CLOCK_DRIFT)
+            self.lease_expiry = max(self.lease_expiry, expiry)
+        for round_number in range(self.confirmed_round + 1, confirmed + 1):
+            self.round_sent.pop(round_number, None)
+        self.confirmed_round = confirmed
+        while self.reads_awaiting_round and self.reads_awaiting_round[0][0] <= confirmed:
+            _, read_index, key, future = self.reads_awaiting_round.popleft()
+            heapq.heappush(self.reads_awaiting_apply, (read_index, next(self.read_sequence), key, future))
+        self.serve_reads()
+
+    def serve_reads(self):
+        while self.reads_awaiting_apply and self.reads_awaiting_apply[0][0] <= self.last_applied:
+            _, _, key, future = heapq.heappop(self.reads_awaiting_apply)
+            if not future.done():
+                future.set_result(self.state_machine.get(key))
+
+    def flush(self):
+        self.flush_scheduled = False
+        if self.state != State.LEADER or not self.active:
+            return
+        # Group commit: un solo fsync para todo lo anadido en esta vuelta del loop
+        if self.storage is not None:
+            self.storage.sync()
+            self.durable_index = self.last_index
+        for peer in self.peers:
+            self.replicate(peer)
+        self.advance_commit()
+
+    def replicate(self, peer, heartbeat=False, force=False):
+        """Envia lotes al seguidor mientras haya entradas pendientes y hueco en el pipeline.
+
+        Con force=True se envia un AppendEntries aunque no haya nada pendiente o
+        el pipeline este lleno (rondas de lectura); heartbeat=True ademas lo marca
+        como heartbeat periodico para el detector del seguidor.
+        """
+        force = force or heartbeat
+        while True:
+            next_index = self.next_index[peer]
+            # Solo se replica lo que ya esta en el disco del lider
+            if not force and (next_index > self.durable_index or self.inflight[peer] >= self.max_inflight):
+                return
+            if next_index <= self.log_start:
+                self.send_snapshot(peer)
+                return
+            start = next_index - self.log_start - 1
+            entries = self.entries[start:min(start + self.max_batch, self.durable_index - self.log_start)]
+            message = {
+                "term": self.term, "leader_id": self.id, "heartbeat": heartbeat,
+                "prev_index": next_index - 1, "prev_term": self.term_at(next_index - 1),
+                "entries": entries, "leader_commit": self.commit_index, "read_round": self.read_round,
+            }
+            # Pipelining: se avanza next_index sin esperar la respuesta
+            self.next_index[peer] = next_index + len(entries)
+            self.inflight[peer] += 1
+            self.transport.send(self.id, peer, "receive_append_entries", message, self.on_append_reply)
+            force = heartbeat = False
+
+    def send_snapshot(self, peer):
+        """InstallSnapshot: el seguidor necesita entradas que el lider ya compacto."""
+        index, term, state = self.snapshot
+        message = {"term": self.term, "leader_id": self.id, "heartbeat": False, "read_round": self.read_round,
+                   "last_included_index": index, "last_included_term": term, "state": state}
+        self.next_index[peer] = index + 1
+        self.inflight[peer] += 1
+        self.transport.send(self.id, peer, "receive_install_snapshot", message, self.on_append_reply)
 
     def send_heartbeats(self):
-        while self.state == State.LEADER:
-            # Simular Heartbeat (AppendEntries vacoo)
-            for node in self.all_nodes:
-                if node.id != self.id:
-                    node.receive_heartbeat(self.id, self.term)
-            time.sleep(0.1) # Heartbeat cada 100ms
-
-    def receive_heartbeat(self, leader_id, leader_term):
-        with self.timeout_lock:
-            # Si el Heartbeat tiene un tormino mayor, rendirse inmediatamente
-            if leader_term > self.term:
-                self.term = leader_term
-                self.state = State.FOLLOWER
-                self.leader_id = leader_id
-                self.voted_for = None
-            
-            # Si el Heartbeat es volido, reiniciar el timeout de eleccion
-            if leader_term == self.term and self.state != State.LEADER:
-                self.leader_id = leader_id
-                self.reset_election_timeout()
-            
-            # Nota: Si se esto en CANDIDATE y se recibe un Heartbeat volido, debe volver a FOLLOWER
-            if self.state == State.CANDIDATE and leader_term >= self.term:
-                self.state = State.FOLLOWER
-                self.leader_id = leader_id
-                print(f"P{self.id} (CANDIDATE): Recibio HB volido, vuelve a FOLLOWER.")
+        self.heartbeat_timer = None
+        if self.state != State.LEADER or not self.active:
+            return
+        # Heartbeat (AppendEntries, vacio si no hay nada pendiente) a todos los pares;
+        # se reprograma en la rueda. Cada heartbeat es tambien una ronda que renueva el lease
+        now = self.wheel.loop.time()
+        self.start_round()
+        for peer in self.peers:
+            if self.inflight[peer] and now - self.last_reply[peer] > 2 * self.heartbeat_interval:
+                # Sin respuestas desde hace dos heartbeats: dar los lotes en vuelo por perdidos
+                self.inflight[peer] = 0
+                self.next_index[peer] = self.match_index[peer] + 1
+            self.replicate(peer, heartbeat=True)
+        self.heartbeat_timer = self.wheel.schedule(self.heartbeat_interval, self.send_heartbeats)
 
+    def follow(self, message):
+        """Acepta al remitente como lider si su termino no es antiguo; devuelve False si lo es."""
+        leader_id, leader_term = message["leader_id"], message["term"]
+        if leader_term < self.term:
+            return False
 
-def main():
-    NUM_NODES = 5
-    # Inicializar nodos
-    nodes = [RaftNode(i, []) for i in range(NUM_NODES)]
-    # Conectar nodos
-    for node in nodes:
-        node.all_nodes = nodes
-        
-    print(f"Iniciando simulacion de Raft con {NUM_NODES} nodos. Observa como inician las elecciones...")
-    
-    # Iniciar la actividad del nodo
+        # Un heartbeat de un termino mayor o igual: seguir a ese lider
+        if leader_term > self.term or self.state != State.FOLLOWER:
+            if self.state == State.CANDIDATE:
+                self.log(f"P{self.id} (CANDIDATE): Recibio HB valido, vuelve a FOLLOWER.")
+            self.step_down(leader_term)
+        if self.detector is not None:
+            now = self.wheel.loop.time()
+            if leader_id != self.leader_id:
+                self.detector.reset(now)  # Lider nuevo: su primer intervalo no cuenta
+            elif message["heartbeat"]:
+                # Solo los heartbeats periodicos alimentan al detector: los lotes
+                # llegan a rafagas y acortarian el intervalo estimado
+                self.detector.heartbeat(now)
+        self.leader_id = leader_id
+        self.last_leader_contact = self.wheel.loop.time()
+        self.election_started_at = None
+        self.reset_election_timeout(suspicion=True)
+        return True
+
+    def receive_append_entries(self, message):
+        if not self.follow(message):
+            return {"term": self.term, "success": False, "follower": self.id, "last_index": self.last_index,
+                    "read_round": message["read_round"]}
+
+        prev_index, entries = message["prev_index"], message["entries"]
+        if prev_index < self.log_start:
+            # Las entradas hasta log_start ya estan confirmadas en el snapshot
+            entries = entries[self.log_start - prev_index:]
+            prev_index = self.log_start
+        # Comprobacion de consistencia: el log debe contener prev_index con prev_term
+        elif prev_index > self.last_index or self.term_at(prev_index) != message["prev_term"]:
+            return {"term": self.term, "success": False, "follower": self.id,
+                    "last_index": min(self.last_index, prev_index - 1), "read_round": message["read_round"]}
+
+        # Anadir las entradas nuevas, truncando desde el primer conflicto
+        for offset, entry in enumerate(entries):
+            index = prev_index + 1 + offset
+            if index > self.last_index or self.term_at(index) != entry[0]:
+                del self.entries[index - self.log_start - 1:]
+                self.entries.extend(entries[offset:])
+                if self.storage is not None:
+                    for position, (term, command) in enumerate(entries[offset:], index):
+                        self.storage.append(position, term, command)
+                break
+        # Un fsync por lote antes de confirmar al lider
+        if self.storage is not None:
+            self.storage.sync()
+        self.durable_index = self.last_index
+        match_index = prev_index + len(entries)
+        # Un lote antiguo retransmitido o reordenado trae un leader_commit menor: el commit solo avanza
+        commit = min(message["leader_commit"], match_index)
+        if commit > self.commit_index:
+            self.commit_to(commit)
+        return {"term": self.term, "success": True, "follower": self.id, "match_index": match_index,
+                "read_round": message["read_round"]}
+
+    def receive_install_snapshot(self, message):
+        if not self.follow(message):
+            return {"term": self.term, "success": False, "follower": self.id, "last_index": self.last_index,
+                    "read_round": message["read_round"]}
+        index, term = message["last_included_index"], message["last_included_term"]
+        if index > self.commit_index:
+            # Si el log local contiene la ultima entrada del snapshot se conserva lo posterior
+            keep = index < self.last_index and self.term_at(index) == term
+            self.entries = self.entries[index - self.log_start:] if keep else []
+            self.log_start, self.log_start_term = index, term
+            self.snapshot = (index, term, message["state"])
+            self.state_machine = dict(message["state"])
+            self.commit_index = self.last_applied = self.durable_index = index
+            if keep:
+                self.durable_index = self.last_index
+            if self.storage is not None:
+                self.storage.save_snapshot(index, term, message["state"], discard_log=not keep)
+        return {"term": self.term, "success": True, "follower": self.id, "match_index": index,
+                "read_round": message["read_round"]}
+
+    def on_append_reply(self, reply):
+        if reply["term"] > self.term:
+            self.step_down(reply["term"])
+            return
+        if self.state != State.LEADER or reply["term"] != self.term:
+            return
+        peer = reply["follower"]
+        self.inflight[peer] = max(0, self.inflight[peer] - 1)
+        self.last_reply[peer] = self.wheel.loop.time()
+        if reply["success"]:
+            if reply["match_index"] > self.match_index[peer]:
+                self.match_index[peer] = reply["match_index"]
+                self.advance_commit()
+        else:
+            # Log divergente o incompleto: retroceder hasta donde el seguidor coincide
+            self.next_index[peer] = max(self.match_index[peer], min(self.next_index[peer] - 1, reply["last_index"])) + 1
+        # Cualquier respuesta de este termino confirma que el seguidor aun acepta al lider
+        if reply["read_round"] > self.acked_round[peer]:
+            self.acked_round[peer] = reply["read_round"]
+            self.confirm_rounds()
+        self.replicate(peer)
+
+    def advance_commit(self):
+        """Confirma el mayor indice replicado en una mayoria (el lider cuenta con su propio log)."""
+        if self.majority == 1:
+            index = self.durable_index
+        else:
+            index = sorted(self.match_index.values(), reverse=True)[self.majority - 2]
+        # Solo se confirman por conteo entradas del termino actual (Raft, seccion 5.4.2)
+        if index > self.commit_index and self.term_at(index) == self.term:
+            self.commit_to(index)
+
+    def commit_to(self, index):
+        self.commit_index = index
+        while self.last_applied < self.commit_index:
+            self.last_applied += 1
+            command = self.entries[self.last_applied - self.log_start - 1][1]
+            if command is not None:
+                key, value = command
+                self.state_machine[key] = value
+            future = self.waiting.pop(self.last_applied, None)
+            if future is not None and not future.done():
+                future.set_result(self.last_applied)
+        if self.snapshot_interval and self.last_applied - self.log_start >= self.snapshot_interval:
+            self.take_snapshot()
+        self.serve_reads()
+
+    def take_snapshot(self):
+        """Compacta el log: el estado aplicado sustituye a las entradas hasta last_applied."""
+        index, term = self.last_applied, self.term_at(self.last_applied)
+        self.snapshot = (index, term, dict(self.state_machine))
+        if self.storage is not None:
+            self.storage.save_snapshot(*self.snapshot)
+        del self.entries[:index - self.log_start]
+        self.log_start, self.log_start_term = index, term
+
+    def fail(self):
+        """Simula la caida del nodo: cancela sus temporizadores y deja de responder."""
+        self.active = False
+        for timer in (self.election_timer, self.heartbeat_timer):
+            if timer is not None:
+                timer.cancel()
+        self.fail_waiting()
+        self.log(f"\n--- P{self.id} HA FALLADO (Inactivo) ---")
+
+
+def build_cluster(num_nodes, loop, phi_threshold=8.0, verbose=True, latency=(0.001, 0.003),
+                  data_dir=None, **options):
+    """Crea num_nodes nodos que comparten transporte y rueda de temporizadores.
+
+    Con data_dir cada nodo persiste su estado en data_dir/nodeN.
+    """
+    transport = LocalTransport(loop, latency)
+    wheel = TimerWheel(loop)
+    ids = list(range(num_nodes))
+    nodes = [
+        RaftNode(i, ids, transport, wheel, phi_threshold=phi_threshold, verbose=verbose,
+                 storage=open_storage(data_dir, i), **options)
+        for i in ids
+    ]
+    return nodes, transport, wheel
+
+
+def open_storage(data_dir, node_id):
+    return None if data_dir is None else WriteAheadLog(os.path.join(data_dir, f"node{node_id}"))
+
+
+def restart(node, data_dir, **options):
+    """Reemplaza un nodo caido por uno nuevo que recupera su estado del disco."""
+    options.setdefault("election_timeout", node.election_timeout)
+    restarted = RaftNode(node.id, node.peers, node.transport, node.wheel, node.heartbeat_interval,
+                         verbose=node.verbose, storage=open_storage(data_dir, node.id),
+                         phi_threshold=None if node.detector is None else node.detector.threshold, **options)
+    restarted.start()
+    return restarted
+
+
+async def simulate(data_dir, num_nodes=5, snapshot_interval=8, lease_duration=0.15):
+    loop = asyncio.get_running_loop()
+    nodes, _, _ = build_cluster(num_nodes, loop, data_dir=data_dir, snapshot_interval=snapshot_interval,
+                                lease_duration=lease_duration)
+    print(f"Iniciando simulacion de Raft con {num_nodes} nodos. Observa como inician las elecciones...")
+
+    # Iniciar la actividad del nodo: solo arma su temporizador de eleccion
     for node in nodes:
-        node.thread.start()
+        node.start()
+
+    # Dejar correr la simulacion, replicar comandos y tumbar al lider:
+    # el detector dispara la nueva eleccion y el nuevo lider conserva el log confirmado
+    await asyncio.sleep(1)
+    for round_number in range(2):
+        leader = next(node for node in nodes if node.state == State.LEADER and node.active)
+        indexes = await asyncio.gather(*(leader.submit((f"x{i}", round_number)) for i in range(10)))
+        print(f"\nP{leader.id} confirmo 10 comandos (indices {indexes[0]}-{indexes[-1]})")
+        reads = {mode: await leader.read("x0", mode) for mode in ("log", "read_index", "lease")}
+        print(f"P{leader.id} lee x0 de forma linealizable: {reads}")
+        if round_number == 0:
+            crashed = leader
+            crashed.fail()
+            await asyncio.sleep(1)
+
+    # El lider caido reinicia: recupera term, voto, snapshot y log de su WAL y se pone al dia
+    nodes[crashed.id] = restart(crashed, data_dir, snapshot_interval=snapshot_interval,
+                                lease_duration=lease_duration)
+    recovered = nodes[crashed.id]
+    print(f"\nP{recovered.id} reinicia desde disco: T={recovered.term}, snapshot hasta {recovered.log_start}, "
+          f"log hasta {recovered.last_index}, x0={recovered.state_machine.get('x0')}")
+    await asyncio.sleep(0.5)
 
-    # Dejar correr la simulacion por un tiempo
-    time.sleep(10)
-    
-    # Detener la simulacion (no es limpio, pero funciona para el ejemplo)
     print("\nSimulacion finalizada. Estado final:")
     for node in nodes:
-        print(f"P{node.id}: Estado={node.state.name}, T={node.term}, Loder={node.leader_id}")
+        print(f"P{node.id}: Estado={node.state.name}, T={node.term}, Lider={node.leader_id}, Activo={node.active}, "
+              f"Log={node.last_index}, Commit={node.commit_index}, x0={node.state_machine.get('x0')}")
+
+
+async def check_reordered_batch():
+    """Un lote temprano que llega tarde o duplicado no debe hacer retroceder commit_index."""
+    loop = asyncio.get_running_loop()
+    follower = RaftNode(1, [0, 1, 2], LocalTransport(loop), TimerWheel(loop), verbose=False)
+
+    def batch(prev_index, first, last, leader_commit):
+        return {"leader_id": 0, "term": 1, "heartbeat": False, "prev_index": prev_index,
+                "prev_term": 1 if prev_index else 0, "entries": [(1, (f"x{i}", i)) for i in range(first, last + 1)],
+                "leader_commit": leader_commit, "read_round": 0}
+
+    assert follower.receive_append_entries(batch(0, 1, 3, leader_commit=0))["success"]
+    assert follower.receive_append_entries(batch(3, 4, 10, leader_commit=10))["success"]
+    # Retransmision del primer lote con el leader_commit actual del lider: match_index es solo 3
+    reply = follower.receive_append_entries(batch(0, 1, 3, leader_commit=12))
+    follower.fail()
+    assert reply["success"] and follower.commit_index == follower.last_applied == 10, \
+        (follower.commit_index, follower.last_applied)
+    assert follower.last_index == 10 and follower.state_machine["x10"] == 10
+
+
+def main():
+    asyncio.run(check_reordered_batch())
+    with tempfile.TemporaryDirectory() as data_dir:
+        asyncio.run(simulate(data_dir))
 
 if __name__ == "__main__":
     main()
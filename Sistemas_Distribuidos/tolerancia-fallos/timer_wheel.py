@@ -0,0 +1,138 @@
+import math
+
+
+class Timer:
+    """Temporizador programado en una TimerWheel; cancel() es O(1)."""
+    __slots__ = ("wheel", "tick", "callback", "args", "cancelled")
+
+    def __init__(self, wheel, tick, callback, args):
+        self.wheel = wheel
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel._remove(self)
+
+
+class TimerWheel:
+    """Rueda de temporizadores con hash (Varghese y Lauck) sobre un event loop de asyncio.
+
+    Programar y cancelar cuestan O(1): cada temporizador cae en la ranura
+    tick % slots. La rueda no gira en vacio: solo arma un call_at para el
+    siguiente tick con temporizadores, y ninguno si esta vacia, asi que no
+    consume CPU en reposo aunque haya miles de temporizadores reiniciandose.
+    """
+    def __init__(self, loop, tick=0.005, slots=1024):
+        self.loop = loop
+        self.tick = tick
+        self.slots = [set() for _ in range(slots)]
+        self.count = 0
+        self.origin = loop.time()
+        self.current_tick = 0     # Todos los ticks anteriores ya se procesaron
+        self.armed_tick = None
+        self.handle = None
+
+    def _tick_of(self, when):
+        return max(math.ceil((when - self.origin) / self.tick), self.current_tick)
+
+    def schedule(self, delay, callback, *args):
+        """Ejecuta callback(*args) dentro de `delay` segundos (redondeado al tick)."""
+        tick = self._tick_of(self.loop.time() + delay)
+        timer = Timer(self, tick, callback, args)
+        self.slots[tick % len(self.slots)].add(timer)
+        self.count += 1
+        if self.armed_tick is None or tick < self.armed_tick:
+            self._arm(tick)
+        return timer
+
+    def _remove(self, timer):
+        slot = self.slots[timer.tick % len(self.slots)]
+        if timer in slot:
+            slot.remove(timer)
+            self.count -= 1
+        if self.count == 0 and self.handle is not None:
+            self.handle.cancel()
+            self.handle = self.armed_tick = None
+
+    def _arm(self, tick):
+        if self.handle is not None:
+            self.handle.cancel()
+        self.armed_tick = tick
+        self.handle = self.loop.call_at(self.origin + tick * self.tick, self._advance)
+
+    def _next_tick(self):
+        """Siguiente tick con temporizadores, buscando como mucho una vuelta de la rueda."""
+        num_slots = len(self.slots)
+        earliest = None
+        for offset in range(num_slots):
+            tick = self.current_tick + offset
+            for timer in self.slots[tick % num_slots]:
+                if timer.tick == tick:
+                    return tick
+                if earliest is None or timer.tick < earliest:
+                    earliest = timer.tick
+        return earliest
+
+    def _advance(self):
+        armed_tick = self.armed_tick
+        self.handle = self.armed_tick = None
+        now_tick = math.floor((self.loop.time() - self.origin) / self.tick)
+        if armed_tick is not None:
+            now_tick = max(now_tick, armed_tick)  # call_at puede adelantarse por la resolucion del reloj
+        num_slots = len(self.slots)
+        # Cada ranura se visita como mucho una vez aunque la rueda haya estado parada mucho tiempo
+        due = []
+        for tick in range(self.current_tick, min(now_tick + 1, self.current_tick + num_slots)):
+            slot = self.slots[tick % num_slots]
+            expired = [timer for timer in slot if timer.tick <= now_tick]
+            for timer in expired:
+                slot.remove(timer)
+            due.extend(expired)
+        self.count -= len(due)
+        self.current_tick = max(self.current_tick, now_tick + 1)
+
+        due.sort(key=lambda timer: timer.tick)
+        for timer in due:
+            if not timer.cancelled:
+                timer.cancelled = True
+                timer.callback(*timer.args)
+        # Un callback que reprograma arma la rueda para su propio tick, que puede ser
+        # posterior a temporizadores ya pendientes: se rearma siempre al mas temprano
+        if self.count:
+            next_tick = self._next_tick()
+            if self.armed_tick is None or next_tick < self.armed_tick:
+                self._arm(next_tick)
+
+
+def check_reschedule():
+    """Un callback que se reprograma lejos no debe retrasar un temporizador anterior ya pendiente."""
+    import asyncio
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        wheel = TimerWheel(loop, tick=0.01)
+        fired = {}
+        start = loop.time()
+        wheel.schedule(0.2, lambda: fired.setdefault("pendiente", loop.time() - start))
+        wheel.schedule(0.05, lambda: wheel.schedule(1.0, lambda: fired.setdefault("lejano", loop.time() - start)))
+        await asyncio.sleep(1.2)
+        return fired
+
+    fired = asyncio.run(run())
+    assert 0.2 <= fired["pendiente"] < 0.3, fired
+    assert fired["lejano"] >= 1.05, fired
+    return fired
+
+
+def main():
+    fired = check_reschedule()
+    print(f"Temporizador a 0.2 s disparado a {fired['pendiente']:.3f} s; "
+          f"el reprogramado a 1.05 s, a {fired['lejano']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
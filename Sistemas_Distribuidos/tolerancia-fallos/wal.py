@@ -0,0 +1,162 @@
+import mmap
+import os
+import pickle
+import struct
+import zlib
+
+HEADER = struct.Struct("<IIB")        # Longitud del payload, crc32 del payload, tipo
+STATE_RECORD = struct.Struct("<qq")   # Termino, voto (-1 = ninguno)
+ENTRY_RECORD = struct.Struct("<qq")   # Indice, termino; le sigue el comando serializado
+STATE, ENTRY = 1, 2
+SNAPSHOT = "snapshot.bin"
+
+
+class WriteAheadLog:
+    """Log de escritura anticipada segmentado para el estado persistente de Raft.
+
+    Guarda term/voted_for y las entradas como registros con crc32 en segmentos
+    NNNNNNNN.wal. Las escrituras se acumulan en memoria y sync() las escribe con
+    un solo fsync (group commit). Al superar segment_bytes se abre un segmento
+    nuevo que empieza con el term/voto vigente, de modo que los segmentos viejos
+    se pueden borrar en cuanto un snapshot cubre todas sus entradas.
+    """
+    def __init__(self, directory, segment_bytes=4 << 20, fsync=True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.segments = []   # [numero, mayor indice de entrada escrito en el segmento]
+        self.buffer = bytearray()
+        self.file = None
+        self.term = 0
+        self.voted_for = None
+        self.syncs = 0
+
+    def _path(self, number):
+        return os.path.join(self.directory, f"{number:08d}.wal")
+
+    def _sync_directory(self):
+        if self.fsync:
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def load(self):
+        """Recupera (term, voted_for, (indice, termino, estado) del snapshot, entradas posteriores).
+
+        Los segmentos se leen con mmap; un registro incompleto o con crc
+        erroneo al final del ultimo segmento (escritura cortada) se descarta.
+        """
+        snapshot = (0, 0, {})
+        snapshot_path = os.path.join(self.directory, SNAPSHOT)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+        entries = []
+        numbers = sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".wal"))
+        for number in numbers:
+            valid, max_index = self._replay(number, snapshot[0], entries)
+            if valid < os.path.getsize(self._path(number)):
+                os.truncate(self._path(number), valid)
+            self.segments.append([number, max_index])
+        if self.segments:
+            self.file = open(self._path(self.segments[-1][0]), "ab")
+        else:
+            self._roll()
+        return self.term, self.voted_for, snapshot, entries
+
+    def _replay(self, number, base, entries):
+        valid = max_index = 0
+        with open(self._path(number), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return 0, 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                while valid + HEADER.size <= size:
+                    length, crc, kind = HEADER.unpack_from(data, valid)
+                    start = valid + HEADER.size
+                    payload = data[start:start + length]
+                    if len(payload) < length or zlib.crc32(payload) != crc:
+                        break
+                    if kind == STATE:
+                        self.term, vote = STATE_RECORD.unpack_from(payload)
+                        self.voted_for = None if vote < 0 else vote
+                    else:
+                        index, term = ENTRY_RECORD.unpack_from(payload)
+                        max_index = max(max_index, index)
+                        if index > base:
+                            # Una entrada con indice i reemplaza a la i y a todas las posteriores
+                            del entries[index - base - 1:]
+                            if len(entries) != index - base - 1:
+                                raise ValueError(f"Hueco en el log antes del indice {index} ({self._path(number)})")
+                            entries.append((term, pickle.loads(payload[ENTRY_RECORD.size:])))
+                    valid = start + length
+        return valid, max_index
+
+    def _write(self, kind, payload):
+        self.buffer += HEADER.pack(len(payload), zlib.crc32(payload), kind)
+        self.buffer += payload
+
+    def save_state(self, term, voted_for):
+        self.term, self.voted_for = term, voted_for
+        self._write(STATE, STATE_RECORD.pack(term, -1 if voted_for is None else voted_for))
+
+    def append(self, index, term, command):
+        """Anade la entrada (trunca implicitamente las de indice >= index al recuperar)."""
+        self._write(ENTRY, ENTRY_RECORD.pack(index, term) + pickle.dumps(command, pickle.HIGHEST_PROTOCOL))
+        segment = self.segments[-1]
+        segment[1] = max(segment[1], index)
+
+    def sync(self):
+        """Escribe todo lo acumulado con un solo fsync; devuelve False si no habia nada."""
+        if not self.buffer:
+            return False
+        self.file.write(self.buffer)
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.buffer.clear()
+        self.syncs += 1
+        if self.file.tell() >= self.segment_bytes:
+            self._roll()
+        return True
+
+    def _roll(self):
+        """Abre un segmento nuevo que empieza con el term/voto vigente."""
+        if self.file is not None:
+            self.file.close()
+        number = self.segments[-1][0] + 1 if self.segments else 0
+        self.file = open(self._path(number), "ab")
+        self.segments.append([number, 0])
+        self.save_state(self.term, self.voted_for)
+        self.sync()
+        self._sync_directory()
+
+    def save_snapshot(self, index, term, state, discard_log=False):
+        """Escribe el snapshot de forma atomica y borra los segmentos que ya cubre.
+
+        Con discard_log (snapshot instalado por el lider que reemplaza el log
+        local) se descartan todos los segmentos anteriores.
+        """
+        self.sync()
+        path = os.path.join(self.directory, SNAPSHOT)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump((index, term, state), f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        if discard_log:
+            self._roll()
+        # El segmento activo nunca se borra: contiene el term/voto mas reciente
+        for segment in self.segments[:-1]:
+            if discard_log or segment[1] <= index:
+                os.remove(self._path(segment[0]))
+        self.segments = [s for s in self.segments[:-1] if not (discard_log or s[1] <= index)] + self.segments[-1:]
+        self._sync_directory()
+
+    def close(self):
+        self.sync()
+        self.file.close()